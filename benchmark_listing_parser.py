@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de los backends del parser del listado sobre la página guardada
+(100 filas NIC). Comprueba que ambos devuelven las mismas filas y mide el
+tiempo por página.
+
+Uso:
+    python benchmark_listing_parser.py [--repeat 20] [--html archivo.html]
+"""
+
+import argparse
+import os
+import time
+
+from listing_html_parser import PARSER_BACKENDS, parse_listing_table
+
+FIXTURE_HTML = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "Necesidades de Contratación y Recepción de Proformas__ Sistema Oficial de Contratación Pública.html"
+)
+
+
+def time_backend(html_content, backend, repeat):
+    """
+    Mejor tiempo (segundos) de repeat ejecuciones, y el resultado de la última
+    """
+    best = None
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = parse_listing_table(html_content, backend=backend)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del parser del listado NCO")
+    parser.add_argument("--html", default=FIXTURE_HTML, help="Página del listado guardada")
+    parser.add_argument("--repeat", type=int, default=20, help="Repeticiones por backend")
+    args = parser.parse_args()
+
+    with open(args.html, 'r', encoding='utf-8') as f:
+        html_content = f.read()
+    print(f"[INFO] {os.path.basename(args.html)}: {len(html_content) / 1024:.0f} KB")
+
+    timings = {}
+    results = {}
+    for backend in PARSER_BACKENDS:
+        timings[backend], results[backend] = time_backend(html_content, backend, args.repeat)
+        rows = len(results[backend][1]) if results[backend] else 0
+        print(f"   • {backend:>4}: {timings[backend] * 1000:7.2f} ms/página ({rows} filas)")
+
+    if results['lxml'] != results['bs4']:
+        print("[ERROR] Los backends devuelven filas distintas")
+        return 1
+
+    print(f"[OK] Filas idénticas; lxml es {timings['bs4'] / timings['lxml']:.1f}x más rápido que bs4")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
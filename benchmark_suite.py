@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmarks offline del procesamiento del SERCOP.
+
+Mide, sin red, cada etapa sobre la página del listado guardada (100 filas)
+y sobre copias sintéticas escaladas (x10, x50):
+
+- listing_parse_lxml / listing_parse_bs4: filas de #table_id (extract_table_data_from_page)
+- detail_parse:     parse_detail_page_html sobre una página de detalle sintética
+- extract_codigo:   extract_codigo_from_html_content
+- filter_keywords:  filter_data_by_keywords
+- clean_data:       clean_data
+- export_excel:     export_to_excel
+
+Los tiempos se comparan con benchmark_baselines.json y el script termina con
+código 1 si alguna etapa empeora más que el umbral. Los tiempos absolutos
+dependen de la máquina y de las versiones de lxml/bs4/pandas: la línea base
+guarda el tipo de equipo donde se generó (sistema, arquitectura y Python, sin
+nombre de host) y, si no coincide con el actual, se compara con el umbral más
+holgado --foreign-threshold, que también hace fallar el script. Genere la
+línea base local con --update-baseline antes de medir un cambio.
+
+Uso:
+    python benchmark_suite.py                     # compara con la línea base
+    python benchmark_suite.py --update-baseline   # guarda los tiempos actuales
+    python benchmark_suite.py --stages detail_parse,extract_codigo --scales 1
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import re
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmark_listing_parser import FIXTURE_HTML
+from listing_html_parser import parse_listing_rows
+from sercop_detail_client import extract_codigo_from_html_content, parse_detail_page_html
+from sercop_listing_client import LISTING_HEADERS
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baselines.json")
+DEFAULT_SCALES = (1, 10, 50)
+DEFAULT_THRESHOLD = 0.30  # 30 % más lento que la línea base se considera regresión
+FOREIGN_THRESHOLD = 1.50  # umbral frente a una línea base de otro tipo de equipo
+
+# Etapas que necesitan el script principal (selenium, Gemini, .env)
+PIPELINE_STAGES = ('filter_keywords', 'clean_data', 'export_excel')
+
+_TBODY_RE = re.compile(r'(<tbody[^>]*>)(.*?)(</tbody>)', re.S)
+
+# Productos de ejemplo para la página de detalle sintética
+_SAMPLE_PRODUCTS = [
+    ('432110012', 'ADQUISICIÓN DE LICENCIAS DE SOFTWARE ANTIVIRUS', 'Unidad', '50'),
+    ('452300011', 'SERVICIO DE MANTENIMIENTO DE SISTEMA INFORMÁTICO', 'Servicio', '1'),
+    ('841100011', 'CONSULTORÍA EN SEGURIDAD DE LA INFORMACIÓN', 'Servicio', '1'),
+    ('381200021', 'MATERIALES DE ASEO Y LIMPIEZA', 'Kit', '120'),
+]
+
+
+def scale_listing_html(html_content, factor):
+    """
+    Copia de la página del listado con las filas de #table_id repetidas factor veces
+    """
+    if factor <= 1:
+        return html_content
+    return _TBODY_RE.sub(lambda m: m.group(1) + m.group(2) * factor + m.group(3), html_content, count=1)
+
+
+def build_detail_html(products=20):
+    """
+    Página de detalle sintética con la estructura de NCORegistroDetalle.cpe:
+    tabla de productos, cabecera con <strong>Etiqueta:</strong> y el código NIC
+    """
+    rows = []
+    for i in range(products):
+        cpc, descripcion, unidad, cantidad = _SAMPLE_PRODUCTS[i % len(_SAMPLE_PRODUCTS)]
+        rows.append(f"<tr><td>{i + 1}</td><td>{cpc}</td><td>{descripcion}</td><td>{unidad}</td><td>{cantidad}</td></tr>")
+    header = ''.join(
+        f"<tr><td><strong>{label}:</strong></td><td>{value}</td></tr>"
+        for label, value in [
+            ('Entidad Contratante', 'GOBIERNO AUTONOMO DESCENTRALIZADO MUNICIPAL DE MACHALA'),
+            ('Fecha de Publicación', '2025-09-25 18:55:00'),
+            ('Fecha Límite de Propuestas', '2025-09-26 18:57:00'),
+            ('Estado', 'En Curso'),
+            ('Dirección de Entrega', 'AV. 25 DE JUNIO Y 9 DE MAYO'),
+        ]
+    )
+    navigation = '<li><a href="#">Menú</a></li>' * 150
+    return (
+        "<html><head><title>Necesidad de Contratación</title><script>var x = 1;</script></head><body>"
+        f"<ul class='menu'>{navigation}</ul>"
+        "<table class='productos'><tr><th>No.</th><th>CPC</th><th>Descripción</th><th>Unidad</th><th>Cantidad</th></tr>"
+        f"{''.join(rows)}</table>"
+        "<div><strong>Código Necesidad de Contratación:</strong> NIC-0760000260001-2025-00102</div>"
+        f"<table class='cabecera'>{header}</table>"
+        "</body></html>"
+    )
+
+
+def load_pipeline_functions():
+    """
+    filter_data_by_keywords, clean_data y export_to_excel del script principal
+    (se importan aquí para no configurar Gemini si no se piden esas etapas)
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        import extract_table_data_pagination_with_codigo as pipeline
+    return pipeline
+
+
+def best_time(func, repeat):
+    """
+    Mejor tiempo (segundos) de repeat ejecuciones, con la salida por consola silenciada
+    """
+    best = None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def build_stages(listing_html, scale, workdir, stage_names=None):
+    """
+    {nombre: función sin argumentos} para una escala
+    El script principal solo se importa si se pide alguna de PIPELINE_STAGES
+    """
+    scaled_html = scale_listing_html(listing_html, scale)
+    rows = parse_listing_rows(scaled_html)
+    df = pd.DataFrame(rows, columns=LISTING_HEADERS)
+    detail_html = build_detail_html(products=20 * scale)
+    excel_path = os.path.join(workdir, f"benchmark_x{scale}.xlsx")
+
+    stages = {
+        'listing_parse_lxml': lambda: parse_listing_rows(scaled_html, backend='lxml'),
+        'listing_parse_bs4': lambda: parse_listing_rows(scaled_html, backend='bs4'),
+        'detail_parse': lambda: parse_detail_page_html(detail_html),
+        'extract_codigo': lambda: extract_codigo_from_html_content(detail_html),
+    }
+
+    if stage_names and not stage_names.intersection(PIPELINE_STAGES):
+        return stages, len(rows)
+
+    pipeline = load_pipeline_functions()
+    cleaned = pipeline.clean_data(df.copy())
+    stages.update({
+        'filter_keywords': lambda: pipeline.filter_data_by_keywords(cleaned),
+        'clean_data': lambda: pipeline.clean_data(df.copy()),
+        'export_excel': lambda: pipeline.export_to_excel(cleaned, excel_path),
+    })
+    return stages, len(rows)
+
+
+def run_suite(stage_names=None, scales=DEFAULT_SCALES, repeat=3):
+    """
+    Ejecuta las etapas y devuelve {"etapa@xN": segundos}
+    """
+    with open(FIXTURE_HTML, 'r', encoding='utf-8') as f:
+        listing_html = f.read()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for scale in scales:
+            stages, row_count = build_stages(listing_html, scale, workdir, stage_names=stage_names)
+            print(f"\n[INFO] Escala x{scale} ({row_count} filas del listado)")
+            for name, func in stages.items():
+                if stage_names and name not in stage_names:
+                    continue
+                key = f"{name}@x{scale}"
+                results[key] = best_time(func, repeat)
+                print(f"   • {name:<20} {results[key] * 1000:10.2f} ms")
+    return results
+
+
+def compare_with_baseline(results, baseline, threshold):
+    """
+    Lista de (clave, actual, base, ratio) de las etapas que superan el umbral
+    """
+    regressions = []
+    for key, seconds in results.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+        ratio = seconds / base
+        if ratio > 1 + threshold:
+            regressions.append((key, seconds, base, ratio))
+    return regressions
+
+
+def host_fingerprint():
+    """
+    Tipo de equipo e intérprete en los que se miden los tiempos (sin datos que identifiquen la máquina)
+    """
+    return f"{platform.system()} {platform.machine()} {platform.python_implementation()} {platform.python_version()}"
+
+
+def load_baseline(path):
+    """
+    (tiempos, equipo) de la línea base; equipo es None en líneas base sin ese dato
+    """
+    if not os.path.exists(path):
+        return {}, None
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return data.get('timings', {}), data.get('host')
+
+
+def save_baseline(path, results):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'host': host_fingerprint(),
+            'unit': 'seconds',
+            'timings': {key: round(value, 6) for key, value in sorted(results.items())}
+        }, f, indent=2, ensure_ascii=False)
+        f.write('\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks offline del extractor SERCOP")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="Archivo JSON de líneas base")
+    parser.add_argument("--update-baseline", action="store_true", help="Guardar los tiempos actuales como línea base")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Regresión tolerada sobre la línea base (0.30 = 30 %%)")
+    parser.add_argument("--foreign-threshold", type=float, default=FOREIGN_THRESHOLD,
+                        help="Regresión tolerada si la línea base es de otro tipo de equipo (1.50 = 150 %%)")
+    parser.add_argument("--repeat", type=int, default=3, help="Repeticiones por etapa (se toma la mejor)")
+    parser.add_argument("--scales", default=",".join(str(s) for s in DEFAULT_SCALES),
+                        help="Factores de escala separados por comas")
+    parser.add_argument("--stages", default="", help="Etapas a ejecutar separadas por comas (por defecto todas)")
+    args = parser.parse_args()
+
+    scales = [int(s) for s in args.scales.split(",") if s.strip()]
+    stage_names = {s.strip() for s in args.stages.split(",") if s.strip()}
+    results = run_suite(stage_names=stage_names, scales=scales, repeat=args.repeat)
+
+    if args.update_baseline:
+        baseline, baseline_host = load_baseline(args.baseline)
+        if baseline_host != host_fingerprint():
+            # Tiempos de otra máquina no se mezclan con los locales
+            baseline = {}
+        baseline.update(results)
+        save_baseline(args.baseline, baseline)
+        print(f"\n[OK] Línea base guardada en {args.baseline} ({len(results)} etapas)")
+        return 0
+
+    baseline, baseline_host = load_baseline(args.baseline)
+    if not baseline:
+        print(f"\n[INFO] Sin línea base en {args.baseline}; ejecute con --update-baseline")
+        return 0
+    threshold = args.threshold
+    if baseline_host != host_fingerprint():
+        # Los tiempos no son comparables entre máquinas: solo se detectan regresiones grandes
+        threshold = max(args.threshold, args.foreign_threshold)
+        print(f"\n[WARNING] La línea base se generó en otro equipo ({baseline_host or 'desconocido'}); "
+              f"se usa el umbral de {threshold:.0%}. Regenere la línea base local con --update-baseline")
+
+    regressions = compare_with_baseline(results, baseline, threshold)
+    missing = [key for key in results if key not in baseline]
+    if missing:
+        print(f"\n[INFO] Etapas sin línea base: {', '.join(missing)}")
+    if regressions:
+        print(f"\n[ERROR] Regresiones de más del {threshold:.0%}:")
+        for key, seconds, base, ratio in regressions:
+            print(f"   • {key}: {seconds * 1000:.2f} ms (base {base * 1000:.2f} ms, x{ratio:.2f})")
+        return 1
+
+    print(f"\n[OK] Ninguna etapa supera la línea base en más del {threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
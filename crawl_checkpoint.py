@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Diario de checkpoints (append-only) para crawls largos.
+
+Cada bloque del listado y cada página de detalle completada se escribe como
+una línea JSON en cuanto termina. Con --resume se leen esas líneas, se saltan
+las unidades ya hechas y sus filas se vuelven a fusionar en los mismos
+DataFrames, así que una excepción o un Ctrl-C no obliga a repetir horas de
+trabajo.
+"""
+
+import json
+import os
+import threading
+
+
+class CheckpointJournal:
+    """
+    Diario JSONL con un registro por bloque de listado o por URL de detalle
+    """
+
+    def __init__(self, path="crawl_checkpoint.jsonl", resume=False):
+        self.path = path
+        self._lock = threading.Lock()
+        self._pages = {}
+        self._details = {}
+        self._listing_total = None
+
+        if resume:
+            self._load()
+            print(f"[INFO] Reanudando desde {path}: {len(self._pages)} bloques y {len(self._details)} detalles completados")
+        elif os.path.exists(path):
+            os.remove(path)
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Última línea cortada por una interrupción a mitad de escritura
+                    continue
+                if entry.get('type') == 'total':
+                    self._listing_total = entry.get('total')
+                elif entry.get('type') == 'page':
+                    self._pages[entry['start']] = (entry.get('total'), entry.get('rows', []))
+                elif entry.get('type') == 'detail':
+                    self._details[entry['url']] = (entry.get('products', []), entry.get('codigo'))
+
+    def _append(self, entry):
+        line = json.dumps(entry, ensure_ascii=False)
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+
+    def record_page(self, start, total, rows):
+        """
+        Guarda un bloque del listado (filas como listas en el orden de LISTING_HEADERS)
+        """
+        rows = [list(row) for row in rows]
+        self._append({'type': 'page', 'start': start, 'total': total, 'rows': rows})
+        with self._lock:
+            self._pages[start] = (total, rows)
+
+    def record_total(self, total):
+        """
+        Guarda el total del listado que devolvió el primer bloque
+        """
+        self._append({'type': 'total', 'total': total})
+        with self._lock:
+            self._listing_total = total
+
+    def reconcile_total(self, live_total):
+        """
+        Compara el total guardado con el del servidor; si cambió, los offsets de los
+        bloques guardados ya no apuntan a las mismas filas y se descartan
+        Devuelve True si los bloques guardados siguen siendo válidos
+        """
+        with self._lock:
+            stored_total = self._listing_total
+            if stored_total is None and 0 in self._pages:
+                # Diarios anteriores sin línea 'total': vale el del primer bloque
+                stored_total = self._pages[0][0]
+            pages = len(self._pages)
+        if stored_total == live_total:
+            return True
+        if pages:
+            print(f"[WARNING] El total del listado cambió ({stored_total} -> {live_total}), "
+                  f"se descartan {pages} bloques del checkpoint")
+        self._discard_pages()
+        self.record_total(live_total)
+        return False
+
+    def _discard_pages(self):
+        """
+        Reescribe el diario sin los bloques del listado (los detalles se conservan)
+        """
+        with self._lock:
+            self._pages = {}
+            self._listing_total = None
+            details = dict(self._details)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for url, (products, codigo) in details.items():
+                    entry = {'type': 'detail', 'url': url, 'products': products, 'codigo': codigo}
+                    f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+
+    def listing_total(self):
+        """
+        Total del listado guardado en el diario (None si aún no hay)
+        """
+        with self._lock:
+            return self._listing_total
+
+    def record_detail(self, url, products, codigo):
+        """
+        Guarda el resultado de una página de detalle
+        """
+        self._append({'type': 'detail', 'url': url, 'products': products, 'codigo': codigo})
+        with self._lock:
+            self._details[url] = (products, codigo)
+
+    def completed_pages(self):
+        """
+        Bloques ya descargados: {start: (total, filas)}
+        """
+        with self._lock:
+            return dict(self._pages)
+
+    def completed_details(self):
+        """
+        Detalles ya descargados: {url: (productos, código)}
+        """
+        with self._lock:
+            return dict(self._details)
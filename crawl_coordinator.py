@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Coordinador de crawls del listado NCO por shards sobre una cola SQLite.
+
+1. plan:   lee el total exacto (iTotalDisplayRecords del JSON o el texto de
+           #table_id_info) y lo divide en shards de rangos de registros.
+2. worker: procesos (en una o varias máquinas que compartan el archivo de
+           la cola) toman shards con un lease, los descargan y guardan las
+           filas en la misma base, deduplicadas por código NIC.
+3. merge:  exporta todas las filas, ordenadas como el listado, a Excel o CSV.
+           Se niega si queda algún shard sin terminar: un shard que falla
+           MAX_ATTEMPTS veces queda como 'failed' y se vuelve a poner en la
+           cola con el comando retry.
+
+Uso:
+    python crawl_coordinator.py plan --db crawl_queue.db --shard-size 5000
+    python crawl_coordinator.py worker --db crawl_queue.db --processes 4
+    python crawl_coordinator.py retry --db crawl_queue.db
+    python crawl_coordinator.py merge --db crawl_queue.db --output listado_completo.xlsx
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import time
+
+import pandas as pd
+
+from sercop_listing_client import DataTablesListingClient, LISTING_HEADERS, parse_total_from_info
+
+LEASE_TIMEOUT = 15 * 60  # segundos antes de devolver a la cola un shard abandonado
+MAX_ATTEMPTS = 5
+
+
+def fetch_total_records(search="", column_searches=None):
+    """
+    Total exacto de registros según el endpoint JSON (iTotalDisplayRecords)
+    """
+    client = DataTablesListingClient()
+    payload = client.fetch_page(0, 1, search=search, column_searches=column_searches)
+    return DataTablesListingClient.total_from_payload(payload)
+
+
+def connect(db_path):
+    conn = sqlite3.connect(db_path, timeout=60, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class ShardQueue:
+    """
+    Cola durable de shards y almacén de filas sobre SQLite
+    """
+
+    def __init__(self, db_path="crawl_queue.db"):
+        self.db_path = db_path
+        self.conn = connect(db_path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS shards (
+                id INTEGER PRIMARY KEY,
+                start INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                worker TEXT,
+                leased_at REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                rows_saved INTEGER NOT NULL DEFAULT 0,
+                error TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_shards_status ON shards(status);
+            CREATE TABLE IF NOT EXISTS listing_rows (
+                codigo TEXT PRIMARY KEY,
+                start INTEGER NOT NULL,
+                data TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+        """)
+
+    def plan(self, total, shard_size):
+        """
+        Crea los shards [start, start + shard_size) para cubrir total registros
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.execute("DELETE FROM shards")
+            self.conn.executemany(
+                "INSERT INTO shards (start, length) VALUES (?, ?)",
+                [(start, min(shard_size, total - start)) for start in range(0, total, shard_size)]
+            )
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('total', ?)", (str(total),))
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return self.conn.execute("SELECT COUNT(*) FROM shards").fetchone()[0]
+
+    def claim(self, worker):
+        """
+        Toma un shard pendiente (o con lease vencido); None si no queda trabajo
+        """
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Un lease vencido en el último intento (trabajador muerto) agota el shard
+            self.conn.execute(
+                "UPDATE shards SET status = 'failed', worker = NULL WHERE status = 'leased' AND leased_at < ? AND attempts >= ?",
+                (now - LEASE_TIMEOUT, MAX_ATTEMPTS)
+            )
+            row = self.conn.execute(
+                """
+                SELECT id, start, length FROM shards
+                WHERE attempts < ? AND (status = 'pending' OR (status = 'leased' AND leased_at < ?))
+                ORDER BY start LIMIT 1
+                """,
+                (MAX_ATTEMPTS, now - LEASE_TIMEOUT)
+            ).fetchone()
+            if row is None:
+                self.conn.execute("COMMIT")
+                return None
+            self.conn.execute(
+                "UPDATE shards SET status = 'leased', worker = ?, leased_at = ?, attempts = attempts + 1 WHERE id = ?",
+                (worker, now, row[0])
+            )
+            self.conn.execute("COMMIT")
+            return row
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def complete(self, shard_id, start, rows):
+        """
+        Guarda las filas del shard (deduplicadas por código NIC) y lo marca como hecho
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO listing_rows (codigo, start, data) VALUES (?, ?, ?)",
+                [
+                    (row.codigo_contratacion or row.url_detalle, start, json.dumps(row.to_list(), ensure_ascii=False))
+                    for row in rows
+                ]
+            )
+            self.conn.execute(
+                "UPDATE shards SET status = 'done', rows_saved = ?, error = NULL WHERE id = ?",
+                (len(rows), shard_id)
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def fail(self, shard_id, error):
+        """
+        Devuelve el shard a la cola, o lo marca como 'failed' si agotó MAX_ATTEMPTS
+        """
+        self.conn.execute(
+            """
+            UPDATE shards SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                              worker = NULL, error = ?
+            WHERE id = ?
+            """,
+            (MAX_ATTEMPTS, str(error)[:500], shard_id)
+        )
+
+    def retry_failed(self):
+        """
+        Vuelve a poner en la cola los shards fallidos, con los intentos a cero
+        """
+        return self.conn.execute(
+            "UPDATE shards SET status = 'pending', attempts = 0 WHERE status = 'failed'"
+        ).rowcount
+
+    def unfinished(self):
+        """
+        Shards que no están 'done': [(id, start, length, status, attempts, error)]
+        """
+        return self.conn.execute(
+            "SELECT id, start, length, status, attempts, error FROM shards WHERE status != 'done' ORDER BY start"
+        ).fetchall()
+
+    def status(self):
+        counts = dict(self.conn.execute("SELECT status, COUNT(*) FROM shards GROUP BY status").fetchall())
+        counts['rows'] = self.conn.execute("SELECT COUNT(*) FROM listing_rows").fetchone()[0]
+        return counts
+
+    def to_dataframe(self):
+        """
+        Filas únicas en el orden del listado (código NIC descendente)
+        """
+        data = [json.loads(d) for (d,) in self.conn.execute("SELECT data FROM listing_rows ORDER BY codigo DESC")]
+        return pd.DataFrame(data, columns=LISTING_HEADERS)
+
+
+def run_worker(db_path, page_size=100):
+    """
+    Bucle de un proceso trabajador: toma shards hasta vaciar la cola
+    """
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    queue = ShardQueue(db_path)
+    client = DataTablesListingClient(page_size=page_size)
+    processed = 0
+
+    while True:
+        shard = queue.claim(worker)
+        if shard is None:
+            break
+        shard_id, start, length = shard
+        try:
+            rows = list(client.iter_rows(max_records=length, offset=start))
+            queue.complete(shard_id, start, rows)
+            processed += 1
+            print(f"[OK] {worker} shard {shard_id} ({start}-{start + length}): {len(rows)} filas")
+        except Exception as e:
+            print(f"[ERROR] {worker} shard {shard_id}: {e}")
+            queue.fail(shard_id, e)
+
+    print(f"[INFO] {worker} terminó: {processed} shards")
+    return processed
+
+
+def print_unfinished(shards):
+    print(f"[WARNING] {len(shards)} shards sin terminar:")
+    for shard_id, start, length, status, attempts, error in shards:
+        detail = f" - {error}" if error else ""
+        print(f"   • shard {shard_id} ({start}-{start + length}): {status}, {attempts} intentos{detail}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawl del listado NCO por shards con cola SQLite")
+    parser.add_argument("command", choices=["plan", "worker", "merge", "status", "retry"])
+    parser.add_argument("--db", default="crawl_queue.db", help="Archivo SQLite de la cola")
+    parser.add_argument("--shard-size", type=int, default=5000, help="Registros por shard")
+    parser.add_argument("--total", type=int, help="Total de registros (si no, se consulta al servidor)")
+    parser.add_argument("--processes", type=int, default=1, help="Procesos trabajadores en esta máquina")
+    parser.add_argument("--page-size", type=int, default=100, help="Registros por petición HTTP")
+    parser.add_argument("--output", default="listado_completo.xlsx", help="Archivo de salida de merge (.xlsx o .csv)")
+    parser.add_argument("--info-text", help="Texto de #table_id_info del que leer el total")
+    parser.add_argument("--allow-incomplete", action="store_true",
+                        help="Exportar en merge aunque queden shards sin terminar")
+    args = parser.parse_args()
+
+    if args.command == "plan":
+        total = args.total or parse_total_from_info(args.info_text)[0] or fetch_total_records()
+        shards = ShardQueue(args.db).plan(total, args.shard_size)
+        print(f"[OK] {total} registros repartidos en {shards} shards de {args.shard_size}")
+
+    elif args.command == "worker":
+        if args.processes > 1:
+            with multiprocessing.Pool(args.processes) as workers:
+                workers.starmap(run_worker, [(args.db, args.page_size)] * args.processes)
+        else:
+            run_worker(args.db, args.page_size)
+
+    elif args.command == "merge":
+        queue = ShardQueue(args.db)
+        unfinished = queue.unfinished()
+        if unfinished:
+            print_unfinished(unfinished)
+            if not args.allow_incomplete:
+                print("[ERROR] El listado está incompleto; ejecute worker o retry, o use --allow-incomplete")
+                raise SystemExit(1)
+            print("[WARNING] Se exporta un listado incompleto")
+        df = queue.to_dataframe()
+        if args.output.endswith('.csv'):
+            df.to_csv(args.output, index=False)
+        else:
+            df.to_excel(args.output, index=False)
+        print(f"[OK] {len(df)} registros únicos exportados a {args.output}")
+
+    elif args.command == "status":
+        queue = ShardQueue(args.db)
+        print(f"[INFO] Estado de la cola: {queue.status()}")
+        failed = [shard for shard in queue.unfinished() if shard[3] == 'failed']
+        if failed:
+            print_unfinished(failed)
+
+    elif args.command == "retry":
+        print(f"[OK] Shards fallidos devueltos a la cola: {ShardQueue(args.db).retry_failed()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,9 +5,7 @@ Script to extract table data from web URL and export to Excel
 """
 
 import pandas as pd
-from bs4 import BeautifulSoup
 import requests
-import re
 import os
 import time
 from selenium import webdriver
@@ -17,6 +15,7 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from webdriver_manager.chrome import ChromeDriverManager
+from listing_html_parser import DEFAULT_BACKEND, parse_listing_table
 
 def fetch_web_content_requests(url):
     """
@@ -104,9 +103,10 @@ def fetch_web_content(url):
     print("Both methods failed to fetch content")
     return None
 
-def extract_table_data_from_url(url):
+def extract_table_data_from_url(url, parser_backend=DEFAULT_BACKEND):
     """
     Extract table data from web URL and return as DataFrame
+    parser_backend: 'lxml' (default, faster) or 'bs4'
     """
     # Fetch HTML content from URL
     html_content = fetch_web_content(url)
@@ -115,49 +115,18 @@ def extract_table_data_from_url(url):
         print("Failed to fetch content from URL")
         return None
     
-    # Parse HTML
-    soup = BeautifulSoup(html_content, 'html.parser')
+    # Parse the table with id="table_id"
+    parsed = parse_listing_table(html_content, backend=parser_backend)
     
-    # Find the table with id="table_id"
-    table = soup.find('table', {'id': 'table_id'})
-    
-    if not table:
+    if parsed is None:
         print("Table with id='table_id' not found")
         return None
     
-    # Extract headers
-    headers = []
-    header_row = table.find('thead').find('tr')
-    for th in header_row.find_all('th'):
-        headers.append(th.get_text(strip=True))
-    
+    headers, rows = parsed
     print(f"Found headers: {headers}")
     
-    # Extract data rows
-    data_rows = []
-    tbody = table.find('tbody')
-    
-    if tbody:
-        for row in tbody.find_all('tr'):
-            row_data = []
-            cells = row.find_all('td')
-            
-            for i, cell in enumerate(cells):
-                # Clean up the text content
-                cell_text = cell.get_text(strip=True)
-                
-                # Handle special cases for certain columns
-                if i == 7:  # Entidad Contratante column (index 7)
-                    # Extract text from link if present
-                    link = cell.find('a')
-                    if link:
-                        cell_text = link.get_text(strip=True)
-                
-                row_data.append(cell_text)
-            
-            # Only add row if it has the expected number of columns
-            if len(row_data) == len(headers):
-                data_rows.append(row_data)
+    # Only add rows that have the expected number of columns
+    data_rows = [cells for cells, _ in rows if len(cells) == len(headers)]
     
     print(f"Extracted {len(data_rows)} data rows")
     
@@ -244,7 +213,7 @@ def main():
     print("Extracting table data from web URL...")
     
     # Extract data from URL
-    df = extract_table_data_from_url(web_url)
+    df = extract_table_data_from_url(web_url, parser_backend=os.getenv("LISTING_PARSER", DEFAULT_BACKEND))
     
     if df is None or df.empty:
         print("No data extracted from web URL")
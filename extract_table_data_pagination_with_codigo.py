@@ -6,21 +6,40 @@ Enhanced version that includes código de necesidad de contratación extraction
 """
 
 import pandas as pd
-from bs4 import BeautifulSoup
-import requests
-import re
 import os
-import time
-import json
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
+import math
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
 import google.generativeai as genai
 from dotenv import load_dotenv
+from sercop_listing_client import DataTablesListingClient, LISTING_HEADERS, LISTING_PAGE_LENGTH, dedupe_rows, parse_total_from_info
+from sercop_async_crawler import crawl_listing_dataframe
+from seen_index import SeenIndex
+from crawl_checkpoint import CheckpointJournal
+from listing_schema import apply_listing_schema, print_schema_summary
+from full_text_index import DEFAULT_INDEX_FILE as DEFAULT_FULLTEXT_INDEX_FILE, FullTextIndex
+from gemini_batch import DEFAULT_BATCH_SIZE, BatchAnalyzer
+from gemini_cache import DEFAULT_CACHE_FILE as DEFAULT_GEMINI_CACHE_FILE, AnalysisCache
+from gemini_executor import DEFAULT_CONCURRENCY as DEFAULT_GEMINI_CONCURRENCY, DEFAULT_RPM, DEFAULT_TPM, GeminiExecutor
+from need_analysis import analyze_needs, build_need_text, group_needs, need_scores
+from keyword_matcher import CATEGORY_COLUMN, KeywordMatcher
+from listing_html_parser import DEFAULT_BACKEND as DEFAULT_PARSER_BACKEND, parse_listing_rows
+from relevance_ranker import DEFAULT_IDF_FILE, SCORE_COLUMN, RelevanceRanker, print_gate_summary, select_for_llm
+from rate_controller import configure_shared_controller
+from search_planner import search_candidates_dataframe
+from sercop_browser import DriverPool, setup_driver
+from sercop_detail_client import DetailFetcher, parse_detail_page_html, resolve_detail_url
+from streaming_pipeline import CsvStreamSink, StreamingPipeline, product_rows
+from wait_strategies import (
+    install_draw_hook,
+    print_wait_stats,
+    wait_for_detail_page,
+    wait_for_listing_draw,
+    wait_for_listing_ready
+)
 
 # Cargar variables de entorno desde .env si existe
 load_dotenv()
@@ -38,68 +57,34 @@ except Exception as e:
     print(f"  ! Advertencia: {e}")
     print("  ! El análisis con IA estará deshabilitado.")
 
-def setup_driver():
-    """
-    Setup Chrome driver with options
-    """
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")  # Run in background
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-    chrome_options.add_argument("--disable-gpu")
-    chrome_options.add_argument("--window-size=1920,1080")
-    chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
-    
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=chrome_options)
-    return driver
-
-def extract_codigo_from_html_content(html_content):
+def get_total_pages(driver):
     """
-    Extrae el código de necesidad de contratación del contenido HTML
+    Get the total number of pages from the exact record count in #table_id_info
+    (the paginate buttons only show a window of page numbers)
     """
     try:
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        # Buscar el texto "Código Necesidad de Contratación:"
-        codigo_element = soup.find('strong', string=re.compile(r'Código Necesidad de Contratación'))
-        
-        if codigo_element:
-            # Obtener el texto del elemento padre (que contiene el código)
-            parent_text = codigo_element.parent.get_text(strip=True)
-            
-            # Extraer el código usando regex - buscar el patrón NIC-XXXXX-XXXX-XXXXX
-            codigo_match = re.search(r'Código Necesidad de Contratación:\s*(NIC-[0-9]+-[0-9]+-[0-9]+)', parent_text)
-            
-            if codigo_match:
-                codigo = codigo_match.group(1).strip()
-                print(f"    [OK] Código encontrado: {codigo}")
-                return codigo
-            else:
-                print(f"    [ERROR] No se pudo extraer el código del texto")
-                print(f"    [DEBUG] Texto encontrado: {parent_text[:100]}...")
-                return None
-        else:
-            print(f"    [ERROR] No se encontró el elemento con 'Código Necesidad de Contratación'")
-            return None
-            
+        wait = WebDriverWait(driver, 10)
+        info = wait.until(EC.presence_of_element_located((By.ID, "table_id_info")))
+        total_records, _ = parse_total_from_info(info.text)
+        if total_records is not None:
+            page_length = LISTING_PAGE_LENGTH
+            try:
+                page_length = int(driver.execute_script(
+                    "return jQuery('#table_id').dataTable().fnSettings()._iDisplayLength;"
+                )) or LISTING_PAGE_LENGTH
+            except Exception:
+                pass
+            max_page = max(1, math.ceil(total_records / page_length))
+            print(f"Total pages found: {max_page} ({total_records} records)")
+            return max_page
     except Exception as e:
-        print(f"    [ERROR] Error extrayendo código: {e}")
-        return None
+        print(f"Error reading table info: {e}")
 
-def get_total_pages(driver):
-    """
-    Get the total number of pages from pagination
-    """
     try:
-        # Wait for pagination to load
-        wait = WebDriverWait(driver, 10)
-        pagination = wait.until(EC.presence_of_element_located((By.ID, "table_id_paginate")))
-        
-        # Find all pagination buttons
+        # Fallback: highest number among the pagination buttons
+        pagination = driver.find_element(By.ID, "table_id_paginate")
         page_buttons = pagination.find_elements(By.CSS_SELECTOR, "a.paginate_button")
         
-        # Get the last page number
         max_page = 1
         for button in page_buttons:
             try:
@@ -124,120 +109,36 @@ def extract_detail_page_data(driver, detail_url):
         print(f"    [INFO] Extrayendo datos de página de detalle: {detail_url}")
         
         # Handle relative URLs
-        if detail_url.startswith('../'):
-            # Convert relative URL to absolute
-            base_url = "https://www.compraspublicas.gob.ec/ProcesoContratacion/compras/"
-            full_url = base_url + detail_url[3:]  # Remove '../' prefix
-        elif detail_url.startswith('/'):
-            full_url = "https://www.compraspublicas.gob.ec" + detail_url
-        else:
-            full_url = detail_url
+        full_url = resolve_detail_url(detail_url)
         
-        # Navigate to detail page
+        # Navigate to detail page and wait for the product table and código
         driver.get(full_url)
-        time.sleep(3)  # Wait for page to load
+        wait_for_detail_page(driver)
         
-        # Wait for table to load
-        wait = WebDriverWait(driver, 10)
-        
-        # Wait for page to load completely
-        time.sleep(3)
-        
-        # Get page source and parse with BeautifulSoup
-        html_content = driver.page_source
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        # Extract código de necesidad de contratación
-        codigo_contratacion = extract_codigo_from_html_content(html_content)
-        
-        # Look for the first table (which contains the product information)
-        tables = soup.find_all('table')
-        
-        if not tables:
-            print(f"    [ERROR] No se encontraron tablas en: {detail_url}")
-            return [], codigo_contratacion
-        
-        # Use the first table (which contains product data)
-        product_table = tables[0]
-        
-        # Extract table data
-        product_data = []
-        rows = product_table.find_all('tr')
-        
-        # Skip header row and process data rows
-        for row in rows[1:]:  # Skip first row (headers)
-            cells = row.find_all(['td', 'th'])
-            if len(cells) >= 5:  # Expected: No., CPC, Descripción, Unidad, Cantidad
-                row_data = [cell.get_text(strip=True) for cell in cells]
-                product_data.append(row_data)
-        
-        print(f"    [OK] Extraídos {len(product_data)} productos de la página de detalle")
-        return product_data, codigo_contratacion
+        # Parse the rendered page
+        return parse_detail_page_html(driver.page_source, detail_url)
         
     except Exception as e:
         print(f"    [ERROR] Error extrayendo datos de página de detalle: {e}")
         return [], None
 
-def extract_table_data_from_page(driver, page_num, extract_details=False):
+def extract_table_data_from_page(driver, page_num, extract_details=False, parser_backend=DEFAULT_PARSER_BACKEND):
     """
     Extract table data from current page
+    parser_backend selects the HTML parser: 'lxml' (XPath, fast) or 'bs4' (BeautifulSoup)
     """
     try:
         # Wait for table to load
         wait = WebDriverWait(driver, 10)
         wait.until(EC.presence_of_element_located((By.ID, "table_id")))
         
-        # Get page source
-        html_content = driver.page_source
-        soup = BeautifulSoup(html_content, 'html.parser')
+        # Only the #table_id rows and the cell-7 link are read from the page source
+        data_rows = parse_listing_rows(driver.page_source, backend=parser_backend)
         
-        # Find the table
-        table = soup.find('table', {'id': 'table_id'})
-        
-        if not table:
+        if data_rows is None:
             print(f"No table found on page {page_num}")
             return None
         
-        # Extract headers (only on first page)
-        headers = []
-        if page_num == 1:
-            header_row = table.find('thead').find('tr')
-            for th in header_row.find_all('th'):
-                headers.append(th.get_text(strip=True))
-            print(f"Headers: {headers}")
-        
-        # Extract data rows
-        data_rows = []
-        tbody = table.find('tbody')
-        
-        if tbody:
-            for row in tbody.find_all('tr'):
-                row_data = []
-                cells = row.find_all('td')
-                detail_url = None
-                
-                for i, cell in enumerate(cells):
-                    cell_text = cell.get_text(strip=True)
-                    
-                    # Handle special cases for certain columns
-                    if i == 7:  # Entidad Contratante column
-                        link = cell.find('a')
-                        if link:
-                            cell_text = link.get_text(strip=True)
-                            detail_url = link.get('href')
-                    
-                    row_data.append(cell_text)
-                
-                # Only add row if it has the expected number of columns
-                if len(row_data) == 10:  # Expected number of columns
-                    # Add detail URL to the row for later processing
-                    if detail_url:
-                        row_data.append(detail_url)  # Add detail URL as last column
-                    else:
-                        row_data.append("")  # No detail URL
-                    
-                    data_rows.append(row_data)
-        
         print(f"Page {page_num}: Extracted {len(data_rows)} rows")
         return data_rows
         
@@ -271,15 +172,14 @@ def navigate_to_page(driver, page_num):
         
         if page_button:
             # Scroll to button and click
+            draws_before = install_draw_hook(driver)
             driver.execute_script("arguments[0].scrollIntoView(true);", page_button)
-            time.sleep(1)
             page_button.click()
             
-            # Wait for page to load
-            time.sleep(3)
-            
-            # Wait for table to update
-            wait.until(EC.presence_of_element_located((By.ID, "table_id")))
+            # Wait for DataTables to redraw with the new page
+            if not wait_for_listing_draw(driver, draws_before):
+                print(f"Table did not redraw for page {page_num}")
+                return False
             
             print(f"Successfully navigated to page {page_num}")
             return True
@@ -291,23 +191,129 @@ def navigate_to_page(driver, page_num):
         print(f"Error navigating to page {page_num}: {e}")
         return False
 
-def extract_all_pages_data(url, max_pages=None):
+def extract_all_pages_data_http(max_pages=None, concurrency=None, per_host_limit=None, seen_index=None, journal=None):
+    """
+    Extract main data through the DataTables JSON endpoint (no browser)
+    With concurrency set, pages are fetched in parallel by the async crawler
+    With a seen_index, only new needs are returned and pagination stops at known pages
+    With a journal, every block is checkpointed and journaled blocks are not refetched
+    """
+    try:
+        print("Starting HTTP extraction from NCORetornaRegistros.cpe")
+        # max_pages keeps the meaning of the Selenium mode (pages of 10 rows)
+        max_records = max_pages * LISTING_PAGE_LENGTH if max_pages else None
+        if seen_index is not None:
+            # Incremental runs walk pages in order so they can stop early
+            client = DataTablesListingClient()
+            df = client.fetch_dataframe(max_records=max_records, seen_index=seen_index, journal=journal)
+            print(f"\nNew records extracted: {len(df)}")
+            return df
+        elif concurrency and concurrency > 1:
+            df = crawl_listing_dataframe(
+                max_records=max_records,
+                concurrency=concurrency,
+                per_host_limit=per_host_limit or concurrency,
+                journal=journal
+            )
+        else:
+            client = DataTablesListingClient()
+            df = client.fetch_dataframe(max_records=max_records, journal=journal)
+        
+        print(f"\nTotal records extracted: {len(df)}")
+        if df.empty:
+            print("No data extracted from HTTP endpoint")
+            return None
+        return df
+        
+    except Exception as e:
+        print(f"Error in HTTP extraction process: {e}")
+        return None
+
+def extract_all_pages_data(url, max_pages=None, use_http=True, concurrency=None, per_host_limit=None, pool=None,
+                           seen_index=None, journal=None, parser_backend=DEFAULT_PARSER_BACKEND):
     """
     Extract main data from all pages (without details)
+    Uses the DataTables JSON endpoint and falls back to Selenium pagination
+    """
+    if use_http:
+        df = extract_all_pages_data_http(
+            max_pages=max_pages, concurrency=concurrency,
+            per_host_limit=per_host_limit, seen_index=seen_index, journal=journal
+        )
+        if df is not None:
+            return df
+        print("HTTP extraction failed, falling back to Selenium pagination...")
+    
+    df = extract_all_pages_data_selenium(url, max_pages=max_pages, pool=pool, parser_backend=parser_backend)
+    if df is not None and seen_index is not None:
+        codigo_col = 'Código Necesidad de Contratación'
+        df = df[~df[codigo_col].map(lambda codigo: codigo in seen_index)].reset_index(drop=True)
+        print(f"New records extracted: {len(df)}")
+    return df
+
+def detail_failed_codes(df_with_details):
+    """
+    NIC codes of filtered needs whose detail extraction returned no products
+    They are kept out of the seen index so the next incremental run retries them
+    """
+    if df_with_details is None or df_with_details.empty or 'Detalles_Productos' not in df_with_details.columns:
+        return set()
+    failed = ~df_with_details['Detalles_Productos'].map(lambda x: isinstance(x, list) and len(x) > 0)
+    return set(df_with_details.loc[failed, 'Código Necesidad de Contratación'].dropna().astype(str))
+
+def mark_as_seen(seen_index, codes, exclude=None):
+    """
+    Add NIC codes (e.g. the listing's 'Código Necesidad de Contratación' column) to the
+    seen index and persist it, leaving out the codes in exclude
     """
+    if seen_index is None or codes is None:
+        return
+    exclude = exclude or set()
+    codes = [str(code) for code in codes if code is not None and code == code and str(code)]
+    seen_index.update(code for code in codes if code not in exclude)
+    added = seen_index.flush()
+    print(f"[INFO] Códigos NIC registrados como vistos: {added} (total {len(seen_index)})")
+    skipped = len(exclude.intersection(codes))
+    if skipped:
+        print(f"[INFO] Necesidades sin detalle que se reintentarán en la próxima ejecución: {skipped}")
+
+def extract_all_pages_data_selenium(url, max_pages=None, pool=None, parser_backend=DEFAULT_PARSER_BACKEND):
+    """
+    Extract main data from all pages by driving the browser (fallback)
+    A browser is borrowed from the pool when given, otherwise a new one is started
+    """
+    if pool is not None:
+        try:
+            with pool.acquire() as driver:
+                return extract_pages_with_driver(driver, url, max_pages=max_pages, parser_backend=parser_backend)
+        except Exception as e:
+            print(f"Error in extraction process: {e}")
+            return None
+    
     driver = None
+    try:
+        driver = setup_driver()
+        return extract_pages_with_driver(driver, url, max_pages=max_pages, parser_backend=parser_backend)
+    except Exception as e:
+        print(f"Error in extraction process: {e}")
+        return None
+    finally:
+        if driver:
+            driver.quit()
+
+def extract_pages_with_driver(driver, url, max_pages=None, parser_backend=DEFAULT_PARSER_BACKEND):
+    """
+    Paginate the listing with an already running browser
+    """
     all_data = []
     headers = []
     
     try:
         print(f"Starting extraction from: {url}")
-        driver = setup_driver()
         driver.get(url)
         
         # Wait for initial page to load
-        wait = WebDriverWait(driver, 30)
-        wait.until(EC.presence_of_element_located((By.ID, "table_id")))
-        time.sleep(5)  # Additional wait for data to load
+        wait_for_listing_ready(driver, timeout=30)
         
         # Get total pages
         total_pages = get_total_pages(driver)
@@ -330,7 +336,7 @@ def extract_all_pages_data(url, max_pages=None):
                     continue
             
             # Extract data from current page (without details)
-            page_data = extract_table_data_from_page(driver, page_num, extract_details=False)
+            page_data = extract_table_data_from_page(driver, page_num, extract_details=False, parser_backend=parser_backend)
             
             if page_data:
                 all_data.extend(page_data)
@@ -339,19 +345,7 @@ def extract_all_pages_data(url, max_pages=None):
                 if page_num == 1 and page_data:
                     # Extract headers from first row of first page
                     if all_data:
-                        headers = [
-                            'Tipo de Necesidad',
-                            'Código Necesidad de Contratación',
-                            'Fecha de Publicación',
-                            'Provincia - Cantón',
-                            'Descripción del Objeto de compra',
-                            'Estado de la Necesidad',
-                            'Fecha límite para la entrega de proformas',
-                            'Entidad Contratante',
-                            'Dirección de Entrega',
-                            'Contacto',
-                            'URL_Detalle'
-                        ]
+                        headers = list(LISTING_HEADERS)
             else:
                 print(f"No data extracted from page {page_num}")
         
@@ -368,9 +362,6 @@ def extract_all_pages_data(url, max_pages=None):
     except Exception as e:
         print(f"Error in extraction process: {e}")
         return None
-    finally:
-        if driver:
-            driver.quit()
 
 # Keywords for filtering
 KEYWORDS_HUREONSYS = {
@@ -417,29 +408,17 @@ KEYWORDS_HUREONSYS = {
     ]
 }
 
-def analizar_con_gemini(description, modelo):
-    if not modelo: return {}
-    # --- PROMPT ACTUALIZADO ---
-    # Ahora le pedimos a la IA que determine y devuelva la prioridad.
-    prompt = f"""
-    Eres un Asesor Senior en Contratación Pública Ecuatoriana. Analiza el siguiente contrato del SERCOP para tu cliente HureonSys (experto en Desarrollo de Software, Ciberseguridad, y Análisis de Datos con Estadística) y determina su relevancia.
-    Contrato: "{description}"
-    Proporciona tu análisis estrictamente en el siguiente formato JSON:
-    {{
-      "puntuacion_relevancia": [Un número del 0 al 10],
-      "prioridad": "[Asigna 'Alta' si la puntuación es >= 7, 'Media' si está entre 4 y 6, y 'Baja' si es <= 3]",
-      "motivo": "[Explicación concisa de la puntuación]",
-      "accion_recomendada": "[Postular Inmediatamente, Analizar Pliego con Detalle, Baja Prioridad, Descartar]"
-    }}
-    """
-    try:
-        response = modelo.generate_content(prompt, request_options={"timeout": 100})
-        cleaned_response = response.text.strip().replace("```json", "").replace("```", "")
-        return json.loads(cleaned_response)
-    except Exception as e:
-        print(f"    ! Error al analizar con Gemini: {e}")
-        return {"puntuacion_relevancia": 0, "prioridad": "Revisar Manualmente", "motivo": str(e), "accion_recomendada": "Revisar Manualmente"}
+# Autómata construido una sola vez con todas las palabras clave
+KEYWORD_MATCHER = KeywordMatcher(KEYWORDS_HUREONSYS)
 
+def match_keywords(descripcion):
+    """
+    Categories and keywords found in a description (joined with ', '), or (None, [])
+    """
+    categories, keywords = KEYWORD_MATCHER.match(descripcion)
+    if not categories:
+        return None, []
+    return ', '.join(categories), keywords
 
 def filter_data_by_keywords(df):
     """
@@ -451,45 +430,20 @@ def filter_data_by_keywords(df):
     # Get the description column (index 4)
     descripcion_col = df.columns[4]  # 'Descripción del Objeto de compra'
     
-    # Create a list to store filtered data
-    filtered_rows = []
-    matched_categories = []
-    
     print(f"\n[INFO] Filtrando datos por palabras clave en: '{descripcion_col}'")
     print("=" * 60)
     
-    for idx, row in df.iterrows():
-        descripcion = str(row[descripcion_col]).lower()
-        matched_keywords = []
-        matched_category = None
-        
-        # Check each category and its keywords
-        for category, keywords in KEYWORDS_HUREONSYS.items():
-            for keyword in keywords:
-                if keyword.lower() in descripcion:
-                    matched_keywords.append(keyword)
-                    matched_category = category
-                    break  # Found a match in this category, move to next row
-            if matched_category:  # If we found a match, break out of category loop
-                break
-        
-        # If we found a match, add to filtered data
-        if matched_category:
-            # Add category and matched keywords to the row
-            row_data = row.tolist()
-            row_data.extend([matched_category, ', '.join(matched_keywords)])
-            filtered_rows.append(row_data)
-            matched_categories.append(matched_category)
+    # Una pasada del autómata por descripción distinta, sin iterrows
+    annotations = KEYWORD_MATCHER.annotate(df[descripcion_col])
+    mask = (annotations[CATEGORY_COLUMN] != '').to_numpy()
     
-    if filtered_rows:
-        # Create new DataFrame with filtered data
-        new_columns = list(df.columns) + ['Categoría', 'Palabras Clave Encontradas']
-        filtered_df = pd.DataFrame(filtered_rows, columns=new_columns)
+    if mask.any():
+        filtered_df = pd.concat([df[mask], annotations[mask]], axis=1).reset_index(drop=True)
         
-        # Print summary
+        # Print summary (una necesidad puede contar en varias categorías)
         print(f"[OK] Registros encontrados: {len(filtered_df)}")
         print("\n[INFO] Resumen por categoría:")
-        category_counts = pd.Series(matched_categories).value_counts()
+        category_counts = filtered_df[CATEGORY_COLUMN].str.split(', ').explode().value_counts()
         for category, count in category_counts.items():
             print(f"   • {category}: {count} registros")
         
@@ -508,11 +462,11 @@ def clean_data(df):
     # Remove any empty rows
     df = df.dropna(how='all')
     
-    # Clean up text data
+    # Clean up text data (only real strings are stripped; missing values become '')
     for col in df.columns:
-        if df[col].dtype == 'object':
-            df[col] = df[col].astype(str).str.strip()
-            df[col] = df[col].replace('nan', '')
+        if pd.api.types.is_object_dtype(df[col]) or pd.api.types.is_string_dtype(df[col]):
+            stripped = df[col].str.strip()
+            df[col] = stripped.where(stripped.notna(), df[col]).fillna('')
     
     return df
 
@@ -550,9 +504,31 @@ def export_to_excel(df, output_file):
         print(f"Error exporting to Excel: {e}")
         return False
 
-def extract_details_for_filtered_records(df_filtered, base_url):
+def fetch_detail_record(detail_url, fetcher=None, pool=None):
+    """
+    Fetch (product_data, codigo_contratacion) for one detail URL
+    HTTP first, then a browser from the pool when HTTP returns nothing
+    """
+    if not detail_url or not str(detail_url).strip():
+        return [], None
+    
+    try:
+        detail_data, codigo_contratacion = [], None
+        if fetcher is not None:
+            detail_data, codigo_contratacion = fetcher.fetch(detail_url)
+        if not detail_data and not codigo_contratacion and pool is not None:
+            detail_data, codigo_contratacion = pool.run(extract_detail_page_data, detail_url)
+        return detail_data or [], codigo_contratacion or None
+    except Exception as e:
+        print(f"   [ERROR] Error extrayendo detalles de {detail_url}: {e}")
+        return [], None
+
+def extract_details_for_filtered_records(df_filtered, base_url, pool=None, use_http=True, workers=1, journal=None):
     """
     Extract product details only for filtered records with código de contratación
+    Detail URLs are fanned out to a pool of workers (HTTP first, pooled browsers as
+    fallback) and the result columns are assembled in input order in a single pass
+    With a journal, every detail is checkpointed and journaled URLs are not refetched
     """
     if df_filtered.empty:
         print("[ERROR] No hay registros filtrados para extraer detalles")
@@ -560,19 +536,15 @@ def extract_details_for_filtered_records(df_filtered, base_url):
     
     print(f"\n[INFO] EXTRAYENDO DETALLES DE PRODUCTOS PARA REGISTROS FILTRADOS")
     print("=" * 70)
-    print(f"[INFO] Registros filtrados a procesar: {len(df_filtered)}")
+    print(f"[INFO] Registros filtrados a procesar: {len(df_filtered)} ({workers} workers)")
+    
+    owns_pool = pool is None
+    if owns_pool:
+        pool = DriverPool(size=1)
+    fetcher = DetailFetcher(pool=pool, pool_size=max(workers, 1)) if use_http else None
     
-    driver = None
     try:
-        driver = setup_driver()
-        if not driver:
-            print("[ERROR] No se pudo configurar el driver")
-            return df_filtered
-        
-        # Add column for product details
         df_filtered = df_filtered.copy()
-        df_filtered['Detalles_Productos'] = [[] for _ in range(len(df_filtered))]
-        df_filtered['Codigo_Necesidad_Contratacion'] = [None for _ in range(len(df_filtered))]
         
         # Check if we have detail URLs in the DataFrame
         detail_url_column = None
@@ -584,46 +556,42 @@ def extract_details_for_filtered_records(df_filtered, base_url):
         if detail_url_column is None:
             print("[ERROR] No se encontró columna con URLs de detalle")
             print("   Columnas disponibles:", list(df_filtered.columns))
+            df_filtered['Detalles_Productos'] = [[] for _ in range(len(df_filtered))]
+            df_filtered['Codigo_Necesidad_Contratacion'] = [None for _ in range(len(df_filtered))]
             return df_filtered
         
         print(f"[OK] Usando columna de URLs: {detail_url_column}")
         
-        # Process each filtered record
-        for idx, row in df_filtered.iterrows():
-            print(f"\n[INFO] Procesando registro {idx + 1}/{len(df_filtered)}")
-            print(f"   Entidad: {row.get('Entidad Contratante', 'N/A')}")
-            print(f"   Descripción: {row.get('Descripción del Objeto de compra', 'N/A')[:80]}...")
-            
-            # Get detail URL from the row
-            detail_url = row.get(detail_url_column, "")
-            
-            if detail_url and detail_url.strip():
-                print(f"   [INFO] URL de detalle: {detail_url}")
-                try:
-                    # Extract product details from the detail page
-                    detail_data, codigo_contratacion = extract_detail_page_data(driver, detail_url)
-                    if detail_data:
-                        df_filtered.at[idx, 'Detalles_Productos'] = detail_data
-                        print(f"   [OK] Extraídos {len(detail_data)} productos")
-                    else:
-                        print(f"   [ERROR] No se pudieron extraer productos")
-                        df_filtered.at[idx, 'Detalles_Productos'] = []
-                    
-                    if codigo_contratacion:
-                        df_filtered.at[idx, 'Codigo_Necesidad_Contratacion'] = codigo_contratacion
-                        print(f"   [OK] Código de contratación: {codigo_contratacion}")
-                    else:
-                        print(f"   [ERROR] No se pudo extraer código de contratación")
-                        df_filtered.at[idx, 'Codigo_Necesidad_Contratacion'] = None
-                        
-                except Exception as e:
-                    print(f"   [ERROR] Error extrayendo detalles: {e}")
-                    df_filtered.at[idx, 'Detalles_Productos'] = []
-                    df_filtered.at[idx, 'Codigo_Necesidad_Contratacion'] = None
+        detail_urls = df_filtered[detail_url_column].fillna('').astype(str).tolist()
+        results = [([], None)] * len(detail_urls)
+        
+        # Details already in the checkpoint journal are merged back without fetching
+        completed = journal.completed_details() if journal is not None else {}
+        pending = []
+        for position, url in enumerate(detail_urls):
+            if url in completed:
+                results[position] = completed[url]
             else:
-                print(f"   [INFO] No hay URL de detalle disponible")
-                df_filtered.at[idx, 'Detalles_Productos'] = []
-                df_filtered.at[idx, 'Codigo_Necesidad_Contratacion'] = None
+                pending.append((position, url))
+        if completed:
+            print(f"[INFO] Detalles recuperados del checkpoint: {len(detail_urls) - len(pending)}")
+        
+        # Results are stored by position, so the output order never depends on completion order
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+            futures = {
+                executor.submit(fetch_detail_record, url, fetcher, pool): position
+                for position, url in pending
+            }
+            for done, future in enumerate(as_completed(futures), start=1):
+                position = futures[future]
+                results[position] = future.result()
+                detail_data, codigo_contratacion = results[position]
+                if journal is not None and detail_urls[position].strip():
+                    journal.record_detail(detail_urls[position], detail_data, codigo_contratacion)
+                print(f"   [{done}/{len(futures)}] {codigo_contratacion or 'sin código'}: {len(detail_data)} productos")
+        
+        df_filtered['Detalles_Productos'] = [detail_data for detail_data, _ in results]
+        df_filtered['Codigo_Necesidad_Contratacion'] = [codigo for _, codigo in results]
         
         print(f"\n[OK] Procesamiento de detalles completado")
         return df_filtered
@@ -632,8 +600,8 @@ def extract_details_for_filtered_records(df_filtered, base_url):
         print(f"[ERROR] Error extrayendo detalles: {e}")
         return df_filtered
     finally:
-        if driver:
-            driver.quit()
+        if owns_pool:
+            pool.close()
 
 def process_product_details(df):
     """
@@ -698,9 +666,67 @@ def display_dataframe_info(df, df_name="DataFrame"):
         print(f"\n[INFO] Últimas 3 filas:")
         print(df.tail(3).to_string())
 
-def main():
+def open_fulltext_index():
+    """
+    Full-text index of needs and products (FULLTEXT_INDEX=1), or None
+    """
+    if os.getenv("FULLTEXT_INDEX", "0") != "1":
+        return None
+    index = FullTextIndex(os.getenv("FULLTEXT_INDEX_FILE", DEFAULT_FULLTEXT_INDEX_FILE))
+    stats = index.stats()
+    print(f"[INFO] Índice de texto completo: {stats['necesidades']} necesidades, {stats['productos']} productos")
+    return index
+
+def open_relevance_ranker():
+    """
+    Local BM25 ranker against KEYWORDS_HUREONSYS, with the IDF tables of previous runs
+    """
+    return RelevanceRanker(KEYWORDS_HUREONSYS, idf_path=os.getenv("RANK_IDF_FILE", DEFAULT_IDF_FILE))
+
+def open_gemini_cache():
+    """
+    Persistent Gemini analysis cache shared with prospeccion_sercop - AI.py (GEMINI_CACHE=0 disables it)
+    """
+    if os.getenv("GEMINI_CACHE", "1") != "1":
+        return None
+    cache = AnalysisCache(
+        os.getenv("GEMINI_CACHE_FILE", DEFAULT_GEMINI_CACHE_FILE),
+        ttl_days=float(os.getenv("GEMINI_CACHE_TTL_DAYS", "90")),
+        max_entries=int(os.getenv("GEMINI_CACHE_MAX_ENTRIES", "200000"))
+    )
+    removed = cache.evict()
+    if removed:
+        print(f"[INFO] Caché de Gemini: {removed} entradas caducadas eliminadas")
+    return cache
+
+def open_batch_analyzer():
+    """
+    Batched Gemini analysis behind the RPM/TPM token buckets, with the persistent cache
+    """
+    executor = GeminiExecutor(
+        MODELO_IA,
+        rpm=int(os.getenv("GEMINI_RPM", str(DEFAULT_RPM))),
+        tpm=int(os.getenv("GEMINI_TPM", str(DEFAULT_TPM))),
+        max_concurrency=int(os.getenv("GEMINI_CONCURRENCY", str(DEFAULT_GEMINI_CONCURRENCY)))
+    )
+    return BatchAnalyzer(
+        MODELO_IA,
+        batch_size=int(os.getenv("GEMINI_BATCH_SIZE", str(DEFAULT_BATCH_SIZE))),
+        cache=open_gemini_cache(),
+        executor=executor
+    )
+
+def print_analyzer_stats(analyzer):
+    analyzer.print_stats()
+    analyzer.executor.print_stats()
+    if analyzer.cache is not None:
+        analyzer.cache.print_stats()
+
+def main(resume=False):
     """
     Main function
+    With resume=True, listing blocks and detail pages saved in the checkpoint
+    journal by an interrupted run are reused instead of downloaded again
     """
     url = "https://www.compraspublicas.gob.ec/ProcesoContratacion/compras/NCO/FrmNCOListado.cpe"
     output_file = "necesidades_contratacion_filtrado_TI_con_codigo.xlsx"
@@ -708,13 +734,66 @@ def main():
     print("=== EXTRACTOR DE DATOS DE CONTRATACIÓN PÚBLICA CON PAGINACIÓN Y CÓDIGO ===\n")
     
     max_pages = int(os.getenv("MAX_PAGES", ""))
+    crawl_concurrency = int(os.getenv("CRAWL_CONCURRENCY", "1"))
+    
+    # Listing, search and detail requests share one adaptive (AIMD) concurrency limit
+    rate_controller = configure_shared_controller(
+        initial_limit=int(os.getenv("RATE_INITIAL_LIMIT", "4")),
+        max_limit=int(os.getenv("RATE_MAX_LIMIT", "16"))
+    )
+    
+    # Browsers are started on demand and shared by the listing fallback and the detail stage
+    pool = DriverPool(
+        size=int(os.getenv("DRIVER_POOL_SIZE", "1")),
+        max_pages_per_driver=int(os.getenv("DRIVER_MAX_PAGES", "100")),
+        lean=os.getenv("LEAN_BROWSER", "1") == "1"
+    )
+    
+    # Incremental runs skip NIC codes already processed in previous runs
+    seen_index = None
+    if os.getenv("INCREMENTAL", "0") == "1":
+        seen_index = SeenIndex(
+            os.getenv("SEEN_INDEX_FILE", "nic_seen_index.idx"),
+            use_bloom=os.getenv("SEEN_INDEX_BLOOM", "0") == "1"
+        )
+        print(f"[INFO] Modo incremental: {len(seen_index)} códigos NIC ya vistos")
+    
+    # Append-only journal of completed listing blocks and detail pages
+    journal = CheckpointJournal(os.getenv("CHECKPOINT_FILE", "crawl_checkpoint.jsonl"), resume=resume)
+    
+    fulltext_index = open_fulltext_index()
     
     # STEP 1: Extract main data from all pages (without details)
-    print("[PASO 1] Extrayendo datos principales de todas las páginas...")
-    df = extract_all_pages_data(url, max_pages=max_pages)  # Set max_pages=5 for testing
+    df = None
+    if os.getenv("SEARCH_PUSHDOWN", "0") == "1":
+        # Only rows the server finds for the keywords are downloaded; step 2 confirms them
+        print("[PASO 1] Buscando candidatos en el servidor por palabras clave...")
+        try:
+            df = search_candidates_dataframe(
+                KEYWORDS_HUREONSYS,
+                search_field=os.getenv("SEARCH_FIELD", "objeto"),
+                concurrency=max(crawl_concurrency, 4)
+            )
+            if seen_index is not None:
+                df = df[~df['Código Necesidad de Contratación'].map(lambda codigo: codigo in seen_index)].reset_index(drop=True)
+        except Exception as e:
+            print(f"[ERROR] Error en la búsqueda del servidor, se descargará el listado completo: {e}")
+            df = None
+    
+    if df is None:
+        print("[PASO 1] Extrayendo datos principales de todas las páginas...")
+        df = extract_all_pages_data(url, max_pages=max_pages, concurrency=crawl_concurrency, pool=pool,
+                                    seen_index=seen_index, journal=journal,
+                                    parser_backend=os.getenv("LISTING_PARSER", DEFAULT_PARSER_BACKEND))  # Set max_pages=5 for testing
+    
+    if df is not None and df.empty and seen_index is not None:
+        print("[OK] No hay necesidades nuevas desde la última ejecución")
+        pool.close()
+        return None
     
     if df is None or df.empty:
         print("[ERROR] No se pudieron extraer datos de la página web")
+        pool.close()
         return None
     
     print(f"\n[INFO] Datos principales extraídos: {len(df)} filas, {len(df.columns)} columnas")
@@ -723,6 +802,17 @@ def main():
     # Clean data
     df = clean_data(df)
     
+    # Every listed need is indexed, not only the ones that pass the keyword filter
+    if fulltext_index is not None:
+        indexed = fulltext_index.add_needs_dataframe(df)
+        print(f"[INFO] Necesidades indexadas para búsqueda de texto completo: {indexed}")
+    
+    # Typed columns: datetimes, categoricals, split location and NIC parts
+    if os.getenv("TYPED_SCHEMA", "1") == "1":
+        df_typed = apply_listing_schema(df)
+        print_schema_summary(df, df_typed)
+        df = df_typed
+    
     # Display information about the original DataFrame
     display_dataframe_info(df, "DataFrame Original")
     
@@ -732,14 +822,26 @@ def main():
     
     if df_filtered.empty:
         print("\n[ERROR] No se encontraron registros que coincidan con los criterios de filtrado")
+        pool.close()
+        mark_as_seen(seen_index, df['Código Necesidad de Contratación'])
         return df  # Return original DataFrame even if filtered is empty
     
+    # Local relevance score; the whole listing feeds the IDF tables
+    ranker = open_relevance_ranker()
+    ranker.update_corpus(df['Descripción del Objeto de compra'])
+    ranker.save()
+    df_filtered[SCORE_COLUMN] = ranker.score(df_filtered['Descripción del Objeto de compra'])
+    
     # Display information about the filtered DataFrame
     display_dataframe_info(df_filtered, "DataFrame Filtrado")
     
     # STEP 3: Extract product details only for filtered records
     print("\n[PASO 3] Extrayendo detalles de productos solo para registros filtrados...")
-    df_with_details = extract_details_for_filtered_records(df_filtered, url)
+    detail_workers = int(os.getenv("DETAIL_WORKERS", "4"))
+    df_with_details = extract_details_for_filtered_records(df_filtered, url, pool=pool, workers=detail_workers, journal=journal)
+    pool.close()
+    print_wait_stats()
+    rate_controller.print_stats()
     
     # Process and display product details
     if 'Detalles_Productos' in df_with_details.columns:
@@ -772,6 +874,19 @@ def main():
             print(f"[OK] DataFrame de detalles de productos creado: {len(df_product_details)} productos")
             print(f"[INFO] Columnas: {list(df_product_details.columns)}")
             
+            # Local ranking: only the products that score against the profile reach Gemini
+            ranker.update_corpus(df_product_details['Descripcion_Producto'])
+            ranker.save()
+            df_product_details[SCORE_COLUMN] = ranker.score(df_product_details['Descripcion_Producto'])
+            if os.getenv("RANK_GATE", "1") == "1":
+                gate = select_for_llm(
+                    df_product_details[SCORE_COLUMN],
+                    top_k=int(os.getenv("RANK_TOP_K", "0")),
+                    min_score=float(os.getenv("RANK_MIN_SCORE", "0"))
+                )
+            else:
+                gate = pd.Series(True, index=df_product_details.index)
+            
             # Display the product details DataFrame
             print(f"\n[INFO] DATAFRAME DE DETALLES DE PRODUCTOS:")
             print("=" * 80)
@@ -782,23 +897,45 @@ def main():
             df_product_details.to_excel(product_details_file, index=False)
             print(f"\n[OK] Detalles de productos guardados en: {product_details_file}")
             
+            if fulltext_index is not None:
+                indexed = fulltext_index.add_product_details(df_product_details)
+                print(f"[INFO] Productos indexados para búsqueda de texto completo: {indexed}")
+            
             # Analizando con Gemini
             df_consolidado = pd.DataFrame()
             if MODELO_IA:
                 print(f"\n--- INICIANDO ANÁLISIS CON GEMINI ---")
-                for index, row in df_product_details.iterrows():
-                    if pd.isna(row.get('Puntuación IA')):
-                        print(f"  > Analizando OCID: {row.get('CPC', 'N/A')}...")
-                        resultado_ia = analizar_con_gemini(row.get('Descripcion_Producto'), MODELO_IA)
-                        # --- LÓGICA ACTUALIZADA ---
-                        # Ahora llenamos también la prioridad con la respuesta de la IA
-                        df_consolidado.loc[index, 'Puntuación IA'] = resultado_ia.get('puntuacion_relevancia')
-                        df_consolidado.loc[index, 'Prioridad'] = resultado_ia.get('prioridad') # <--- NUEVO
-                        df_consolidado.loc[index, 'Motivo IA'] = resultado_ia.get('motivo')
-                        df_consolidado.loc[index, 'Acción IA'] = resultado_ia.get('accion_recomendada')
-                        df_consolidado.loc[index, 'Codigo Necesidad de Contratacion'] = row.get('Codigo_Necesidad_Contratacion')
-                        df_consolidado.loc[index, 'Entidad Contratante'] = row.get('Entidad_Contratante')
-                        time.sleep(4.1)
+                analyzer = open_batch_analyzer()
+                if os.getenv("GEMINI_AGGREGATE", "0") == "1":
+                    # One analysis per NIC code, copied to each of its products
+                    needs = group_needs(df_product_details)
+                    scores = need_scores(ranker, needs)
+                    if os.getenv("RANK_GATE", "1") == "1":
+                        need_gate = select_for_llm(
+                            scores,
+                            top_k=int(os.getenv("RANK_TOP_K", "0")),
+                            min_score=float(os.getenv("RANK_MIN_SCORE", "0"))
+                        )
+                    else:
+                        need_gate = pd.Series(True, index=scores.index)
+                    print_gate_summary(scores, need_gate, label="necesidades")
+                    resultados = analyze_needs(analyzer, [need for need in needs if need_gate[need[0]]])
+                    pending = df_product_details.loc[list(resultados)]
+                else:
+                    print_gate_summary(df_product_details[SCORE_COLUMN], gate)
+                    # Many products per call; only missing or malformed answers are retried
+                    pending = df_product_details[gate]
+                    resultados = analyzer.analyze([(index, row.get('Descripcion_Producto')) for index, row in pending.iterrows()])
+                for index, row in pending.iterrows():
+                    resultado_ia = resultados[index]
+                    df_consolidado.loc[index, 'Puntuación IA'] = resultado_ia.get('puntuacion_relevancia')
+                    df_consolidado.loc[index, 'Prioridad'] = resultado_ia.get('prioridad')
+                    df_consolidado.loc[index, 'Motivo IA'] = resultado_ia.get('motivo')
+                    df_consolidado.loc[index, 'Acción IA'] = resultado_ia.get('accion_recomendada')
+                    df_consolidado.loc[index, 'Codigo Necesidad de Contratacion'] = row.get('Codigo_Necesidad_Contratacion')
+                    df_consolidado.loc[index, 'Entidad Contratante'] = row.get('Entidad_Contratante')
+                    df_consolidado.loc[index, SCORE_COLUMN] = row.get(SCORE_COLUMN)
+                print_analyzer_stats(analyzer)
             
                 print(f"[INFO] Columnas del Analisis: {list(df_consolidado.columns)}")
                 
@@ -823,6 +960,7 @@ def main():
     success = export_to_excel(df_with_details, output_file)
     
     if success:
+        mark_as_seen(seen_index, df['Código Necesidad de Contratación'], exclude=detail_failed_codes(df_with_details))
         print(f"\n[OK] Proceso completado exitosamente!")
         print(f"[INFO] Archivo generado: {output_file}")
         print(f"[INFO] Total de registros extraídos: {len(df)}")
@@ -853,9 +991,276 @@ def main():
         print("\n[ERROR] Error en la exportación")
         return df  # Return original DataFrame even if export failed
 
+def listing_records_from_dataframe(df, seen_index=None):
+    """
+    Listing DataFrame rows as {header: value} dicts, skipping NIC codes already seen
+    """
+    for record in df.to_dict('records'):
+        if seen_index is not None and record.get('Código Necesidad de Contratación') in seen_index:
+            continue
+        yield record
+
+def stream_listing_records(url, max_pages=None, crawl_concurrency=1, pool=None, seen_index=None, journal=None):
+    """
+    Source of the streaming pipeline, with the same listing settings as main()
+    SEARCH_PUSHDOWN and CRAWL_CONCURRENCY > 1 download their rows before streaming them;
+    otherwise the JSON endpoint is paged lazily. If it fails before the first row the
+    Selenium pagination is used instead; a failure after that is raised to the pipeline
+    """
+    if os.getenv("SEARCH_PUSHDOWN", "0") == "1":
+        print("[INFO] Buscando candidatos en el servidor por palabras clave...")
+        try:
+            df = search_candidates_dataframe(
+                KEYWORDS_HUREONSYS,
+                search_field=os.getenv("SEARCH_FIELD", "objeto"),
+                concurrency=max(crawl_concurrency, 4)
+            )
+        except Exception as e:
+            print(f"[ERROR] Error en la búsqueda del servidor, se recorrerá el listado completo: {e}")
+        else:
+            yield from listing_records_from_dataframe(df, seen_index)
+            return
+    
+    parser_backend = os.getenv("LISTING_PARSER", DEFAULT_PARSER_BACKEND)
+    if crawl_concurrency > 1 and seen_index is None:
+        # Parallel blocks arrive out of order, so the listing is downloaded first
+        df = extract_all_pages_data(url, max_pages=max_pages, concurrency=crawl_concurrency, pool=pool,
+                                    journal=journal, parser_backend=parser_backend)
+        if df is not None:
+            yield from listing_records_from_dataframe(df)
+        return
+    
+    max_records = max_pages * LISTING_PAGE_LENGTH if max_pages else None
+    client = DataTablesListingClient()
+    yielded = False
+    try:
+        completed_blocks = client.resume_blocks(journal)
+        if seen_index is not None:
+            rows = dedupe_rows(client.iter_new_rows(seen_index, max_records=max_records,
+                                                    completed_blocks=completed_blocks, on_block=journal.record_page))
+        else:
+            rows = dedupe_rows(client.iter_rows(max_records=max_records, completed_blocks=completed_blocks,
+                                                on_block=journal.record_page))
+        for row in rows:
+            yielded = True
+            yield dict(zip(LISTING_HEADERS, row.to_list()))
+    except Exception as e:
+        if yielded:
+            raise
+        print(f"HTTP extraction failed ({e}), falling back to Selenium pagination...")
+        df = extract_all_pages_data_selenium(url, max_pages=max_pages, pool=pool, parser_backend=parser_backend)
+        if df is None:
+            raise
+        yield from listing_records_from_dataframe(df, seen_index)
+
+def main_streaming(resume=False):
+    """
+    Streaming variant of main(): listing pages, keyword filter, detail pages and
+    Gemini run concurrently as bounded stages, and every processed need is
+    appended to the CSV outputs as soon as it is ready
+    """
+    url = "https://www.compraspublicas.gob.ec/ProcesoContratacion/compras/NCO/FrmNCOListado.cpe"
+    output_file = "necesidades_contratacion_filtrado_TI_con_codigo.xlsx"
+    
+    print("=== EXTRACTOR DE DATOS DE CONTRATACIÓN PÚBLICA (STREAMING) ===\n")
+    
+    rate_controller = configure_shared_controller(
+        initial_limit=int(os.getenv("RATE_INITIAL_LIMIT", "4")),
+        max_limit=int(os.getenv("RATE_MAX_LIMIT", "16"))
+    )
+    pool = DriverPool(
+        size=int(os.getenv("DRIVER_POOL_SIZE", "1")),
+        max_pages_per_driver=int(os.getenv("DRIVER_MAX_PAGES", "100")),
+        lean=os.getenv("LEAN_BROWSER", "1") == "1"
+    )
+    detail_workers = int(os.getenv("DETAIL_WORKERS", "4"))
+    fetcher = DetailFetcher(pool=pool, pool_size=max(detail_workers, 1))
+    
+    seen_index = None
+    if os.getenv("INCREMENTAL", "0") == "1":
+        seen_index = SeenIndex(
+            os.getenv("SEEN_INDEX_FILE", "nic_seen_index.idx"),
+            use_bloom=os.getenv("SEEN_INDEX_BLOOM", "0") == "1"
+        )
+        print(f"[INFO] Modo incremental: {len(seen_index)} códigos NIC ya vistos")
+    
+    journal = CheckpointJournal(os.getenv("CHECKPOINT_FILE", "crawl_checkpoint.jsonl"), resume=resume)
+    completed_details = journal.completed_details()
+    fulltext_index = open_fulltext_index()
+    
+    # Source stage: listing rows as {header: value} dicts, page by page
+    max_pages = int(os.getenv("MAX_PAGES") or 0) or None
+    records = stream_listing_records(
+        url, max_pages=max_pages, crawl_concurrency=int(os.getenv("CRAWL_CONCURRENCY", "1")),
+        pool=pool, seen_index=seen_index, journal=journal
+    )
+    
+    # Local BM25 gate; with no global view of the stream only the score cutoff applies
+    ranker = open_relevance_ranker()
+    rank_gate = os.getenv("RANK_GATE", "1") == "1"
+    rank_min_score = float(os.getenv("RANK_MIN_SCORE", "0"))
+    
+    def match(record):
+        if fulltext_index is not None:
+            fulltext_index.add_record(record)
+        descripcion = record.get('Descripción del Objeto de compra', '')
+        ranker.update_corpus([descripcion])
+        category, keywords = match_keywords(descripcion)
+        if category is None:
+            return None
+        return {
+            'Categoría': category,
+            'Palabras Clave Encontradas': ', '.join(keywords),
+            SCORE_COLUMN: ranker.score_text(descripcion)
+        }
+    
+    def fetch_detail(record):
+        detail_url = record.get('URL_Detalle', '')
+        if detail_url in completed_details:
+            detail_data, codigo = completed_details[detail_url]
+        else:
+            detail_data, codigo = fetch_detail_record(detail_url, fetcher, pool)
+            if detail_url.strip():
+                journal.record_detail(detail_url, detail_data, codigo)
+        record['Detalles_Productos'] = detail_data
+        record['Codigo_Necesidad_Contratacion'] = codigo
+        if fulltext_index is not None:
+            fulltext_index.add_record(record)
+        return record
+    
+    # The products of each need go to Gemini in one batched call; several needs are
+    # analyzed at once and the executor keeps them within the RPM/TPM quota
+    analyzer = open_batch_analyzer() if MODELO_IA else None
+    
+    aggregate_needs = os.getenv("GEMINI_AGGREGATE", "0") == "1"
+    
+    def analyze(record):
+        if aggregate_needs:
+            return analyze_need(record)
+        selected = []
+        for product in product_rows(record):
+            ranker.update_corpus([product['Descripcion_Producto']])
+            score = ranker.score_text(product['Descripcion_Producto'])
+            if rank_gate and (score <= 0 or score < rank_min_score):
+                print(f"  > Omitido por el ranking local (CPC {product['CPC']}, puntuación {score:.2f})")
+                continue
+            selected.append((product, score))
+        if not selected:
+            return []
+        print(f"  > Analizando {len(selected)} productos de {record.get('Código Necesidad de Contratación', 'N/A')}...")
+        resultados = analyzer.analyze([(i, product['Descripcion_Producto']) for i, (product, _) in enumerate(selected)])
+        analysis = []
+        for i, (product, score) in enumerate(selected):
+            resultado_ia = resultados[i]
+            analysis.append({
+                'Puntuación IA': resultado_ia.get('puntuacion_relevancia'),
+                'Prioridad': resultado_ia.get('prioridad'),
+                'Motivo IA': resultado_ia.get('motivo'),
+                'Acción IA': resultado_ia.get('accion_recomendada'),
+                'Codigo Necesidad de Contratacion': product['Codigo_Necesidad_Contratacion'],
+                'Entidad Contratante': product['Entidad_Contratante'],
+                'CPC': product['CPC'],
+                'Descripcion_Producto': product['Descripcion_Producto'],
+                SCORE_COLUMN: score
+            })
+        return analysis
+    
+    def analyze_need(record):
+        # The whole need (object plus its product table) is one item; every product gets its score
+        products = product_rows(record)
+        if not products:
+            return []
+        codigo = record.get('Código Necesidad de Contratación', 'N/A')
+        text = build_need_text(record.get('Descripción del Objeto de compra', ''), products,
+                               entidad=record.get('Entidad Contratante', ''))
+        ranker.update_corpus([text])
+        score = ranker.score_text(text)
+        if rank_gate and (score <= 0 or score < rank_min_score):
+            print(f"  > Omitida por el ranking local ({codigo}, puntuación {score:.2f})")
+            return []
+        print(f"  > Analizando la necesidad {codigo} ({len(products)} productos)...")
+        resultado_ia = analyzer.analyze([(codigo, text)])[codigo]
+        return [{
+            'Puntuación IA': resultado_ia.get('puntuacion_relevancia'),
+            'Prioridad': resultado_ia.get('prioridad'),
+            'Motivo IA': resultado_ia.get('motivo'),
+            'Acción IA': resultado_ia.get('accion_recomendada'),
+            'Codigo Necesidad de Contratacion': product['Codigo_Necesidad_Contratacion'],
+            'Entidad Contratante': product['Entidad_Contratante'],
+            'CPC': product['CPC'],
+            'Descripcion_Producto': product['Descripcion_Producto'],
+            SCORE_COLUMN: score
+        } for product in products]
+    
+    # A resumed run appends to the CSVs of the interrupted one
+    sink = CsvStreamSink(
+        output_dir=os.getenv("STREAM_OUTPUT_DIR", "."),
+        flush_every=int(os.getenv("STREAM_FLUSH_EVERY", "10")),
+        append=resume
+    )
+    pipeline = StreamingPipeline(
+        match, fetch_detail, sink,
+        analyze=analyze if MODELO_IA else None,
+        detail_workers=detail_workers,
+        ai_workers=analyzer.executor.max_concurrency if analyzer is not None else 1,
+        buffer_size=int(os.getenv("STREAM_BUFFER", "50"))
+    )
+    
+    try:
+        results = pipeline.run(records)
+    except Exception as e:
+        # The listing stopped early: nothing is marked as seen, so --resume retries it
+        print(f"[ERROR] El listado se interrumpió, no se registran códigos como vistos: {e}")
+        pipeline.print_stats()
+        return None
+    finally:
+        pool.close()
+    pipeline.print_stats()
+    rate_controller.print_stats()
+    if analyzer is not None:
+        print_analyzer_stats(analyzer)
+    ranker.save()
+    print(f"[INFO] Archivos CSV incrementales: {', '.join(sink.paths[kind] for kind in sink.paths if sink.counts[kind])}")
+    
+    if not results:
+        print("[ERROR] No se encontraron registros que coincidan con los criterios de filtrado")
+        mark_as_seen(seen_index, pipeline.scanned_codes)
+        return None
+    
+    # Same Excel outputs as the batch mode, written once the stream has drained
+    df_with_details = pd.DataFrame([
+        {k: v for k, v in record.items() if k != 'Analisis_IA'} for record in results
+    ])
+    df_product_details = pd.DataFrame([product for record in results for product in product_rows(record)])
+    if not df_product_details.empty:
+        df_product_details.to_excel("detalles_productos_con_codigo.xlsx", index=False)
+    df_consolidado = pd.DataFrame([item for record in results for item in record.get('Analisis_IA') or []])
+    if not df_consolidado.empty:
+        df_consolidado.to_excel("analisis_gemini_consolidado_con_codigo.xlsx", index=False)
+    
+    if export_to_excel(df_with_details, output_file):
+        mark_as_seen(seen_index, pipeline.scanned_codes, exclude=detail_failed_codes(df_with_details))
+    
+    return {
+        'final_df': df_with_details,
+        'product_details_df': df_product_details,
+        'consolidated_df': df_consolidado,
+        'excel_file': output_file
+    }
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extractor de necesidades de contratación del SERCOP")
+    parser.add_argument("--resume", action="store_true",
+                        help="Reanudar desde el checkpoint de una ejecución interrumpida")
+    parser.add_argument("--stream", action="store_true",
+                        help="Procesar en streaming: detalle e IA empiezan mientras se descarga el listado")
+    args = parser.parse_args()
+    
     # Execute main function and get results
-    result = main()
+    if args.stream or os.getenv("STREAMING", "0") == "1":
+        result = main_streaming(resume=args.resume)
+    else:
+        result = main(resume=args.resume)
     
     # If result is a dictionary with DataFrames, provide additional information
     if isinstance(result, dict) and 'original_df' in result:
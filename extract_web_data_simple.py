@@ -5,9 +5,10 @@ Script simplificado para extraer datos de tabla web y exportar a Excel
 """
 
 import pandas as pd
+import os
 import requests
-from bs4 import BeautifulSoup
 import time
+from listing_html_parser import DEFAULT_BACKEND, parse_listing_table
 
 def extract_table_from_web(url):
     """
@@ -35,11 +36,11 @@ def extract_table_from_web(url):
         print(f"Error con pandas: {e}")
         return None
 
-def extract_with_requests(url):
+def extract_with_requests(url, parser_backend=DEFAULT_BACKEND):
     """
-    Extraer datos usando requests y BeautifulSoup
+    Extraer datos usando requests y el parser del listado ('lxml' o 'bs4')
     """
-    print("Intentando con requests y BeautifulSoup...")
+    print(f"Intentando con requests y parser {parser_backend}...")
     
     headers = {
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
@@ -51,44 +52,17 @@ def extract_with_requests(url):
         response = requests.get(url, headers=headers, timeout=30)
         response.raise_for_status()
         
-        soup = BeautifulSoup(response.text, 'html.parser')
+        parsed = parse_listing_table(response.text, backend=parser_backend)
         
-        # Buscar tabla con id="table_id"
-        table = soup.find('table', {'id': 'table_id'})
-        
-        if table:
+        # Tabla con id="table_id"
+        if parsed:
             print("Tabla encontrada, extrayendo datos...")
             
-            # Extraer headers
-            headers = []
-            header_row = table.find('thead').find('tr')
-            for th in header_row.find_all('th'):
-                headers.append(th.get_text(strip=True))
-            
+            headers, rows = parsed
             print(f"Headers encontrados: {headers}")
             
-            # Extraer datos
-            data_rows = []
-            tbody = table.find('tbody')
-            
-            if tbody:
-                for row in tbody.find_all('tr'):
-                    row_data = []
-                    cells = row.find_all('td')
-                    
-                    for i, cell in enumerate(cells):
-                        cell_text = cell.get_text(strip=True)
-                        
-                        # Manejar enlaces en la columna de Entidad Contratante
-                        if i == 7:  # Columna de Entidad Contratante
-                            link = cell.find('a')
-                            if link:
-                                cell_text = link.get_text(strip=True)
-                        
-                        row_data.append(cell_text)
-                    
-                    if len(row_data) == len(headers):
-                        data_rows.append(row_data)
+            # La columna de Entidad Contratante ya viene con el texto del enlace
+            data_rows = [cells for cells, _ in rows if len(cells) == len(headers)]
             
             print(f"Extraídas {len(data_rows)} filas de datos")
             
@@ -150,7 +124,7 @@ def main():
     
     if df is None or df.empty:
         print("\nMétodo pandas falló, intentando con requests...")
-        df = extract_with_requests(url)
+        df = extract_with_requests(url, parser_backend=os.getenv("LISTING_PARSER", DEFAULT_BACKEND))
     
     if df is None or df.empty:
         print("\n❌ No se pudieron extraer datos de la página web")
@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Índice de texto completo (SQLite FTS5) sobre las necesidades y sus productos.
+
+Indexa 'Descripción del Objeto de compra' (y la entidad) de cada necesidad NIC
+y la Descripcion_Producto de cada línea de la página de detalle. El tokenizador
+unicode61 con remove_diacritics pliega mayúsculas y tildes ("analisis" encuentra
+"ANÁLISIS") y respeta los límites de palabra ("datos" no coincide dentro de
+"candidatos"). Admite la sintaxis de FTS5: frases entre comillas, AND / OR /
+NOT, NEAR() y prefijos (softw*).
+
+El índice vive en disco y se actualiza de forma incremental: una necesidad se
+inserta o actualiza por su código NIC y los productos de un código se
+reemplazan cuando llega su detalle.
+
+Uso:
+    python full_text_index.py buscar '"analisis de datos" OR ciberseguridad'
+    python full_text_index.py buscar software --ambito productos --limite 20
+    python full_text_index.py importar necesidades_contratacion_filtrado_TI_con_codigo.xlsx
+    python full_text_index.py estado
+"""
+
+import argparse
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+DEFAULT_INDEX_FILE = "sercop_fulltext.db"
+TOKENIZER = "unicode61 remove_diacritics 2"
+SCOPES = ('todo', 'necesidades', 'productos')
+
+CODIGO_COLUMNS = ('Código Necesidad de Contratación', 'Codigo_Necesidad_Contratacion')
+DESCRIPCION_COLUMN = 'Descripción del Objeto de compra'
+
+
+def phrase(text):
+    """
+    Texto como frase literal de FTS5 (las comillas internas se duplican)
+    """
+    return '"' + str(text).replace('"', '""') + '"'
+
+
+def keywords_query(keywords):
+    """
+    Consulta que encuentra cualquiera de las palabras clave, cada una como frase
+    """
+    return ' OR '.join(phrase(keyword) for keyword in keywords if str(keyword).strip())
+
+
+def _text(value):
+    if value is None:
+        return ''
+    try:
+        if pd.isna(value):
+            return ''
+    except (TypeError, ValueError):
+        pass
+    return str(value).strip()
+
+
+def _codigo(record):
+    for column in CODIGO_COLUMNS:
+        codigo = _text(record.get(column))
+        if codigo and codigo != 'N/A':
+            return codigo
+    return ''
+
+
+class FullTextIndex:
+    """
+    Índice FTS5 persistente de necesidades y productos
+    """
+
+    def __init__(self, db_path=DEFAULT_INDEX_FILE):
+        self.db_path = db_path
+        # El pipeline en streaming indexa desde sus hilos: una conexión protegida por un lock
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, timeout=60, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(f"""
+            CREATE TABLE IF NOT EXISTS necesidades (
+                codigo TEXT PRIMARY KEY,
+                descripcion TEXT NOT NULL DEFAULT '',
+                entidad TEXT NOT NULL DEFAULT '',
+                fecha_publicacion TEXT NOT NULL DEFAULT '',
+                url TEXT NOT NULL DEFAULT '',
+                updated REAL
+            );
+            CREATE TABLE IF NOT EXISTS productos (
+                id INTEGER PRIMARY KEY,
+                codigo TEXT NOT NULL,
+                no TEXT NOT NULL DEFAULT '',
+                cpc TEXT NOT NULL DEFAULT '',
+                descripcion TEXT NOT NULL DEFAULT '',
+                unidad TEXT NOT NULL DEFAULT '',
+                cantidad TEXT NOT NULL DEFAULT ''
+            );
+            CREATE INDEX IF NOT EXISTS idx_productos_codigo ON productos(codigo);
+
+            CREATE VIRTUAL TABLE IF NOT EXISTS necesidades_fts USING fts5(
+                descripcion, entidad, content='necesidades', content_rowid='rowid',
+                tokenize='{TOKENIZER}'
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS productos_fts USING fts5(
+                descripcion, content='productos', content_rowid='id',
+                tokenize='{TOKENIZER}'
+            );
+
+            CREATE TRIGGER IF NOT EXISTS necesidades_ai AFTER INSERT ON necesidades BEGIN
+                INSERT INTO necesidades_fts(rowid, descripcion, entidad)
+                VALUES (new.rowid, new.descripcion, new.entidad);
+            END;
+            CREATE TRIGGER IF NOT EXISTS necesidades_ad AFTER DELETE ON necesidades BEGIN
+                INSERT INTO necesidades_fts(necesidades_fts, rowid, descripcion, entidad)
+                VALUES ('delete', old.rowid, old.descripcion, old.entidad);
+            END;
+            CREATE TRIGGER IF NOT EXISTS necesidades_au AFTER UPDATE ON necesidades BEGIN
+                INSERT INTO necesidades_fts(necesidades_fts, rowid, descripcion, entidad)
+                VALUES ('delete', old.rowid, old.descripcion, old.entidad);
+                INSERT INTO necesidades_fts(rowid, descripcion, entidad)
+                VALUES (new.rowid, new.descripcion, new.entidad);
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS productos_ai AFTER INSERT ON productos BEGIN
+                INSERT INTO productos_fts(rowid, descripcion) VALUES (new.id, new.descripcion);
+            END;
+            CREATE TRIGGER IF NOT EXISTS productos_ad AFTER DELETE ON productos BEGIN
+                INSERT INTO productos_fts(productos_fts, rowid, descripcion)
+                VALUES ('delete', old.id, old.descripcion);
+            END;
+        """)
+        self.conn.commit()
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    # ------------------------------------------------------------------
+    # Actualización incremental
+    # ------------------------------------------------------------------
+
+    def add_needs(self, records):
+        """
+        Inserta o actualiza necesidades ({columna del listado: valor}) por código NIC
+        Devuelve cuántas se escribieron
+        """
+        now = time.time()
+        rows = []
+        for record in records:
+            codigo = _codigo(record)
+            if not codigo:
+                continue
+            rows.append((
+                codigo,
+                _text(record.get(DESCRIPCION_COLUMN)),
+                _text(record.get('Entidad Contratante')),
+                _text(record.get('Fecha de Publicación')),
+                _text(record.get('URL_Detalle')),
+                now
+            ))
+        if not rows:
+            return 0
+        with self._lock:
+            # UPSERT (no INSERT OR REPLACE) para que el trigger de UPDATE mantenga el FTS
+            self.conn.executemany("""
+                INSERT INTO necesidades (codigo, descripcion, entidad, fecha_publicacion, url, updated)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(codigo) DO UPDATE SET
+                    descripcion = excluded.descripcion,
+                    entidad = excluded.entidad,
+                    fecha_publicacion = excluded.fecha_publicacion,
+                    url = excluded.url,
+                    updated = excluded.updated
+                WHERE necesidades.descripcion != excluded.descripcion
+                   OR necesidades.entidad != excluded.entidad
+                   OR necesidades.fecha_publicacion != excluded.fecha_publicacion
+                   OR necesidades.url != excluded.url
+            """, rows)
+            self.conn.commit()
+        return len(rows)
+
+    def add_needs_dataframe(self, df):
+        if df is None or df.empty:
+            return 0
+        return self.add_needs(df.to_dict('records'))
+
+    def set_products(self, codigo, products):
+        """
+        Reemplaza los productos de una necesidad
+        products: listas [No., CPC, Descripción, Unidad, Cantidad] de extract_detail_page_data
+        """
+        codigo = _text(codigo)
+        if not codigo or codigo == 'N/A':
+            return 0
+        rows = []
+        for product in products or []:
+            values = [_text(value) for value in list(product)[:5]]
+            values += [''] * (5 - len(values))
+            rows.append((codigo, *values))
+        with self._lock:
+            self.conn.execute("DELETE FROM productos WHERE codigo = ?", (codigo,))
+            self.conn.executemany("""
+                INSERT INTO productos (codigo, no, cpc, descripcion, unidad, cantidad)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, rows)
+            self.conn.commit()
+        return len(rows)
+
+    def add_product_details(self, df_product_details):
+        """
+        Indexa df_product_details (una fila por producto, con Codigo_Necesidad_Contratacion)
+        """
+        if df_product_details is None or df_product_details.empty:
+            return 0
+        columns = ['No', 'CPC', 'Descripcion_Producto', 'Unidad', 'Cantidad']
+        written = 0
+        for codigo, group in df_product_details.groupby('Codigo_Necesidad_Contratacion', sort=False):
+            products = group.reindex(columns=columns).fillna('').values.tolist()
+            written += self.set_products(codigo, products)
+        return written
+
+    def add_record(self, record):
+        """
+        Necesidad del pipeline en streaming y, si ya tiene detalle, sus productos
+        Se llama al filtrar (solo la necesidad) y de nuevo tras descargar el detalle
+        """
+        self.add_needs([record])
+        if isinstance(record.get('Detalles_Productos'), list):
+            self.set_products(_codigo(record), record['Detalles_Productos'])
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def _query(self, sql, params):
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def _run(self, sql, query, params):
+        try:
+            return self._query(sql, (query, *params))
+        except sqlite3.OperationalError:
+            # Texto libre con caracteres de la sintaxis de FTS5: se busca como frase
+            return self._query(sql, (phrase(query), *params))
+
+    def search_needs(self, query, limit=50):
+        rows = self._run("""
+            SELECT n.codigo, n.descripcion, n.entidad, n.fecha_publicacion, n.url, bm25(necesidades_fts)
+            FROM necesidades_fts JOIN necesidades n ON n.rowid = necesidades_fts.rowid
+            WHERE necesidades_fts MATCH ?
+            ORDER BY bm25(necesidades_fts) LIMIT ?
+        """, query, (limit,))
+        return [{
+            'Ámbito': 'necesidad', 'Código': codigo, 'CPC': '', 'Descripción': descripcion,
+            'Entidad': entidad, 'Fecha de Publicación': fecha, 'URL_Detalle': url, 'Puntuación': -score
+        } for codigo, descripcion, entidad, fecha, url, score in rows]
+
+    def search_products(self, query, limit=50):
+        rows = self._run("""
+            SELECT p.codigo, p.cpc, p.descripcion, n.entidad, n.fecha_publicacion, n.url, bm25(productos_fts)
+            FROM productos_fts
+            JOIN productos p ON p.id = productos_fts.rowid
+            LEFT JOIN necesidades n ON n.codigo = p.codigo
+            WHERE productos_fts MATCH ?
+            ORDER BY bm25(productos_fts) LIMIT ?
+        """, query, (limit,))
+        return [{
+            'Ámbito': 'producto', 'Código': codigo, 'CPC': cpc, 'Descripción': descripcion,
+            'Entidad': entidad or '', 'Fecha de Publicación': fecha or '', 'URL_Detalle': url or '',
+            'Puntuación': -score
+        } for codigo, cpc, descripcion, entidad, fecha, url, score in rows]
+
+    def search(self, query, scope='todo', limit=50):
+        """
+        DataFrame con las coincidencias ordenadas por relevancia (BM25 de FTS5)
+        query: expresión FTS5; si no es válida se busca el texto como frase
+        """
+        if scope not in SCOPES:
+            raise ValueError(f"Ámbito desconocido: {scope} (use {', '.join(SCOPES)})")
+        results = []
+        if scope in ('todo', 'necesidades'):
+            results.extend(self.search_needs(query, limit))
+        if scope in ('todo', 'productos'):
+            results.extend(self.search_products(query, limit))
+        df = pd.DataFrame(results, columns=[
+            'Ámbito', 'Código', 'CPC', 'Descripción', 'Entidad', 'Fecha de Publicación', 'URL_Detalle', 'Puntuación'
+        ])
+        if scope == 'todo' and not df.empty:
+            df = df.sort_values('Puntuación', ascending=False).head(limit).reset_index(drop=True)
+        return df
+
+    def matching_codes(self, query):
+        """
+        Códigos NIC cuya necesidad o alguno de cuyos productos coincide con query
+        """
+        codes = {row[0] for row in self._run(
+            "SELECT n.codigo FROM necesidades_fts JOIN necesidades n ON n.rowid = necesidades_fts.rowid "
+            "WHERE necesidades_fts MATCH ?", query, ())}
+        codes.update(row[0] for row in self._run(
+            "SELECT p.codigo FROM productos_fts JOIN productos p ON p.id = productos_fts.rowid "
+            "WHERE productos_fts MATCH ?", query, ()))
+        return codes
+
+    def stats(self):
+        needs = self._query("SELECT COUNT(*) FROM necesidades", ())[0][0]
+        products = self._query("SELECT COUNT(*) FROM productos", ())[0][0]
+        return {'necesidades': needs, 'productos': products}
+
+
+def import_excel(index, path):
+    """
+    Carga en el índice un Excel exportado por el extractor (listado o detalles de productos)
+    """
+    df = pd.read_excel(path, dtype=str)
+    if 'Descripcion_Producto' in df.columns:
+        return 'productos', index.add_product_details(df)
+    if DESCRIPCION_COLUMN in df.columns:
+        return 'necesidades', index.add_needs_dataframe(df)
+    raise ValueError(f"{path}: no tiene '{DESCRIPCION_COLUMN}' ni 'Descripcion_Producto'")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Índice de texto completo de necesidades del SERCOP")
+    parser.add_argument("--db", default=DEFAULT_INDEX_FILE, help="Archivo SQLite del índice")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    buscar = sub.add_parser("buscar", help="Buscar en el índice (sintaxis FTS5)")
+    buscar.add_argument("query")
+    buscar.add_argument("--ambito", choices=SCOPES, default="todo")
+    buscar.add_argument("--limite", type=int, default=20)
+
+    importar = sub.add_parser("importar", help="Indexar archivos Excel de ejecuciones anteriores")
+    importar.add_argument("files", nargs="+")
+
+    sub.add_parser("estado", help="Número de necesidades y productos indexados")
+    args = parser.parse_args()
+
+    index = FullTextIndex(args.db)
+    try:
+        if args.command == "buscar":
+            started = time.perf_counter()
+            df = index.search(args.query, scope=args.ambito, limit=args.limite)
+            elapsed = (time.perf_counter() - started) * 1000
+            print(f"[INFO] {len(df)} resultados en {elapsed:.1f} ms")
+            if not df.empty:
+                with pd.option_context('display.max_colwidth', 80, 'display.width', 200):
+                    print(df[['Ámbito', 'Código', 'CPC', 'Descripción', 'Puntuación']].to_string(index=False))
+        elif args.command == "importar":
+            for path in args.files:
+                kind, written = import_excel(index, path)
+                print(f"[OK] {path}: {written} {kind} indexados")
+        else:
+            stats = index.stats()
+            print(f"[INFO] {args.db}: {stats['necesidades']} necesidades, {stats['productos']} productos")
+    finally:
+        index.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
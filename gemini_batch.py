@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Análisis con Gemini por lotes: varios productos u OCIDs en una sola llamada.
+
+Cada lote se envía en un único prompt con un id corto por elemento y se pide
+como respuesta un arreglo JSON con un objeto por id. Cada objeto se valida
+(puntuación 0-10, prioridad, motivo y una de las ACCIONES) y solo los elementos que faltan
+o llegan mal formados vuelven a la cola para la siguiente ronda, en lotes
+más pequeños. Tras max_rounds rondas, lo que siga sin respuesta válida queda
+como "Revisar Manualmente", igual que un error de la llamada a Gemini.
+
+Los textos repetidos se envían una sola vez y, con una AnalysisCache
+(gemini_cache.py), los ya analizados en ejecuciones anteriores no se envían.
+Con un GeminiExecutor (gemini_executor.py) los lotes de una ronda se envían
+en paralelo dentro de las cuotas RPM/TPM en lugar de con una pausa fija.
+"""
+
+import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from gemini_cache import cache_key
+
+# Cambiar al modificar build_batch_prompt: invalida los análisis guardados en la caché
+PROMPT_VERSION = "lote-v1"
+DEFAULT_BATCH_SIZE = 25
+DEFAULT_PAUSE = 4.1  # segundos entre llamadas cuando no hay ejecutor (límite de peticiones por minuto)
+
+PRIORIDADES = ('Alta', 'Media', 'Baja')
+ACCIONES = ('Postular Inmediatamente', 'Analizar Pliego con Detalle', 'Baja Prioridad', 'Descartar')
+
+_ACCIONES_NORMALIZADAS = {accion.lower(): accion for accion in ACCIONES}
+
+_FENCE_RE = re.compile(r'^```(?:json)?\s*|\s*```$', re.I)
+
+
+def manual_review(motivo):
+    """
+    Resultado de reserva cuando no hay respuesta válida (mismo formato que un análisis válido)
+    """
+    return {"puntuacion_relevancia": 0, "prioridad": "Revisar Manualmente", "motivo": motivo,
+            "accion_recomendada": "Revisar Manualmente"}
+
+
+def build_batch_prompt(items):
+    """
+    items: lista de (id, texto)
+    """
+    elementos = "\n".join(f"[{item_id}] {text}" for item_id, text in items)
+    return f"""
+    Eres un Asesor Senior en Contratación Pública Ecuatoriana. Analiza cada uno de los siguientes {len(items)} elementos del SERCOP para tu cliente HureonSys (experto en Desarrollo de Software, Ciberseguridad, y Análisis de Datos con Estadística) y determina su relevancia.
+    Cada elemento empieza con su id entre corchetes:
+    {elementos}
+    Responde estrictamente con un arreglo JSON que contenga exactamente un objeto por id, con este formato:
+    [
+      {{
+        "id": "[El id del elemento, sin corchetes]",
+        "puntuacion_relevancia": [Un número del 0 al 10],
+        "prioridad": "[Asigna 'Alta' si la puntuación es >= 7, 'Media' si está entre 4 y 6, y 'Baja' si es <= 3]",
+        "motivo": "[Explicación concisa de la puntuación]",
+        "accion_recomendada": "[Postular Inmediatamente, Analizar Pliego con Detalle, Baja Prioridad, Descartar]"
+      }}
+    ]
+    """
+
+
+def parse_batch_response(text):
+    """
+    Lista de objetos de la respuesta (admite bloque ```json y un objeto que envuelva el arreglo)
+    """
+    data = json.loads(_FENCE_RE.sub('', text.strip()))
+    if isinstance(data, dict):
+        arrays = [value for value in data.values() if isinstance(value, list)]
+        data = arrays[0] if len(arrays) == 1 else [data]
+    if not isinstance(data, list):
+        raise ValueError("La respuesta no es un arreglo JSON")
+    return data
+
+
+def validate_result(obj):
+    """
+    Resultado normalizado, o None si el objeto no tiene un análisis válido
+    """
+    if not isinstance(obj, dict):
+        return None
+    try:
+        puntuacion = float(obj.get('puntuacion_relevancia'))
+    except (TypeError, ValueError):
+        return None
+    if not 0 <= puntuacion <= 10:
+        return None
+    prioridad = str(obj.get('prioridad') or '').strip().capitalize()
+    if prioridad not in PRIORIDADES:
+        return None
+    motivo = str(obj.get('motivo') or '').strip()
+    accion = _ACCIONES_NORMALIZADAS.get(str(obj.get('accion_recomendada') or '').strip().lower())
+    if not motivo or accion is None:
+        return None
+    return {
+        "puntuacion_relevancia": int(puntuacion) if puntuacion.is_integer() else puntuacion,
+        "prioridad": prioridad,
+        "motivo": motivo,
+        "accion_recomendada": accion
+    }
+
+
+class BatchAnalyzer:
+    """
+    Analiza muchos elementos con pocas llamadas a Gemini
+    """
+
+    def __init__(self, modelo, batch_size=DEFAULT_BATCH_SIZE, max_rounds=3, pause=DEFAULT_PAUSE,
+                 max_item_chars=6000, timeout=100, cache=None, executor=None):
+        self.modelo = modelo
+        self.model_name = getattr(modelo, 'model_name', None) or type(modelo).__name__
+        self.cache = cache
+        self.executor = executor
+        self.batch_size = max(1, batch_size)
+        self.max_rounds = max(1, max_rounds)
+        self.pause = pause
+        self.max_item_chars = max_item_chars
+        self.timeout = timeout
+        self.stats = {'items': 0, 'cached': 0, 'duplicates': 0, 'calls': 0, 'requeued': 0,
+                      'failed': 0, 'errors': 0, 'seconds': 0.0}
+        self._stats_lock = threading.Lock()
+        self._pause_lock = threading.Lock()
+        self._last_call = None
+
+    def _count(self, key, n=1):
+        with self._stats_lock:
+            self.stats[key] += n
+
+    def _wait(self):
+        """
+        Pausa fija entre llamadas (solo sin ejecutor)
+        """
+        with self._pause_lock:
+            if self._last_call is not None and self.pause:
+                remaining = self.pause - (time.monotonic() - self._last_call)
+                if remaining > 0:
+                    time.sleep(remaining)
+            self._last_call = time.monotonic()
+
+    def _text(self, text):
+        text = ' '.join(str(text).split())
+        if self.max_item_chars and len(text) > self.max_item_chars:
+            text = text[:self.max_item_chars] + ' …'
+        return text
+
+    def analyze_batch(self, items):
+        """
+        Una llamada para items [(id, texto)]
+        Devuelve {id: resultado} solo con los elementos válidos
+        """
+        ids = [str(item_id) for item_id, _ in items]
+        prompt = build_batch_prompt([(item_id, self._text(text)) for item_id, (_, text) in zip(ids, items)])
+        options = {
+            'generation_config': {"response_mime_type": "application/json"},
+            'request_options': {"timeout": self.timeout}
+        }
+        self._count('calls')
+        if self.executor is not None:
+            # Unos 60 tokens de respuesta por elemento para la cubeta TPM
+            response = self.executor.generate(prompt, expected_output_tokens=60 * len(items), **options)
+        else:
+            self._wait()
+            response = self.modelo.generate_content(prompt, **options)
+        results = {}
+        for obj in parse_batch_response(response.text):
+            item_id = str(obj.get('id', '')).strip().strip('[]') if isinstance(obj, dict) else ''
+            result = validate_result(obj)
+            if item_id in ids and result is not None and item_id not in results:
+                results[item_id] = result
+        return results
+
+    def _try_batch(self, local, texts):
+        """
+        (respuestas válidas, mensaje de error o None) de un lote {id corto: clave de contenido}
+        """
+        print(f"  > Lote de {len(local)} elementos a Gemini...")
+        try:
+            return self.analyze_batch([(i, texts[content_key]) for i, content_key in local.items()]), None
+        except Exception as e:
+            print(f"    ! Error al analizar el lote con Gemini: {e}")
+            self._count('errors')
+            return {}, str(e)
+
+    def analyze(self, items):
+        """
+        items: lista de (clave, texto); devuelve {clave: resultado} para todas las claves
+        """
+        started = time.perf_counter()
+        self._count('items', len(items))
+
+        # Textos iguales (tras normalizar) comparten análisis: se envían una sola vez
+        content_keys = [cache_key(text, PROMPT_VERSION, self.model_name) for _, text in items]
+        texts = {}
+        for content_key, (_, text) in zip(content_keys, items):
+            texts.setdefault(content_key, text)
+        self._count('duplicates', len(items) - len(texts))
+
+        results = self.cache.get_many(texts) if self.cache is not None else {}
+        self._count('cached', len(results))
+
+        pending = [content_key for content_key in texts if content_key not in results]
+        last_error = "Sin respuesta válida de Gemini"
+        batch_size = self.batch_size
+        for round_number in range(1, self.max_rounds + 1):
+            if not pending:
+                break
+            if round_number > 1:
+                self._count('requeued', len(pending))
+                print(f"  > Reintentando {len(pending)} elementos sin respuesta válida (ronda {round_number})")
+            requeue = []
+            # Ids cortos dentro de cada lote: 1..N
+            batches = [
+                {str(i): content_key for i, content_key in enumerate(pending[start:start + batch_size], start=1)}
+                for start in range(0, len(pending), batch_size)
+            ]
+            if self.executor is not None and len(batches) > 1:
+                with ThreadPoolExecutor(max_workers=self.executor.max_concurrency) as pool:
+                    outcomes = list(pool.map(lambda local: self._try_batch(local, texts), batches))
+            else:
+                outcomes = [self._try_batch(local, texts) for local in batches]
+
+            for local, (answered, error) in zip(batches, outcomes):
+                if error is not None:
+                    last_error = error
+                fresh = {}
+                for i, content_key in local.items():
+                    if i in answered:
+                        fresh[content_key] = answered[i]
+                    else:
+                        requeue.append(content_key)
+                results.update(fresh)
+                # Solo las respuestas válidas se guardan: los fallos se reintentan la próxima vez
+                if self.cache is not None:
+                    self.cache.put_many(fresh, PROMPT_VERSION, self.model_name)
+            pending = requeue
+            batch_size = max(1, batch_size // 2)
+
+        for content_key in pending:
+            results[content_key] = manual_review(last_error)
+        self._count('failed', len(pending))
+        self._count('seconds', time.perf_counter() - started)
+        return {key: dict(results[content_key]) for (key, _), content_key in zip(items, content_keys)}
+
+    def print_stats(self):
+        stats = self.stats
+        print(f"[INFO] Gemini por lotes: {stats['items']} elementos en {stats['calls']} llamadas "
+              f"({stats['seconds']:.1f} s)")
+        print(f"   • Desde la caché: {stats['cached']}, textos repetidos: {stats['duplicates']}")
+        print(f"   • Reencolados: {stats['requeued']}, sin respuesta válida: {stats['failed']}, "
+              f"errores de llamada: {stats['errors']}")
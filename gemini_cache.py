@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Caché persistente de análisis de Gemini, direccionada por contenido.
+
+La clave es un SHA-256 del texto normalizado (espacios colapsados, minúsculas),
+de la versión de la plantilla del prompt y del nombre del modelo: la misma
+descripción de producto publicada por cien entidades cuesta una sola llamada,
+y cambiar el prompt o el modelo invalida la caché sin borrarla a mano.
+
+Se guarda en SQLite junto a los scripts (por defecto gemini_cache.db), de modo
+que extract_table_data_pagination_with_codigo.py y prospeccion_sercop - AI.py
+comparten las respuestas. Las entradas caducan por TTL y, si se supera el
+máximo de entradas, se eliminan las menos usadas recientemente.
+
+Uso:
+    python gemini_cache.py estado
+    python gemini_cache.py purgar --ttl-days 30
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gemini_cache.db")
+DEFAULT_TTL_DAYS = 90
+DEFAULT_MAX_ENTRIES = 200_000
+
+RESULT_FIELDS = ('puntuacion_relevancia', 'prioridad', 'motivo', 'accion_recomendada')
+
+
+def normalize_text(text):
+    return ' '.join(str(text).split()).lower()
+
+
+def cache_key(text, prompt_version, model_name):
+    payload = '\x00'.join((prompt_version, model_name, normalize_text(text)))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class AnalysisCache:
+    """
+    {clave: análisis} en SQLite, con TTL y límite de entradas (LRU)
+    """
+
+    def __init__(self, db_path=DEFAULT_CACHE_FILE, ttl_days=DEFAULT_TTL_DAYS, max_entries=DEFAULT_MAX_ENTRIES):
+        self.db_path = db_path
+        self.ttl = ttl_days * 86400 if ttl_days else None
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, timeout=60, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS analyses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                prompt_version TEXT NOT NULL,
+                result TEXT NOT NULL,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS idx_analyses_last_used ON analyses(last_used);
+        """)
+        self.conn.commit()
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def get_many(self, keys):
+        """
+        {clave: análisis} de las claves presentes y no caducadas
+        """
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        now = time.time()
+        oldest = now - self.ttl if self.ttl else 0
+        with self._lock:
+            # Consultas por tramos: SQLite limita el número de parámetros
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = self.conn.execute(
+                    f"SELECT key, result FROM analyses WHERE created >= ? AND key IN ({','.join('?' * len(chunk))})",
+                    (oldest, *chunk)
+                ).fetchall()
+                found.update((key, json.loads(result)) for key, result in rows)
+            if found:
+                self.conn.executemany(
+                    "UPDATE analyses SET last_used = ?, hits = hits + 1 WHERE key = ?",
+                    [(now, key) for key in found]
+                )
+                self.conn.commit()
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, entries, prompt_version, model_name):
+        """
+        entries: {clave: análisis}; se guardan solo los campos del análisis
+        """
+        now = time.time()
+        rows = [
+            (key, model_name, prompt_version,
+             json.dumps({field: result.get(field) for field in RESULT_FIELDS}, ensure_ascii=False), now, now)
+            for key, result in entries.items()
+        ]
+        if not rows:
+            return 0
+        with self._lock:
+            self.conn.executemany("""
+                INSERT OR REPLACE INTO analyses (key, model, prompt_version, result, created, last_used)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, rows)
+            self.conn.commit()
+        return len(rows)
+
+    def evict(self):
+        """
+        Elimina las entradas caducadas y, si sobran, las menos usadas recientemente
+        Devuelve cuántas se eliminaron
+        """
+        removed = 0
+        with self._lock:
+            if self.ttl:
+                removed += self.conn.execute(
+                    "DELETE FROM analyses WHERE created < ?", (time.time() - self.ttl,)
+                ).rowcount
+            if self.max_entries:
+                total = self.conn.execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+                if total > self.max_entries:
+                    removed += self.conn.execute("""
+                        DELETE FROM analyses WHERE key IN (
+                            SELECT key FROM analyses ORDER BY last_used LIMIT ?
+                        )
+                    """, (total - self.max_entries,)).rowcount
+            self.conn.commit()
+        return removed
+
+    def stats(self):
+        with self._lock:
+            entries, hits = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(hits), 0) FROM analyses").fetchone()
+        return {'entries': entries, 'stored_hits': hits, 'hits': self.hits, 'misses': self.misses}
+
+    def print_stats(self):
+        stats = self.stats()
+        print(f"[INFO] Caché de Gemini: {stats['hits']} aciertos, {stats['misses']} fallos "
+              f"({stats['entries']} entradas en {os.path.basename(self.db_path)})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Caché persistente de análisis de Gemini")
+    parser.add_argument("--db", default=DEFAULT_CACHE_FILE, help="Archivo SQLite de la caché")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("estado", help="Entradas y aciertos acumulados")
+    purgar = sub.add_parser("purgar", help="Eliminar entradas caducadas o que exceden el máximo")
+    purgar.add_argument("--ttl-days", type=float, default=DEFAULT_TTL_DAYS)
+    purgar.add_argument("--max-entries", type=int, default=DEFAULT_MAX_ENTRIES)
+    args = parser.parse_args()
+
+    if args.command == "purgar":
+        cache = AnalysisCache(args.db, ttl_days=args.ttl_days, max_entries=args.max_entries)
+        print(f"[OK] Entradas eliminadas: {cache.evict()}")
+    else:
+        cache = AnalysisCache(args.db)
+    stats = cache.stats()
+    print(f"[INFO] {args.db}: {stats['entries']} análisis guardados, {stats['stored_hits']} aciertos acumulados")
+    cache.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
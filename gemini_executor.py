@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ejecutor de llamadas a Gemini limitado por cubetas de tokens (RPM y TPM).
+
+Sustituye el time.sleep(4.1) fijo tras cada análisis: cada llamada toma una
+ficha de la cubeta de peticiones por minuto y tantas fichas como tokens
+estimados de la cubeta de tokens por minuto (ajustadas después con el uso
+real que devuelve la API). Varias llamadas pueden estar en vuelo a la vez
+hasta max_concurrency. Ante un error de cuota (429 / ResourceExhausted) o un
+error transitorio del servicio se pausan todas las llamadas nuevas con
+backoff exponencial, respetando el retry_delay que indique Gemini.
+
+Con la cuota de una clave gratuita (15 RPM) el ritmo es el mismo que antes;
+con una clave de nivel superior basta con subir GEMINI_RPM y GEMINI_TPM.
+"""
+
+import csv
+import random
+import re
+import threading
+import time
+
+DEFAULT_RPM = 15
+DEFAULT_TPM = 250_000
+DEFAULT_CONCURRENCY = 4
+
+CHARS_PER_TOKEN = 4  # estimación para español antes de conocer el uso real
+
+_QUOTA_MARKERS = ('429', 'resourceexhausted', 'resource_exhausted', 'quota', 'rate limit', 'toomanyrequests')
+_TRANSIENT_MARKERS = ('serviceunavailable', 'overloaded', 'internalservererror', 'deadlineexceeded', 'timed out')
+_RETRY_DELAY_RES = (
+    re.compile(r'retry_delay\s*\{\s*seconds:\s*(\d+)', re.I),
+    re.compile(r'retry in\s+([\d.]+)\s*s', re.I),
+)
+
+
+def estimate_tokens(text):
+    return max(1, len(str(text)) // CHARS_PER_TOKEN)
+
+
+def _error_text(error):
+    return f"{type(error).__name__} {error}".lower()
+
+
+def is_quota_error(error):
+    text = _error_text(error)
+    return any(marker in text for marker in _QUOTA_MARKERS)
+
+
+def is_transient_error(error):
+    text = _error_text(error)
+    return any(marker in text for marker in _TRANSIENT_MARKERS)
+
+
+def retry_delay(error):
+    """
+    Segundos de espera que sugiere el error de cuota de Gemini, o None
+    """
+    text = str(error)
+    for pattern in _RETRY_DELAY_RES:
+        match = pattern.search(text)
+        if match:
+            return float(match.group(1))
+    return None
+
+
+class TokenBucket:
+    """
+    Cubeta de fichas que se rellena a per_minute / 60 fichas por segundo
+
+    La capacidad por defecto es una décima parte de la cuota por minuto, de
+    modo que una ráfaga inicial no duplica la cuota en la primera ventana.
+    Una petición mayor que la capacidad espera a tener la cubeta llena y deja
+    el saldo en negativo (deuda que se paga antes de la siguiente).
+    """
+
+    def __init__(self, per_minute, capacity=None):
+        self.rate = per_minute / 60.0
+        self.capacity = float(capacity or max(1.0, per_minute / 10.0))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, amount=1):
+        """
+        Bloquea hasta poder tomar amount fichas; devuelve los segundos esperados
+        """
+        waited = 0.0
+        needed = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= needed:
+                    self._tokens -= amount
+                    return waited
+                delay = (needed - self._tokens) / self.rate
+            delay = min(delay, 1.0)
+            time.sleep(delay)
+            waited += delay
+
+    def adjust(self, amount):
+        """
+        Corrige el saldo cuando el coste real difiere del estimado (amount > 0 cobra más)
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self.capacity, self._tokens - amount)
+
+
+class GeminiExecutor:
+    """
+    generate_content con límites RPM/TPM, llamadas concurrentes y backoff ante cuota
+    """
+
+    def __init__(self, modelo, rpm=DEFAULT_RPM, tpm=DEFAULT_TPM, max_concurrency=DEFAULT_CONCURRENCY,
+                 max_retries=4, backoff_base=5.0, output_tokens=150):
+        self.modelo = modelo
+        self.model_name = getattr(modelo, 'model_name', None) or type(modelo).__name__
+        self.requests_bucket = TokenBucket(rpm)
+        self.tokens_bucket = TokenBucket(tpm)
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.output_tokens = output_tokens
+
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._lock = threading.Lock()
+        self._pause_until = 0.0
+        self._first_call = None
+        self._last_call = None
+        self.stats = {'calls': 0, 'tokens': 0, 'prompt_tokens': 0, 'output_tokens': 0,
+                      'quota_errors': 0, 'transient_errors': 0, 'throttle_wait': 0.0, 'latency': 0.0}
+        # Una entrada por llamada: tokens de entrada y salida, latencia y reintentos
+        self.call_log = []
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self.stats[key] += n
+
+    def pause(self, seconds):
+        """
+        Ninguna llamada nueva empieza antes de seconds
+        """
+        with self._lock:
+            self._pause_until = max(self._pause_until, time.monotonic() + seconds)
+
+    def _wait_pause(self):
+        while True:
+            with self._lock:
+                remaining = self._pause_until - time.monotonic()
+            if remaining <= 0:
+                return
+            time.sleep(min(remaining, 1.0))
+
+    def _backoff(self, attempt, error):
+        suggested = retry_delay(error)
+        if suggested is not None:
+            return suggested + random.random()
+        return self.backoff_base * (2 ** attempt) * (0.5 + random.random() / 2)
+
+    def generate(self, prompt, expected_output_tokens=None, **kwargs):
+        """
+        modelo.generate_content(prompt, **kwargs) respetando las cuotas
+        expected_output_tokens: tokens de respuesta esperados (para la cubeta TPM)
+        """
+        estimated = estimate_tokens(prompt) + (expected_output_tokens or self.output_tokens)
+        for attempt in range(self.max_retries + 1):
+            self._wait_pause()
+            waited = self.requests_bucket.acquire(1)
+            waited += self.tokens_bucket.acquire(estimated)
+            self._count('throttle_wait', waited)
+            with self._slots:
+                started = time.monotonic()
+                with self._lock:
+                    if self._first_call is None:
+                        self._first_call = started
+                try:
+                    response = self.modelo.generate_content(prompt, **kwargs)
+                except Exception as e:
+                    quota = is_quota_error(e)
+                    if not (quota or is_transient_error(e)) or attempt >= self.max_retries:
+                        raise
+                    self._count('quota_errors' if quota else 'transient_errors')
+                    delay = self._backoff(attempt, e)
+                    print(f"    ! Gemini {'sin cuota' if quota else 'no disponible'}; "
+                          f"reintento en {delay:.1f} s ({attempt + 1}/{self.max_retries})")
+                    self.pause(delay)
+                    continue
+                finished = time.monotonic()
+
+            usage = getattr(response, 'usage_metadata', None)
+            prompt_tokens = getattr(usage, 'prompt_token_count', 0) or 0
+            output_tokens = getattr(usage, 'candidates_token_count', 0) or 0
+            actual = getattr(usage, 'total_token_count', 0) or prompt_tokens + output_tokens
+            if actual:
+                self.tokens_bucket.adjust(actual - estimated)
+            with self._lock:
+                self.stats['calls'] += 1
+                self.stats['tokens'] += actual or estimated
+                self.stats['prompt_tokens'] += prompt_tokens
+                self.stats['output_tokens'] += output_tokens
+                self.stats['latency'] += finished - started
+                self._last_call = finished
+                self.call_log.append({
+                    'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+                    'model': self.model_name,
+                    'estimated_tokens': estimated,
+                    'prompt_tokens': prompt_tokens,
+                    'output_tokens': output_tokens,
+                    'latency_s': round(finished - started, 3),
+                    'attempts': attempt + 1
+                })
+            return response
+
+    def throughput(self):
+        """
+        (llamadas por minuto, tokens por minuto) logrados desde la primera llamada
+        """
+        with self._lock:
+            if self._first_call is None or self._last_call is None:
+                return 0.0, 0.0
+            minutes = max(self._last_call - self._first_call, 1e-6) / 60.0
+            return self.stats['calls'] / minutes, self.stats['tokens'] / minutes
+
+    def save_call_log(self, path):
+        """
+        Añade el registro de llamadas (tokens de entrada/salida por llamada) a un CSV
+        """
+        if not self.call_log:
+            return 0
+        columns = list(self.call_log[0])
+        write_header = True
+        try:
+            with open(path, 'r', encoding='utf-8-sig') as f:
+                write_header = not f.readline()
+        except FileNotFoundError:
+            pass
+        with open(path, 'a', newline='', encoding='utf-8-sig' if write_header else 'utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=columns)
+            if write_header:
+                writer.writeheader()
+            writer.writerows(self.call_log)
+        return len(self.call_log)
+
+    def print_stats(self):
+        stats = self.stats
+        calls_per_minute, tokens_per_minute = self.throughput()
+        average = stats['latency'] / stats['calls'] if stats['calls'] else 0.0
+        print(f"[INFO] Ejecutor Gemini: {stats['calls']} llamadas, {stats['tokens']} tokens "
+              f"({stats['prompt_tokens']} de entrada, {stats['output_tokens']} de salida)")
+        if stats['calls']:
+            print(f"   • Por llamada: {stats['prompt_tokens'] / stats['calls']:.0f} tokens de entrada, "
+                  f"{stats['output_tokens'] / stats['calls']:.0f} de salida")
+        print(f"   • Throughput: {calls_per_minute:.1f} llamadas/min, {tokens_per_minute:.0f} tokens/min "
+              f"(límites {self.requests_bucket.rate * 60:.0f} RPM, {self.tokens_bucket.rate * 60:.0f} TPM)")
+        print(f"   • Latencia media: {average:.2f} s, espera por cuota: {stats['throttle_wait']:.1f} s, "
+              f"errores de cuota: {stats['quota_errors']}, transitorios: {stats['transient_errors']}")
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Búsqueda de muchas palabras clave a la vez con un autómata Aho-Corasick.
+
+El autómata se construye una sola vez a partir de KEYWORDS_HUREONSYS y
+recorre cada descripción en una pasada, devolviendo todas las palabras
+clave encontradas (de todas las categorías) con su posición. Si está
+instalado pyahocorasick se usa su autómata en C; si no, la implementación
+en Python de este módulo, con la misma interfaz.
+
+El front-end vectorizado (annotate) trabaja sobre una Series completa:
+pasa las descripciones a minúsculas en bloque, descarta con una expresión
+regular compilada las que no contienen ninguna palabra clave y ejecuta el
+autómata solo una vez por descripción distinta.
+"""
+
+import re
+from collections import namedtuple
+
+import pandas as pd
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+CATEGORY_COLUMN = 'Categoría'
+KEYWORDS_COLUMN = 'Palabras Clave Encontradas'
+OFFSETS_COLUMN = 'Posiciones Palabras Clave'
+
+KeywordMatch = namedtuple('KeywordMatch', ['start', 'end', 'keyword', 'category'])
+
+
+class AhoCorasickAutomaton:
+    """
+    Autómata Aho-Corasick en Python puro (misma interfaz básica que ahocorasick.Automaton)
+    """
+
+    def __init__(self):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        self._built = False
+
+    def add_word(self, word, value):
+        state = 0
+        for char in word:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append(value)
+        self._built = False
+        return True
+
+    def make_automaton(self):
+        """
+        Calcula los enlaces de fallo (BFS) y hereda las salidas de cada sufijo
+        """
+        queue = list(self._goto[0].values())
+        for state in queue:
+            self._fail[state] = 0
+        position = 0
+        while position < len(queue):
+            state = queue[position]
+            position += 1
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+        self._built = True
+
+    def iter(self, text):
+        """
+        Genera (índice_final, valor) por cada aparición de cada palabra en text
+        """
+        if not self._built:
+            self.make_automaton()
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                for value in output[state]:
+                    yield index, value
+
+
+def create_automaton(native=True):
+    """
+    Autómata de pyahocorasick si está disponible (y native=True); si no, el de Python
+    """
+    if native and ahocorasick is not None:
+        return ahocorasick.Automaton()
+    return AhoCorasickAutomaton()
+
+
+class KeywordMatcher:
+    """
+    Coincidencias de palabras clave por categoría, sin distinguir mayúsculas
+    (mismo criterio que keyword.lower() in descripcion.lower())
+    """
+
+    def __init__(self, keywords_by_category, native=True):
+        self.categories = list(keywords_by_category)
+        self._category_order = {category: i for i, category in enumerate(self.categories)}
+        self._keyword_order = {}
+
+        entries = {}
+        for category, keywords in keywords_by_category.items():
+            for keyword in keywords:
+                pattern = keyword.lower()
+                if not pattern:
+                    continue
+                self._keyword_order.setdefault((category, keyword), len(self._keyword_order))
+                entries.setdefault(pattern, []).append((keyword, category))
+
+        self.automaton = create_automaton(native=native)
+        self.backend = type(self.automaton).__module__.split('.')[0]
+        for pattern, values in entries.items():
+            self.automaton.add_word(pattern, (len(pattern), tuple(values)))
+        self.automaton.make_automaton()
+
+        # Prefiltro en C: descarta de una vez los textos sin ninguna palabra clave
+        self._prefilter = re.compile('|'.join(
+            re.escape(pattern) for pattern in sorted(entries, key=len, reverse=True)
+        )) if entries else None
+
+    def find_all(self, text):
+        """
+        Todas las apariciones en text como KeywordMatch(start, end, keyword, category)
+        """
+        lowered = str(text).lower()
+        matches = []
+        for end_index, (length, values) in self.automaton.iter(lowered):
+            start = end_index - length + 1
+            for keyword, category in values:
+                matches.append(KeywordMatch(start, end_index + 1, keyword, category))
+        return matches
+
+    def _summarize(self, matches):
+        """
+        (categorías, palabras clave, posiciones) en el orden de KEYWORDS_HUREONSYS
+        """
+        if not matches:
+            return [], [], []
+        categories = sorted({m.category for m in matches}, key=self._category_order.get)
+        keywords = []
+        seen = set()
+        for m in sorted(matches, key=lambda m: self._keyword_order[(m.category, m.keyword)]):
+            if m.keyword not in seen:
+                seen.add(m.keyword)
+                keywords.append(m.keyword)
+        offsets = [f"{m.keyword}@{m.start}" for m in sorted(matches, key=lambda m: (m.start, m.end))]
+        return categories, keywords, offsets
+
+    def match(self, text):
+        """
+        (categorías, palabras clave) encontradas en text; listas vacías si no hay coincidencias
+        """
+        categories, keywords, _ = self._summarize(self.find_all(text))
+        return categories, keywords
+
+    def annotate(self, descriptions, with_offsets=False):
+        """
+        DataFrame con Categoría y Palabras Clave Encontradas (y las posiciones si with_offsets)
+        alineado con el índice de descriptions; cadenas vacías donde no hay coincidencias
+        """
+        lowered = descriptions.astype(str).str.lower()
+        columns = [CATEGORY_COLUMN, KEYWORDS_COLUMN] + ([OFFSETS_COLUMN] if with_offsets else [])
+        values = {column: [''] * len(lowered) for column in columns}
+
+        if self._prefilter is not None and len(lowered):
+            # Cada descripción distinta se filtra y se recorre una sola vez
+            codes, uniques = pd.factorize(lowered)
+            candidates = [i for i, text in enumerate(uniques) if self._prefilter.search(text)]
+            if candidates:
+                joined = {column: [''] * len(uniques) for column in columns}
+                for i in candidates:
+                    categories, keywords, offsets = self._summarize(self.find_all(uniques[i]))
+                    joined[CATEGORY_COLUMN][i] = ', '.join(categories)
+                    joined[KEYWORDS_COLUMN][i] = ', '.join(keywords)
+                    if with_offsets:
+                        joined[OFFSETS_COLUMN][i] = '; '.join(offsets)
+                for column in columns:
+                    values[column] = pd.Series(joined[column]).to_numpy(dtype=object)[codes]
+
+        return pd.DataFrame(values, index=descriptions.index, columns=columns)
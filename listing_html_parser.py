@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Parser del HTML del listado NCO (#table_id) con dos backends.
+
+- 'lxml': árbol C de lxml y XPath; solo recorre thead/tbody de #table_id.
+- 'bs4':  BeautifulSoup con html.parser (el comportamiento original).
+
+Ambos devuelven exactamente las mismas filas: el texto de cada celda como
+get_text(strip=True) y, en la columna 7 (Entidad Contratante), el texto y el
+href del enlace.
+"""
+
+from bs4 import BeautifulSoup
+from lxml import html as lxml_html
+
+PARSER_BACKENDS = ('lxml', 'bs4')
+DEFAULT_BACKEND = 'lxml'
+
+ENTITY_COLUMN = 7
+
+_TABLE_XPATH = '//table[@id="table_id"]'
+_HEADER_XPATH = './thead/tr[1]/th'
+_ROWS_XPATH = './tbody/tr'
+_CELLS_XPATH = './td'
+_TEXT_XPATH = './/text()'
+_LINK_XPATH = './/a'
+
+
+def _lxml_text(element):
+    """
+    Equivalente a get_text(strip=True): fragmentos de texto recortados y unidos sin separador
+    """
+    return ''.join(part.strip() for part in element.xpath(_TEXT_XPATH))
+
+
+def _parse_lxml(html_content, include_headers):
+    document = lxml_html.fromstring(html_content)
+    tables = document.xpath(_TABLE_XPATH)
+    if not tables:
+        return None
+    table = tables[0]
+
+    headers = [_lxml_text(th) for th in table.xpath(_HEADER_XPATH)] if include_headers else []
+
+    rows = []
+    for tr in table.xpath(_ROWS_XPATH):
+        cells = []
+        detail_url = None
+        for i, td in enumerate(tr.xpath(_CELLS_XPATH)):
+            if i == ENTITY_COLUMN:
+                links = td.xpath(_LINK_XPATH)
+                if links:
+                    cells.append(_lxml_text(links[0]))
+                    detail_url = links[0].get('href')
+                    continue
+            cells.append(_lxml_text(td))
+        rows.append((cells, detail_url))
+    return headers, rows
+
+
+def _parse_bs4(html_content, include_headers):
+    soup = BeautifulSoup(html_content, 'html.parser')
+    table = soup.find('table', {'id': 'table_id'})
+    if not table:
+        return None
+
+    headers = []
+    if include_headers:
+        header_row = table.find('thead').find('tr')
+        headers = [th.get_text(strip=True) for th in header_row.find_all('th')]
+
+    rows = []
+    tbody = table.find('tbody')
+    if tbody:
+        for tr in tbody.find_all('tr'):
+            cells = []
+            detail_url = None
+            for i, td in enumerate(tr.find_all('td')):
+                cell_text = td.get_text(strip=True)
+                if i == ENTITY_COLUMN:
+                    link = td.find('a')
+                    if link:
+                        cell_text = link.get_text(strip=True)
+                        detail_url = link.get('href')
+                cells.append(cell_text)
+            rows.append((cells, detail_url))
+    return headers, rows
+
+
+def parse_listing_table(html_content, backend=DEFAULT_BACKEND, include_headers=True):
+    """
+    Devuelve (headers, [(celdas, url_detalle), ...]) de #table_id, o None si no hay tabla
+    """
+    if backend not in PARSER_BACKENDS:
+        raise ValueError(f"backend debe ser uno de {PARSER_BACKENDS}")
+    if backend == 'lxml':
+        return _parse_lxml(html_content, include_headers)
+    return _parse_bs4(html_content, include_headers)
+
+
+def parse_listing_rows(html_content, backend=DEFAULT_BACKEND, expected_columns=10):
+    """
+    Filas con expected_columns celdas más la URL de detalle al final (formato de LISTING_HEADERS)
+    """
+    parsed = parse_listing_table(html_content, backend=backend, include_headers=False)
+    if parsed is None:
+        return None
+    _, rows = parsed
+    return [cells + [detail_url or ""] for cells, detail_url in rows if len(cells) == expected_columns]
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Esquema tipado para el DataFrame del listado NCO.
+
+Convierte de forma vectorizada las columnas de texto del listado:
+- fechas de publicación y límite -> datetime64
+- tipo y estado de la necesidad y entidad contratante -> category
+- "Provincia - Cantón" -> category, más columnas Provincia y Cantón (category)
+- código NIC -> NIC_RUC, NIC_Anio y NIC_Secuencia (enteros nullable)
+
+Las columnas originales mantienen su nombre y posición (filter_data_by_keywords
+usa la posición de la descripción) y las derivadas se añaden al final.
+"""
+
+import pandas as pd
+
+FECHA_PUBLICACION = 'Fecha de Publicación'
+FECHA_LIMITE = 'Fecha límite para la entrega de proformas'
+TIPO_NECESIDAD = 'Tipo de Necesidad'
+ESTADO = 'Estado de la Necesidad'
+PROVINCIA_CANTON = 'Provincia - Cantón'
+ENTIDAD = 'Entidad Contratante'
+CODIGO = 'Código Necesidad de Contratación'
+
+DATE_COLUMNS = (FECHA_PUBLICACION, FECHA_LIMITE)
+# La entidad se repite en todas las necesidades que publica: pocas categorías distintas
+CATEGORY_COLUMNS = (TIPO_NECESIDAD, ESTADO, PROVINCIA_CANTON, ENTIDAD)
+
+# Formato de las fechas del listado: "2025-09-25 19:00:00"
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+# Variantes que aparecen en algunas filas: solo la fecha o minutos sin segundos
+FALLBACK_DATE_FORMATS = ('%Y-%m-%d %H:%M', '%Y-%m-%d')
+
+# NIC-<RUC de 13 dígitos>-<año>-<secuencia>
+NIC_PATTERN = r'^NIC-(?P<ruc>\d+)-(?P<anio>\d{4})-(?P<secuencia>\d+)$'
+
+DERIVED_COLUMNS = {
+    'Provincia': 'category',
+    'Cantón': 'category',
+    'NIC_RUC': 'Int64',
+    'NIC_Anio': 'Int16',
+    'NIC_Secuencia': 'Int32',
+}
+
+
+def parse_dates(series):
+    """
+    Fechas del listado a datetime64; los valores vacíos o con otro formato quedan NaT
+    """
+    parsed = pd.to_datetime(series, format=DATE_FORMAT, errors='coerce')
+    for fallback_format in FALLBACK_DATE_FORMATS:
+        missing = parsed.isna() & series.notna() & (series.astype(str).str.strip() != '')
+        if not missing.any():
+            break
+        # Formatos explícitos en lugar de format='mixed', que no existe en pandas < 2.0
+        parsed[missing] = pd.to_datetime(series[missing].astype(str).str.strip(), format=fallback_format, errors='coerce')
+    return parsed
+
+
+def split_location(series):
+    """
+    "CARCHI - MONTUFAR" -> (Provincia, Cantón) como categorías
+    """
+    parts = series.astype(str).str.split(' - ', n=1, expand=True)
+    if parts.shape[1] < 2:
+        parts[1] = None
+    provincia = parts[0].str.strip().replace('', None).astype('category')
+    canton = parts[1].str.strip().replace('', None).astype('category')
+    return provincia, canton
+
+
+def decompose_nic(series):
+    """
+    Código NIC -> DataFrame con NIC_RUC, NIC_Anio y NIC_Secuencia como enteros
+    (el RUC pierde los ceros a la izquierda: str(ruc).zfill(13) lo recupera)
+    """
+    parts = series.astype(str).str.strip().str.extract(NIC_PATTERN)
+    return pd.DataFrame({
+        'NIC_RUC': pd.to_numeric(parts['ruc'], errors='coerce').astype('Int64'),
+        'NIC_Anio': pd.to_numeric(parts['anio'], errors='coerce').astype('Int16'),
+        'NIC_Secuencia': pd.to_numeric(parts['secuencia'], errors='coerce').astype('Int32'),
+    }, index=series.index)
+
+
+def apply_listing_schema(df):
+    """
+    Devuelve una copia del DataFrame del listado con los tipos del esquema
+    Las columnas que no existan en df se ignoran
+    """
+    if df is None or df.empty:
+        return df
+
+    df = df.copy()
+    for column in DATE_COLUMNS:
+        if column in df.columns:
+            df[column] = parse_dates(df[column])
+
+    for column in CATEGORY_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype('category')
+
+    if PROVINCIA_CANTON in df.columns:
+        df['Provincia'], df['Cantón'] = split_location(df[PROVINCIA_CANTON].astype(str))
+
+    if CODIGO in df.columns:
+        nic = decompose_nic(df[CODIGO])
+        for column in nic.columns:
+            df[column] = nic[column]
+
+    return df
+
+
+def memory_usage_mb(df):
+    """
+    Memoria real (deep) del DataFrame en MB
+    """
+    if df is None:
+        return 0.0
+    return df.memory_usage(deep=True).sum() / (1024 * 1024)
+
+
+def print_schema_summary(df_before, df_after):
+    """
+    Muestra los tipos aplicados y el ahorro de memoria
+    """
+    before = memory_usage_mb(df_before)
+    after = memory_usage_mb(df_after)
+    print(f"[INFO] Esquema tipado aplicado: {before:.2f} MB -> {after:.2f} MB")
+    for column in list(DATE_COLUMNS) + list(CATEGORY_COLUMNS) + list(DERIVED_COLUMNS):
+        if column in df_after.columns:
+            print(f"   • {column}: {df_after[column].dtype}")
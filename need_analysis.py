@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Análisis con Gemini por necesidad (código NIC) en lugar de por producto.
+
+La decisión de postular se toma por necesidad: los productos de un mismo
+Codigo_Necesidad_Contratacion se agrupan en un texto compacto con la
+descripción del objeto y la tabla de productos (las líneas con el mismo CPC
+y descripción se unen y sus cantidades se suman), se analiza ese texto una
+sola vez y la puntuación se copia a cada producto. El número de llamadas
+depende del número de necesidades, no del de líneas de producto.
+"""
+
+import pandas as pd
+
+NEED_KEY = 'Codigo_Necesidad_Contratacion'
+MAX_PRODUCT_LINES = 30  # líneas distintas por necesidad en el prompt
+
+
+def _quantity(value):
+    try:
+        return float(str(value).replace(',', ''))
+    except (TypeError, ValueError):
+        return None
+
+
+def compact_product_lines(products):
+    """
+    products: dicts con CPC, Descripcion_Producto, Unidad y Cantidad
+    Devuelve las líneas distintas por (CPC, descripción) con la cantidad sumada
+    """
+    lines = {}
+    for product in products:
+        cpc = str(product.get('CPC') or '').strip()
+        descripcion = ' '.join(str(product.get('Descripcion_Producto') or '').split())
+        key = (cpc, descripcion.lower())
+        unidad = str(product.get('Unidad') or '').strip()
+        cantidad = _quantity(product.get('Cantidad'))
+        if key not in lines:
+            lines[key] = {'cpc': cpc, 'descripcion': descripcion, 'unidad': unidad,
+                          'cantidad': cantidad, 'lineas': 1}
+            continue
+        line = lines[key]
+        line['lineas'] += 1
+        if line['cantidad'] is not None and cantidad is not None:
+            line['cantidad'] += cantidad
+        else:
+            line['cantidad'] = None
+    return list(lines.values())
+
+
+def _format_line(line):
+    detalle = []
+    if line['cantidad'] is not None:
+        cantidad = int(line['cantidad']) if float(line['cantidad']).is_integer() else line['cantidad']
+        detalle.append(f"{cantidad} {line['unidad']}".strip())
+    if line['lineas'] > 1:
+        detalle.append(f"{line['lineas']} líneas")
+    suffix = f" ({', '.join(detalle)})" if detalle else ''
+    return f"{line['cpc']} {line['descripcion']}{suffix}".strip()
+
+
+def build_need_text(descripcion, products, entidad=''):
+    """
+    Texto compacto de una necesidad: objeto, entidad y tabla de productos sin líneas repetidas
+    """
+    lines = compact_product_lines(products)
+    partes = [f"Necesidad: {' '.join(str(descripcion or '').split())}"]
+    if entidad:
+        partes.append(f"Entidad: {entidad}")
+    listed = [_format_line(line) for line in lines[:MAX_PRODUCT_LINES]]
+    if len(lines) > MAX_PRODUCT_LINES:
+        listed.append(f"… y {len(lines) - MAX_PRODUCT_LINES} productos más")
+    partes.append(f"Productos (líneas: {len(products)}, distintas: {len(lines)}): " + '; '.join(listed))
+    return ' | '.join(partes)
+
+
+def group_needs(df_product_details):
+    """
+    [(código NIC, texto de la necesidad, índices de sus productos)] en el orden de aparición
+    """
+    needs = []
+    codes = df_product_details[NEED_KEY].fillna('').astype(str).str.strip()
+    # Sin código NIC (detalle fallido) cada registro del listado es su propia necesidad
+    missing = codes.isin(['', 'N/A', 'None'])
+    if missing.any():
+        fallback = df_product_details.get('Registro_ID', pd.Series(df_product_details.index, index=df_product_details.index))
+        codes = codes.where(~missing, 'Registro ' + fallback.astype(str))
+    for codigo, group in df_product_details.groupby(codes, sort=False):
+        first = group.iloc[0]
+        text = build_need_text(
+            first.get('Descripcion_Objeto', ''),
+            group.to_dict('records'),
+            entidad=first.get('Entidad_Contratante', '')
+        )
+        needs.append((codigo, text, list(group.index)))
+    return needs
+
+
+def analyze_needs(analyzer, needs):
+    """
+    Un análisis por necesidad; devuelve {índice de producto: resultado}
+    needs: salida de group_needs (o un subconjunto)
+    """
+    resultados = analyzer.analyze([(codigo, text) for codigo, text, _ in needs])
+    by_product = {}
+    for codigo, _, indexes in needs:
+        for index in indexes:
+            by_product[index] = dict(resultados[codigo])
+    return by_product
+
+
+def need_scores(ranker, needs):
+    """
+    Puntuación local de cada necesidad (texto completo), como Series indexada por código NIC
+    """
+    return pd.Series({codigo: ranker.score_text(text) for codigo, text, _ in needs}, dtype='float64')
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compactación de releases OCDS para los prompts de Gemini.
+
+El release completo (parties, documents, awards, contratos...) multiplica
+los tokens de cada análisis sin aportar a la decisión. compact_release toma
+solo lo relevante:
+
+- tender.title y tender.description
+- comprador (buyer.name)
+- presupuesto (tender.value) y plazo (tender.tenderPeriod)
+- ítems: clasificación (CPC), descripción, cantidad y unidad
+
+y recorta el resultado a un presupuesto de tokens por elemento: primero se
+acorta la descripción y después se omiten los ítems que no caben.
+"""
+
+import ast
+import json
+
+from gemini_executor import CHARS_PER_TOKEN, estimate_tokens
+
+DEFAULT_ITEM_TOKENS = 400
+DESCRIPTION_SHARE = 0.4  # parte del presupuesto reservada para la descripción
+MIN_DESCRIPTION_TOKENS = 10  # por debajo, la descripción recortada no aporta y se omite
+MIN_ITEM_CHARS = 20
+
+
+def load_release(value):
+    """
+    Release como dict: acepta el dict, su JSON o el repr que queda al leerlo del Excel
+    """
+    if isinstance(value, dict):
+        return value
+    if not isinstance(value, str) or not value.strip():
+        return {}
+    for parse in (json.loads, ast.literal_eval):
+        try:
+            parsed = parse(value)
+        except (ValueError, SyntaxError):
+            continue
+        if isinstance(parsed, dict):
+            return parsed
+    return {}
+
+
+def _clean(text):
+    return ' '.join(str(text or '').split())
+
+
+def _truncate(text, max_tokens):
+    max_chars = max(0, int(max_tokens * CHARS_PER_TOKEN))
+    if len(text) <= max_chars:
+        return text
+    return text[:max(0, max_chars - 1)].rstrip() + '…'
+
+
+def _item_line(item):
+    classification = item.get('classification') or {}
+    cpc = _clean(classification.get('id'))
+    descripcion = _clean(item.get('description') or classification.get('description'))
+    cantidad = item.get('quantity')
+    unidad = _clean((item.get('unit') or {}).get('name'))
+    line = f"{cpc} {descripcion}".strip()
+    if cantidad not in (None, ''):
+        line += f" ({cantidad} {unidad})".replace(' )', ')')
+    return line
+
+
+def compact_release(release, max_tokens=DEFAULT_ITEM_TOKENS):
+    """
+    Texto compacto de un release OCDS dentro de max_tokens (estimados)
+    """
+    release = load_release(release)
+    tender = release.get('tender') or {}
+
+    cabecera = []
+    title = _clean(tender.get('title') or release.get('title'))
+    if title:
+        cabecera.append(f"Título: {title}")
+    buyer = _clean((release.get('buyer') or {}).get('name') or release.get('buyerName'))
+    if buyer:
+        cabecera.append(f"Comprador: {buyer}")
+    value = tender.get('value') or {}
+    if value.get('amount') not in (None, ''):
+        cabecera.append(f"Presupuesto: {value.get('amount')} {value.get('currency') or ''}".strip())
+    period = tender.get('tenderPeriod') or {}
+    if period.get('startDate') or period.get('endDate'):
+        cabecera.append(f"Plazo: {period.get('startDate') or '?'} → {period.get('endDate') or '?'}")
+
+    text = _truncate(' | '.join(cabecera), max_tokens)
+
+    description = _clean(tender.get('description') or release.get('description'))
+    if description and description != title:
+        prefix = ' | Descripción: ' if text else 'Descripción: '
+        available = max_tokens - estimate_tokens(text + prefix)
+        budget = int(available * DESCRIPTION_SHARE)
+        if budget >= MIN_DESCRIPTION_TOKENS:
+            text += prefix + _truncate(description, budget)
+
+    # Ítems distintos, mientras quepan en el presupuesto (contando separadores y el aviso final)
+    lines = list(dict.fromkeys(_item_line(item) for item in tender.get('items') or []))
+    lines = [line for line in lines if line]
+    if lines:
+        prefix = (' | ' if text else '') + f"Ítems ({len(lines)}): "
+        suffix = f"; … y {len(lines)} ítems más"
+        listed = []
+        used = len(text) + len(prefix)
+        for position, line in enumerate(lines):
+            separator = '; ' if listed else ''
+            tail = len(suffix) if position < len(lines) - 1 else 0
+            available = max_tokens * CHARS_PER_TOKEN - used - len(separator) - tail
+            if len(line) > available:
+                if not listed and available >= MIN_ITEM_CHARS:
+                    listed.append(_truncate(line, available / CHARS_PER_TOKEN))
+                break
+            listed.append(line)
+            used += len(separator) + len(line)
+        if listed:
+            text += prefix + '; '.join(listed)
+            omitted = len(lines) - len(listed)
+            if omitted:
+                text += f"; … y {omitted} ítems más"
+    return text
+
+
+def release_size(release):
+    """
+    Tokens estimados del release completo serializado (lo que se enviaba antes)
+    """
+    return estimate_tokens(json.dumps(load_release(release), ensure_ascii=False, default=str))
@@ -8,11 +8,15 @@ import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 import pandas as pd
-from datetime import datetime, timezone
+from datetime import datetime
 import os
-import time
-import json
+from concurrent.futures import ThreadPoolExecutor
 import google.generativeai as genai
+from rate_controller import get_shared_controller
+from gemini_batch import DEFAULT_BATCH_SIZE, BatchAnalyzer
+from gemini_cache import DEFAULT_CACHE_FILE, AnalysisCache
+from gemini_executor import DEFAULT_CONCURRENCY, DEFAULT_RPM, DEFAULT_TPM, GeminiExecutor, estimate_tokens
+from ocds_compactor import DEFAULT_ITEM_TOKENS, compact_release, release_size
 
 # --- CONFIGURACIÓN DE API ---
 # ¡ACCIÓN REQUERIDA! Pega aquí tu clave de API de Gemini.
@@ -85,80 +89,67 @@ KEYWORDS_HUREONSYS = {
 
 YEAR_TO_SEARCH = datetime.now().year
 
-def requests_retry_session(retries=3, backoff_factor=1, status_forcelist=(500, 502, 504, 429), session=None):
+def requests_retry_session(retries=3, backoff_factor=1, status_forcelist=(), session=None, pool_size=10):
+    # Los 429/5xx los reintenta el controlador adaptativo (rate_controller), que además
+    # reduce la concurrencia; aquí solo quedan los reintentos de conexión.
+    # pool_size debe cubrir los hilos que comparten la sesión, o urllib3 descarta conexiones
     session = session or requests.Session()
     retry = Retry(
         total=retries, read=retries, connect=retries,
         backoff_factor=backoff_factor, status_forcelist=status_forcelist,
     )
-    adapter = HTTPAdapter(max_retries=retry)
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=pool_size, pool_maxsize=pool_size)
     session.mount('http://', adapter)
     session.mount('https://', adapter)
     return session
 
-def analizar_con_gemini(contrato_texto, modelo):
-    if not modelo: return {}
-    # --- PROMPT ACTUALIZADO ---
-    # Ahora le pedimos a la IA que determine y devuelva la prioridad.
-    prompt = f"""
-    Eres un Asesor Senior en Contratación Pública Ecuatoriana. Analiza el siguiente contrato del SERCOP para tu cliente HureonSys (experto en Desarrollo de Software, Ciberseguridad, y Análisis de Datos con Estadística) y determina su relevancia.
-    Contrato: "{contrato_texto}"
-    Proporciona tu análisis estrictamente en el siguiente formato JSON:
-    {{
-      "puntuacion_relevancia": [Un número del 0 al 10],
-      "prioridad": "[Asigna 'Alta' si la puntuación es >= 7, 'Media' si está entre 4 y 6, y 'Baja' si es <= 3]",
-      "motivo": "[Explicación concisa de la puntuación]",
-      "accion_recomendada": "[Postular Inmediatamente, Analizar Pliego con Detalle, Baja Prioridad, Descartar]"
-    }}
-    """
-    try:
-        response = modelo.generate_content(prompt, request_options={"timeout": 100})
-        cleaned_response = response.text.strip().replace("```json", "").replace("```", "")
-        return json.loads(cleaned_response)
-    except Exception as e:
-        print(f"    ! Error al analizar con Gemini: {e}")
-        return {"puntuacion_relevancia": 0, "prioridad": "Revisar Manualmente", "motivo": str(e), "accion_recomendada": "Revisar Manualmente"}
+def enriquecer_contrato(contrato, search_keyword, session, rate_controller):
+    BASE_URL_RECORD = "https://datosabiertos.compraspublicas.gob.ec/PLATAFORMA/api/record"
+    ocid = contrato.get('ocid')
+    if not ocid: return None
+    params_record = {'ocid': ocid}
+    response_record = rate_controller.request(session, 'GET', BASE_URL_RECORD, params=params_record, timeout=30)
+    if response_record.status_code != 200: return None
+    
+    release = response_record.json().get('records', [{}])[0].get('releases', [{}])[0]
+    tender = release.get('tender', {})
+    
+    contrato.update({
+        'estado_proceso': tender.get('status', 'No disponible'),
+        'fecha_limite_postulacion': tender.get('tenderPeriod', {}).get('endDate'),
+        'presupuesto_referencial': tender.get('value', {}).get('amount'),
+        'categoria_busqueda': search_keyword,
+        'release_completo': release
+    })
+    return contrato
 
 def consultar_y_enriquecer(year, search_keyword, session):
     BASE_URL_SEARCH = "https://datosabiertos.compraspublicas.gob.ec/PLATAFORMA/api/search_ocds"
-    BASE_URL_RECORD = "https://datosabiertos.compraspublicas.gob.ec/PLATAFORMA/api/record"
     params_search = {'year': year, 'search': search_keyword, 'page': 1}
+    rate_controller = get_shared_controller()
     
     print(f"  > Buscando '{search_keyword}'...")
     try:
-        response = session.get(BASE_URL_SEARCH, params=params_search, timeout=30)
+        response = rate_controller.request(session, 'GET', BASE_URL_SEARCH, params=params_search, timeout=30)
         response.raise_for_status()
         oportunidades_encontradas = response.json().get('data', [])
         
-        oportunidades_enriquecidas = []
         print(f"  > Enriqueciendo {len(oportunidades_encontradas)} contratos...")
-        for contrato in oportunidades_encontradas:
-            ocid = contrato.get('ocid')
-            if not ocid: continue
-            time.sleep(0.5)
-            params_record = {'ocid': ocid}
-            response_record = session.get(BASE_URL_RECORD, params=params_record, timeout=30)
-            if response_record.status_code != 200: continue
-            
-            release = response_record.json().get('records', [{}])[0].get('releases', [{}])[0]
-            tender = release.get('tender', {})
-            
-            contrato.update({
-                'estado_proceso': tender.get('status', 'No disponible'),
-                'fecha_limite_postulacion': tender.get('tenderPeriod', {}).get('endDate'),
-                'presupuesto_referencial': tender.get('value', {}).get('amount'),
-                'categoria_busqueda': search_keyword,
-                'release_completo': release
-            })
-            oportunidades_enriquecidas.append(contrato)
-        return oportunidades_enriquecidas
+        # El controlador decide cuántas peticiones van en paralelo (sin pausas fijas)
+        with ThreadPoolExecutor(max_workers=rate_controller.max_limit) as executor:
+            resultados = list(executor.map(
+                lambda contrato: enriquecer_contrato(contrato, search_keyword, session, rate_controller),
+                oportunidades_encontradas
+            ))
+        return [contrato for contrato in resultados if contrato is not None]
     except Exception as e:
         print(f"  ! Error grave al consultar para '{search_keyword}': {e}")
         return []
 
 # --- BLOQUE PRINCIPAL DE EJECUCIÓN ---
 if __name__ == "__main__":
-    session = requests_retry_session()
+    # Un hilo de enriquecimiento por cupo del controlador, todos sobre esta sesión
+    session = requests_retry_session(pool_size=get_shared_controller().max_limit)
     script_dir = os.path.dirname(os.path.abspath(__file__))
     full_path = os.path.join(script_dir, EXCEL_FILENAME)
     
@@ -180,6 +171,8 @@ if __name__ == "__main__":
             if results:
                 nuevos_resultados.extend(results)
 
+    get_shared_controller().print_stats()
+
     if not nuevos_resultados and df_historico.empty:
         print("\n--- PROCESO FINALIZADO: Sin datos nuevos ni historial. ---")
     else:
@@ -190,17 +183,54 @@ if __name__ == "__main__":
         
         if MODELO_IA:
             print(f"\n--- INICIANDO ANÁLISIS CON GEMINI ---")
-            for index, row in df_consolidado.iterrows():
-                if pd.isna(row.get('Puntuación IA')):
-                    print(f"  > Analizando OCID: {row.get('ocid', 'N/A')}...")
-                    resultado_ia = analizar_con_gemini(row.get('release_completo'), MODELO_IA)
-                    # --- LÓGICA ACTUALIZADA ---
-                    # Ahora llenamos también la prioridad con la respuesta de la IA
-                    df_consolidado.loc[index, 'Puntuación IA'] = resultado_ia.get('puntuacion_relevancia')
-                    df_consolidado.loc[index, 'Prioridad'] = resultado_ia.get('prioridad') # <--- NUEVO
-                    df_consolidado.loc[index, 'Motivo IA'] = resultado_ia.get('motivo')
-                    df_consolidado.loc[index, 'Acción IA'] = resultado_ia.get('accion_recomendada')
-                    time.sleep(4.1)
+            # Varios OCIDs por llamada; solo se reintentan las respuestas que faltan o llegan mal formadas
+            df_consolidado.reset_index(drop=True, inplace=True)
+            if 'Puntuación IA' in df_consolidado.columns:
+                pendientes = df_consolidado[df_consolidado['Puntuación IA'].isna()]
+            else:
+                pendientes = df_consolidado
+            # Caché compartida con extract_table_data_pagination_with_codigo.py
+            cache = None
+            if os.getenv("GEMINI_CACHE", "1") == "1":
+                cache = AnalysisCache(
+                    os.getenv("GEMINI_CACHE_FILE", DEFAULT_CACHE_FILE),
+                    ttl_days=float(os.getenv("GEMINI_CACHE_TTL_DAYS", "90")),
+                    max_entries=int(os.getenv("GEMINI_CACHE_MAX_ENTRIES", "200000"))
+                )
+                cache.evict()
+            # Cuotas RPM/TPM con varias llamadas en vuelo en lugar de time.sleep(4.1)
+            executor = GeminiExecutor(
+                MODELO_IA,
+                rpm=int(os.getenv("GEMINI_RPM", str(DEFAULT_RPM))),
+                tpm=int(os.getenv("GEMINI_TPM", str(DEFAULT_TPM))),
+                max_concurrency=int(os.getenv("GEMINI_CONCURRENCY", str(DEFAULT_CONCURRENCY)))
+            )
+            analyzer = BatchAnalyzer(MODELO_IA, batch_size=int(os.getenv("GEMINI_BATCH_SIZE", str(DEFAULT_BATCH_SIZE))),
+                                     cache=cache, executor=executor)
+            # Solo los campos relevantes del release, recortados a un presupuesto de tokens por OCID
+            item_tokens = int(os.getenv("OCDS_ITEM_TOKENS", str(DEFAULT_ITEM_TOKENS)))
+            textos = [
+                (index, compact_release(row.get('release_completo'), max_tokens=item_tokens))
+                for index, row in pendientes.iterrows()
+            ]
+            if textos:
+                tokens_completos = sum(release_size(row.get('release_completo')) for _, row in pendientes.iterrows())
+                tokens_compactos = sum(estimate_tokens(texto) for _, texto in textos)
+                print(f"[INFO] Releases compactados: ~{tokens_completos} -> ~{tokens_compactos} tokens "
+                      f"({tokens_compactos / max(tokens_completos, 1):.0%})")
+            resultados = analyzer.analyze(textos)
+            for index, resultado_ia in resultados.items():
+                df_consolidado.loc[index, 'Puntuación IA'] = resultado_ia.get('puntuacion_relevancia')
+                df_consolidado.loc[index, 'Prioridad'] = resultado_ia.get('prioridad')
+                df_consolidado.loc[index, 'Motivo IA'] = resultado_ia.get('motivo')
+                df_consolidado.loc[index, 'Acción IA'] = resultado_ia.get('accion_recomendada')
+            analyzer.print_stats()
+            executor.print_stats()
+            if os.getenv("GEMINI_CALL_LOG"):
+                registradas = executor.save_call_log(os.getenv("GEMINI_CALL_LOG"))
+                print(f"[OK] Tokens por llamada ({registradas}) en {os.getenv('GEMINI_CALL_LOG')}")
+            if cache is not None:
+                cache.print_stats()
         
         print("\n--- PROCESANDO Y GENERANDO REPORTE ESTRATÉGICO ---")
         df_consolidado['fecha_limite_postulacion'] = pd.to_datetime(df_consolidado['fecha_limite_postulacion'], errors='coerce', utc=True)
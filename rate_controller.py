@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Control adaptativo de concurrencia (AIMD) para las peticiones a compraspublicas.gob.ec.
+
+Sustituye los time.sleep fijos y los reintentos con backoff constante: cada
+petición ocupa un cupo del controlador y, al terminar, informa su latencia y
+su código HTTP. Mientras las respuestas son sanas el límite sube de forma
+aditiva (+1 por cada ventana de "límite" respuestas); ante un 429, un 5xx, un
+error de conexión o un pico de latencia baja de forma multiplicativa. El
+listado, los detalles y la API OCDS comparten el mismo controlador.
+"""
+
+import bisect
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import requests
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Límites superiores (ms) de los buckets del histograma de latencia
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+RATE_WINDOW = 60.0  # segundos usados para calcular peticiones/s
+
+
+class AdaptiveRateController:
+    """
+    Limitador de concurrencia AIMD con estadísticas de tasa y latencia
+    """
+
+    def __init__(self, initial_limit=4, min_limit=1, max_limit=16, decrease_factor=0.5,
+                 latency_spike_factor=3.0, latency_ceiling=20.0, warmup_samples=10,
+                 max_retries=3, backoff_base=1.0, retry_statuses=RETRY_STATUSES):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.decrease_factor = decrease_factor
+        self.latency_spike_factor = latency_spike_factor
+        self.latency_ceiling = latency_ceiling
+        self.warmup_samples = warmup_samples
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.retry_statuses = tuple(retry_statuses)
+
+        self._cond = threading.Condition()
+        self._limit = float(min(max(initial_limit, self.min_limit), self.max_limit))
+        self._in_flight = 0
+        self._pause_until = 0.0
+        self._last_decrease = 0.0
+        self._baseline = None
+        self._samples = 0
+        self._completed = deque()
+        self._histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self._counts = {'ok': 0, 'throttled': 0, 'server_error': 0, 'connection_error': 0,
+                        'latency_spike': 0, 'increases': 0, 'decreases': 0}
+
+    @property
+    def limit(self):
+        """
+        Número de peticiones simultáneas permitidas ahora mismo
+        """
+        with self._cond:
+            return max(self.min_limit, int(self._limit))
+
+    def acquire(self):
+        """
+        Espera un cupo libre (y el fin de cualquier pausa por Retry-After); devuelve el instante de inicio
+        """
+        with self._cond:
+            while True:
+                wait = self._pause_until - time.monotonic()
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+                if self._in_flight < max(self.min_limit, int(self._limit)):
+                    self._in_flight += 1
+                    return time.monotonic()
+                self._cond.wait()
+
+    def release(self):
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self):
+        started = self.acquire()
+        try:
+            yield started
+        finally:
+            self.release()
+
+    def record(self, started, latency, status=None, error=None):
+        """
+        Registra el resultado de una petición y ajusta el límite
+        """
+        now = time.monotonic()
+        with self._cond:
+            self._histogram[bisect.bisect_left(LATENCY_BUCKETS_MS, latency * 1000)] += 1
+            self._completed.append(now)
+            while self._completed and self._completed[0] < now - RATE_WINDOW:
+                self._completed.popleft()
+
+            if error is not None:
+                reason = 'connection_error'
+            elif status == 429:
+                reason = 'throttled'
+            elif status is not None and status in self.retry_statuses:
+                reason = 'server_error'
+            elif self._is_latency_spike(latency):
+                reason = 'latency_spike'
+            else:
+                reason = 'ok'
+            self._counts[reason] += 1
+
+            if reason == 'ok':
+                self._samples += 1
+                self._baseline = latency if self._baseline is None else 0.9 * self._baseline + 0.1 * latency
+                if self._limit < self.max_limit:
+                    self._limit = min(self.max_limit, self._limit + 1.0 / max(1.0, self._limit))
+                    self._counts['increases'] += 1
+            elif started >= self._last_decrease:
+                # Un solo recorte por ventana: las peticiones que ya estaban en vuelo
+                # cuando se recortó no vuelven a recortar
+                self._limit = max(float(self.min_limit), self._limit * self.decrease_factor)
+                self._last_decrease = now
+                self._counts['decreases'] += 1
+            self._cond.notify_all()
+        return reason
+
+    def _is_latency_spike(self, latency):
+        if self.latency_ceiling is not None and latency > self.latency_ceiling:
+            return True
+        if self._baseline is None or self._samples < self.warmup_samples:
+            return False
+        return latency > self._baseline * self.latency_spike_factor
+
+    def pause(self, seconds):
+        """
+        Detiene el inicio de nuevas peticiones durante seconds (p. ej. Retry-After)
+        """
+        with self._cond:
+            self._pause_until = max(self._pause_until, time.monotonic() + seconds)
+            self._cond.notify_all()
+
+    def _backoff(self, attempt, response=None):
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        return self.backoff_base * (2 ** attempt) * (0.5 + random.random() / 2)
+
+    def request(self, session, method, url, **kwargs):
+        """
+        session.request(method, url) dentro de un cupo, con reintentos ante 429/5xx
+        y errores de conexión; devuelve la última respuesta
+        """
+        for attempt in range(self.max_retries + 1):
+            with self.slot() as started:
+                try:
+                    response = session.request(method, url, **kwargs)
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    self.record(started, time.monotonic() - started, error=e)
+                    if attempt >= self.max_retries:
+                        raise
+                    self.pause(self._backoff(attempt))
+                    continue
+                self.record(started, time.monotonic() - started, status=response.status_code)
+
+            if response.status_code not in self.retry_statuses or attempt >= self.max_retries:
+                return response
+            delay = self._backoff(attempt, response)
+            # La respuesta descartada libera su conexión para el reintento
+            response.close()
+            self.pause(delay)
+        return response
+
+    def current_rate(self):
+        """
+        Peticiones completadas por segundo en la última ventana
+        """
+        now = time.monotonic()
+        with self._cond:
+            recent = [t for t in self._completed if t >= now - RATE_WINDOW]
+        if len(recent) < 2:
+            return float(len(recent))
+        return len(recent) / max(1.0, min(RATE_WINDOW, now - recent[0]))
+
+    def latency_histogram(self):
+        """
+        {'<=50ms': n, ..., '>30000ms': n}
+        """
+        with self._cond:
+            counts = list(self._histogram)
+        labels = [f"<={b}ms" for b in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        return dict(zip(labels, counts))
+
+    def get_stats(self):
+        with self._cond:
+            stats = dict(self._counts)
+            stats['limit'] = max(self.min_limit, int(self._limit))
+            stats['in_flight'] = self._in_flight
+            stats['baseline_latency'] = self._baseline
+        stats['rate'] = self.current_rate()
+        stats['latency_histogram'] = self.latency_histogram()
+        return stats
+
+    def print_stats(self):
+        """
+        Muestra el estado del controlador
+        """
+        stats = self.get_stats()
+        total = sum(stats['latency_histogram'].values())
+        if not total:
+            return
+        baseline = stats['baseline_latency']
+        print("\n[INFO] Control de tasa (AIMD):")
+        print(f"   • Límite actual: {stats['limit']} simultáneas, {stats['rate']:.2f} req/s")
+        print(f"   • Latencia base: {baseline:.3f}s" if baseline is not None else "   • Latencia base: n/d")
+        print(f"   • OK: {stats['ok']}, 429: {stats['throttled']}, 5xx: {stats['server_error']}, "
+              f"conexión: {stats['connection_error']}, picos: {stats['latency_spike']}, "
+              f"recortes: {stats['decreases']}")
+        print("   • Histograma de latencia: " + ", ".join(
+            f"{label}: {count}" for label, count in stats['latency_histogram'].items() if count
+        ))
+
+
+_shared_lock = threading.Lock()
+_shared_controller = None
+
+
+def configure_shared_controller(**kwargs):
+    """
+    Reemplaza el controlador compartido (llamar antes de empezar a descargar)
+    """
+    global _shared_controller
+    with _shared_lock:
+        _shared_controller = AdaptiveRateController(**kwargs)
+        return _shared_controller
+
+
+def get_shared_controller():
+    """
+    Controlador compartido por el listado, los detalles y la API OCDS
+    """
+    global _shared_controller
+    with _shared_lock:
+        if _shared_controller is None:
+            _shared_controller = AdaptiveRateController()
+        return _shared_controller
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ranking local de relevancia (BM25) para decidir qué filas se envían a Gemini.
+
+El perfil de HureonSys (KEYWORDS_HUREONSYS) se usa como consulta y cada
+descripción de necesidad o producto como documento. Las tablas de frecuencia
+de documentos (IDF) se guardan en un JSON y se actualizan con cada ejecución,
+de modo que un término común en el SERCOP ("servicio", "adquisición") pesa
+poco y uno específico ("ciberseguridad", "software") pesa mucho.
+
+Las palabras clave de varias palabras solo puntúan cuando aparecen seguidas
+en la descripción, con el IDF sumado de sus términos. El texto se compara sin tildes ni
+mayúsculas, sin palabras vacías y con un recorte simple de plurales.
+"""
+
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_IDF_FILE = "relevance_idf.json"
+
+# Huellas de descripciones ya contadas que se guardan en el JSON (las más recientes);
+# una descripción más antigua que vuelva a aparecer se cuenta otra vez
+DEFAULT_MAX_SEEN = 100_000
+SCORE_COLUMN = 'Puntuación Local'
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+STOPWORDS = frozenset("""
+a al ante con contra de del desde e el en entre hacia hasta la las lo los o para por
+segun sin sobre su sus tras u un una unas unos y
+""".split())
+
+
+def fold(text):
+    """
+    Minúsculas y sin tildes ("Análisis" -> "analisis")
+    """
+    text = unicodedata.normalize('NFKD', str(text).lower())
+    return ''.join(char for char in text if not unicodedata.combining(char))
+
+
+def stem(token):
+    """
+    Recorte de plurales: "sistemas" -> "sistema", "soluciones" -> "solucion"
+    """
+    if len(token) > 5 and token.endswith('es') and token[-3] in 'lnrdz':
+        return token[:-2]
+    if len(token) > 3 and token.endswith('s'):
+        return token[:-1]
+    return token
+
+
+def tokenize(text):
+    return [stem(token) for token in _TOKEN_RE.findall(fold(text)) if token not in STOPWORDS]
+
+
+class RelevanceRanker:
+    """
+    BM25 de cada descripción contra el perfil de palabras clave, con IDF persistente
+    Es seguro usarlo desde varios hilos (fuente y workers de IA del modo streaming)
+    """
+
+    def __init__(self, keywords_by_category, idf_path=DEFAULT_IDF_FILE, k1=1.2, b=0.75, max_seen=DEFAULT_MAX_SEEN):
+        self.idf_path = idf_path
+        self.k1 = k1
+        self.b = b
+        self.max_seen = max_seen
+        self.documents = 0
+        self.total_length = 0
+        self.doc_freq = {}
+        # dict como conjunto ordenado por inserción, para descartar primero las huellas más antiguas
+        self._seen = {}
+        self._lock = threading.Lock()
+
+        # Términos sueltos y frases del perfil: los términos de una frase solo cuentan
+        # juntos ("sistema de gestión" no puntúa por "sistema" ni por "gestión")
+        self.query_terms = set()
+        self.phrases = set()
+        for keywords in keywords_by_category.values():
+            for keyword in keywords:
+                tokens = tuple(tokenize(keyword))
+                if len(tokens) == 1:
+                    self.query_terms.add(tokens[0])
+                elif tokens:
+                    self.phrases.add(tokens)
+        self._phrase_terms = {token for phrase in self.phrases for token in phrase}
+
+        if idf_path and os.path.exists(idf_path):
+            self.load()
+
+    def load(self):
+        with open(self.idf_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        self.documents = data.get('documents', 0)
+        self.total_length = data.get('total_length', 0)
+        self.doc_freq = data.get('doc_freq', {})
+        self._seen = dict.fromkeys(data.get('seen', [])[-self.max_seen:])
+
+    def save(self):
+        if not self.idf_path:
+            return
+        with self._lock:
+            data = {
+                'documents': self.documents,
+                'total_length': self.total_length,
+                'doc_freq': dict(self.doc_freq),
+                'seen': list(self._seen)
+            }
+        tmp_path = self.idf_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.idf_path)
+
+    def update_corpus(self, texts):
+        """
+        Añade a las tablas IDF las descripciones que aún no se habían contado
+        (el mismo texto en varias ejecuciones o filas cuenta una sola vez)
+        Devuelve cuántos documentos nuevos se añadieron
+        """
+        added = 0
+        for text in texts:
+            tokens = tokenize(text)
+            if not tokens:
+                continue
+            key = hashlib.blake2b(' '.join(tokens).encode('utf-8'), digest_size=8).hexdigest()
+            with self._lock:
+                if key in self._seen:
+                    continue
+                self._seen[key] = None
+                if len(self._seen) > self.max_seen:
+                    del self._seen[next(iter(self._seen))]
+                self.documents += 1
+                self.total_length += len(tokens)
+                for token in set(tokens):
+                    self.doc_freq[token] = self.doc_freq.get(token, 0) + 1
+            added += 1
+        return added
+
+    def idf(self, term):
+        with self._lock:
+            return self._idf(term)
+
+    def _idf(self, term):
+        df = self.doc_freq.get(term, 0)
+        return math.log(1 + (self.documents - df + 0.5) / (df + 0.5))
+
+    def score_text(self, text):
+        """
+        BM25 de una descripción contra el perfil (términos sueltos y frases)
+        """
+        tokens = tokenize(text)
+        if not tokens:
+            return 0.0
+        with self._lock:
+            avgdl = self.total_length / self.documents if self.documents else len(tokens)
+            idf = {term: self._idf(term) for term in set(tokens) if term in self.query_terms or term in self._phrase_terms}
+        norm = self.k1 * (1 - self.b + self.b * len(tokens) / avgdl)
+
+        counts = {}
+        for token in tokens:
+            if token in self.query_terms:
+                counts[token] = counts.get(token, 0) + 1
+
+        # Cada frase del perfil es un término más, con el IDF sumado de sus palabras
+        joined = ' ' + ' '.join(tokens) + ' '
+        for phrase in self.phrases:
+            tf = joined.count(' ' + ' '.join(phrase) + ' ')
+            if tf:
+                counts[phrase] = tf
+
+        score = 0.0
+        for term, tf in counts.items():
+            term_idf = sum(idf[t] for t in term) if isinstance(term, tuple) else idf[term]
+            score += term_idf * tf * (self.k1 + 1) / (tf + norm)
+        return round(score, 4)
+
+    def score(self, descriptions):
+        """
+        Series de puntuaciones alineada con descriptions (cada texto distinto se puntúa una vez)
+        """
+        codes, uniques = pd.factorize(descriptions.fillna('').astype(str))
+        scores = pd.Series([self.score_text(text) for text in uniques], dtype='float64')
+        return pd.Series(scores.to_numpy()[codes] if len(uniques) else [], index=descriptions.index,
+                         dtype='float64', name=SCORE_COLUMN)
+
+
+def select_for_llm(scores, top_k=0, min_score=0.0):
+    """
+    Máscara de las filas que van al LLM: puntuación > 0 y >= min_score,
+    y solo las top_k mejores si top_k > 0
+    """
+    values = scores.to_numpy(dtype='float64')
+    mask = (values > 0) & (values >= min_score)
+    if top_k and mask.sum() > top_k:
+        candidates = np.flatnonzero(mask)
+        best = candidates[np.argsort(-values[candidates], kind='stable')[:top_k]]
+        mask = np.zeros(len(values), dtype=bool)
+        mask[best] = True
+    return pd.Series(mask, index=scores.index)
+
+
+def print_gate_summary(scores, mask, label="productos"):
+    selected = int(mask.sum())
+    print(f"[INFO] Ranking local: {selected} de {len(scores)} {label} se envían a Gemini "
+          f"({len(scores) - selected} omitidos)")
+    if selected:
+        print(f"   • Puntuación mínima enviada: {scores[mask].min():.2f}, máxima: {scores[mask].max():.2f}")
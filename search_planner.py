@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Planificador de búsquedas del lado del servidor a partir de KEYWORDS_HUREONSYS.
+
+En lugar de descargar todo el catálogo y filtrar localmente, cada palabra
+clave se convierte en una búsqueda del endpoint DataTables (por columna
+"Descripción del Objeto de compra" o por la búsqueda global "Descripción
+Producto:"). Las búsquedas se ejecutan en paralelo, los resultados se unen
+y deduplican por código NIC, y después el filtro local confirma cada fila.
+
+El listado solo aplica las búsquedas por columna de texto a partir de
+MIN_COLUMN_SEARCH_LENGTH caracteres, así que las palabras clave más cortas
+(p. ej. "ETL") se envían por la búsqueda global.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from sercop_listing_client import DataTablesListingClient, rows_to_dataframe
+
+# Índice de la columna objeto_contratacion en la definición de DataTables
+OBJETO_COLUMN_INDEX = 4
+
+SEARCH_FIELDS = ('objeto', 'producto')
+
+# El listado no filtra por columnas de texto con menos caracteres (ver FrmNCOListado.cpe)
+MIN_COLUMN_SEARCH_LENGTH = 5
+
+
+def query_field(keyword, search_field='objeto'):
+    """
+    Campo por el que se envía una palabra clave: las cortas no pueden ir como búsqueda por columna
+    """
+    if search_field == 'objeto' and len(keyword) < MIN_COLUMN_SEARCH_LENGTH:
+        return 'producto'
+    return search_field
+
+
+def plan_keyword_queries(keywords_by_category, search_field='objeto'):
+    """
+    Lista mínima de consultas (palabra clave, campo): una por palabra clave, descartando
+    las que contienen a otra más corta enviada por el mismo campo (su resultado ya está
+    incluido en el de esa)
+    """
+    keywords = []
+    seen = set()
+    for category_keywords in keywords_by_category.values():
+        for keyword in category_keywords:
+            normalized = keyword.strip().lower()
+            if normalized and normalized not in seen:
+                seen.add(normalized)
+                keywords.append(keyword.strip())
+
+    fields = {keyword: query_field(keyword, search_field) for keyword in keywords}
+    queries = []
+    for keyword in keywords:
+        lowered = keyword.lower()
+        covered = any(
+            other.lower() != lowered and other.lower() in lowered and fields[other] == fields[keyword]
+            for other in keywords
+        )
+        if not covered:
+            queries.append((keyword, fields[keyword]))
+    return queries
+
+
+def run_search(query, search_field='objeto', max_records=None, page_size=100):
+    """
+    Descarga todas las filas que devuelve el servidor para una consulta
+    """
+    client = DataTablesListingClient(page_size=page_size)
+    if search_field == 'producto':
+        rows = list(client.iter_rows(max_records=max_records, search=query))
+    else:
+        rows = list(client.iter_rows(max_records=max_records, column_searches={OBJETO_COLUMN_INDEX: query}))
+    return query, rows
+
+
+def search_candidates_dataframe(keywords_by_category, search_field='objeto', concurrency=4,
+                                max_records_per_query=None, page_size=100):
+    """
+    Ejecuta las consultas planificadas en paralelo y devuelve las filas candidatas
+    únicas por código NIC (en el orden del listado: código descendente)
+    """
+    if search_field not in SEARCH_FIELDS:
+        raise ValueError(f"search_field debe ser uno de {SEARCH_FIELDS}")
+
+    queries = plan_keyword_queries(keywords_by_category, search_field)
+    print(f"[INFO] Búsquedas en el servidor planificadas: {len(queries)} ({', '.join(query for query, _ in queries)})")
+    short = [query for query, field in queries if field != search_field]
+    if short:
+        print(f"[INFO] Palabras clave de menos de {MIN_COLUMN_SEARCH_LENGTH} caracteres por búsqueda global: {', '.join(short)}")
+
+    rows_by_code = {}
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        futures = [
+            executor.submit(run_search, query, field, max_records_per_query, page_size)
+            for query, field in queries
+        ]
+        for future in as_completed(futures):
+            query, rows = future.result()
+            print(f"   • '{query}': {len(rows)} filas")
+            for row in rows:
+                key = row.codigo_contratacion or row.url_detalle
+                rows_by_code.setdefault(key, row)
+
+    rows = sorted(rows_by_code.values(), key=lambda row: row.codigo_contratacion, reverse=True)
+    print(f"[OK] Candidatos únicos por código NIC: {len(rows)}")
+    return rows_to_dataframe(rows)
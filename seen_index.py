@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Índice persistente de códigos NIC ya vistos.
+
+Los códigos (p. ej. NIC-0160016000001-2025-00043) se guardan ordenados en un
+archivo de registros de ancho fijo, de modo que una búsqueda es una búsqueda
+binaria con seek sobre el disco y no hace falta cargar el índice en memoria.
+Un filtro de Bloom opcional descarta en memoria los códigos nuevos sin tocar
+el disco, lo que mantiene el coste acotado con millones de códigos.
+"""
+
+import hashlib
+import math
+import os
+
+RECORD_WIDTH = 40  # bytes por registro, incluido el salto de línea
+BLOOM_MAGIC = b'NICBLOOM2'  # cabecera del .bloom; los archivos sin ella se reconstruyen
+
+
+class BloomFilter:
+    """
+    Filtro de Bloom sobre un bytearray (doble hashing con blake2b)
+    """
+
+    def __init__(self, expected_items=1_000_000, fp_rate=0.001):
+        expected_items = max(1, expected_items)
+        self.num_bits = max(8, int(-expected_items * math.log(fp_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, int(round(self.num_bits / expected_items * math.log(2))))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, item):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def save(self, path, record_count=0):
+        """
+        Guarda el filtro junto con el número de registros del índice que cubre
+        """
+        with open(path, 'wb') as f:
+            f.write(BLOOM_MAGIC)
+            f.write(record_count.to_bytes(8, 'little'))
+            f.write(self.num_bits.to_bytes(8, 'little'))
+            f.write(self.num_hashes.to_bytes(4, 'little'))
+            f.write(self.bits)
+
+    @classmethod
+    def load(cls, path):
+        """
+        (filtro, registros del índice que cubre); (None, None) si el archivo no tiene el formato esperado
+        """
+        bloom = cls.__new__(cls)
+        with open(path, 'rb') as f:
+            if f.read(len(BLOOM_MAGIC)) != BLOOM_MAGIC:
+                return None, None
+            record_count = int.from_bytes(f.read(8), 'little')
+            bloom.num_bits = int.from_bytes(f.read(8), 'little')
+            bloom.num_hashes = int.from_bytes(f.read(4), 'little')
+            bloom.bits = bytearray(f.read())
+        if not bloom.num_bits or len(bloom.bits) != (bloom.num_bits + 7) // 8:
+            return None, None
+        return bloom, record_count
+
+
+class SeenIndex:
+    """
+    Conjunto persistente de códigos NIC: archivo ordenado de ancho fijo + Bloom opcional
+    """
+
+    def __init__(self, path="nic_seen_index.idx", use_bloom=False, expected_items=1_000_000, fp_rate=0.001):
+        self.path = path
+        self.bloom_path = path + ".bloom"
+        self.use_bloom = use_bloom
+        self.expected_items = expected_items
+        self.fp_rate = fp_rate
+        self._pending = set()
+        self._bloom = None
+        if use_bloom:
+            self._load_bloom()
+
+    # --- Archivo ordenado -------------------------------------------------
+
+    def __len__(self):
+        # Los pendientes que ya están en disco no se cuentan dos veces
+        return self._disk_count() + sum(1 for code in self._pending if not self._disk_contains(code))
+
+    def _disk_count(self):
+        try:
+            return os.path.getsize(self.path) // RECORD_WIDTH
+        except OSError:
+            return 0
+
+    @staticmethod
+    def _encode(code):
+        data = code.strip().encode('utf-8')
+        if len(data) >= RECORD_WIDTH:
+            raise ValueError(f"Código demasiado largo para el índice: {code}")
+        return data.ljust(RECORD_WIDTH - 1) + b'\n'
+
+    @staticmethod
+    def _decode(record):
+        return record[:RECORD_WIDTH - 1].rstrip().decode('utf-8')
+
+    def _disk_contains(self, code):
+        count = self._disk_count()
+        if not count:
+            return False
+        target = self._encode(code)
+        lo, hi = 0, count
+        with open(self.path, 'rb') as f:
+            while lo < hi:
+                mid = (lo + hi) // 2
+                f.seek(mid * RECORD_WIDTH)
+                record = f.read(RECORD_WIDTH)
+                if record == target:
+                    return True
+                if record < target:
+                    lo = mid + 1
+                else:
+                    hi = mid
+        return False
+
+    def iter_codes(self):
+        """
+        Recorre los códigos del disco en orden
+        """
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb') as f:
+            while True:
+                record = f.read(RECORD_WIDTH)
+                if len(record) < RECORD_WIDTH:
+                    return
+                yield self._decode(record)
+
+    # --- Bloom ------------------------------------------------------------
+
+    def _load_bloom(self):
+        """
+        Carga el .bloom si cubre exactamente los registros del índice; si no (por ejemplo,
+        una ejecución sin Bloom añadió códigos), lo reconstruye desde el archivo ordenado
+        """
+        count = self._disk_count()
+        if os.path.exists(self.bloom_path):
+            bloom, record_count = BloomFilter.load(self.bloom_path)
+            if bloom is not None and record_count == count:
+                self._bloom = bloom
+                return
+            print(f"[INFO] Filtro de Bloom desactualizado, reconstruyendo desde {self.path}")
+        self._bloom = BloomFilter(max(self.expected_items, count * 2), self.fp_rate)
+        for code in self.iter_codes():
+            self._bloom.add(code)
+        if count:
+            self._bloom.save(self.bloom_path, count)
+
+    # --- API pública ------------------------------------------------------
+
+    def __contains__(self, code):
+        if not code:
+            return False
+        code = code.strip()
+        if code in self._pending:
+            return True
+        if self._bloom is not None and code not in self._bloom:
+            return False
+        return self._disk_contains(code)
+
+    def add(self, code):
+        if code and code.strip():
+            self._pending.add(code.strip())
+
+    def update(self, codes):
+        for code in codes:
+            self.add(code)
+
+    def flush(self):
+        """
+        Fusiona los códigos pendientes con el archivo ordenado (sin cargarlo entero en memoria)
+        """
+        if not self._pending:
+            return 0
+        new_codes = sorted(self._encode(code) for code in self._pending)
+        tmp_path = self.path + ".tmp"
+        added = 0
+
+        with open(tmp_path, 'wb') as out:
+            existing = self._iter_records()
+            current = next(existing, None)
+            for record in new_codes:
+                while current is not None and current < record:
+                    out.write(current)
+                    current = next(existing, None)
+                if current == record:
+                    continue
+                out.write(record)
+                added += 1
+            while current is not None:
+                out.write(current)
+                current = next(existing, None)
+
+        os.replace(tmp_path, self.path)
+        if self._bloom is not None:
+            for code in self._pending:
+                self._bloom.add(code)
+            self._bloom.save(self.bloom_path, self._disk_count())
+        self._pending.clear()
+        return added
+
+    def _iter_records(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb') as f:
+            while True:
+                record = f.read(RECORD_WIDTH)
+                if len(record) < RECORD_WIDTH:
+                    return
+                yield record
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Crawler asíncrono del listado NCO con paralelismo acotado.
+
+Pide muchos bloques de NCORetornaRegistros.cpe a la vez (límite global de
+concurrencia y límite por host) y arma el mismo DataFrame que
+extract_all_pages_data. El tiempo total depende de la concurrencia y de la
+latencia del servidor, no del número de páginas.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from sercop_listing_client import (
+    DataTablesListingClient,
+    ListingRow,
+    RECORDS_URL,
+    create_session,
+    dedupe_rows,
+    parse_record,
+    rows_to_dataframe
+)
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_PER_HOST_LIMIT = 4
+
+
+class AsyncListingCrawler:
+    """
+    Descarga bloques del listado en paralelo sobre un pool de hilos HTTP
+    """
+
+    def __init__(self, concurrency=DEFAULT_CONCURRENCY, per_host_limit=DEFAULT_PER_HOST_LIMIT,
+                 page_size=100, timeout=30):
+        self.concurrency = max(1, concurrency)
+        self.per_host_limit = max(1, per_host_limit)
+        self.page_size = page_size
+        self.timeout = timeout
+        self._bootstrap_client = DataTablesListingClient(page_size=page_size, timeout=timeout)
+        self._local = threading.local()
+        self._host_semaphores = {}
+
+    def _client(self):
+        """
+        Cliente propio de cada hilo, con las cookies de la sesión inicial
+        """
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            session = create_session(pool_size=2)
+            session.cookies.update(self._bootstrap_client.session.cookies)
+            client = DataTablesListingClient(session=session, page_size=self.page_size, timeout=self.timeout)
+            client._bootstrapped = True
+            self._local.client = client
+        return client
+
+    def _host_semaphore(self, url):
+        host = urlparse(url).netloc
+        if host not in self._host_semaphores:
+            self._host_semaphores[host] = asyncio.Semaphore(self.per_host_limit)
+        return self._host_semaphores[host]
+
+    async def _fetch(self, loop, executor, global_sem, start, length, search, column_searches):
+        async with global_sem:
+            async with self._host_semaphore(RECORDS_URL):
+                payload = await loop.run_in_executor(
+                    executor,
+                    lambda: self._client().fetch_page(start, length, search=search, column_searches=column_searches)
+                )
+        return start, payload
+
+    async def crawl(self, max_records=None, search="", column_searches=None, journal=None):
+        """
+        Descarga todo el listado (o hasta max_records) y devuelve las filas en orden
+        Con journal (CheckpointJournal) cada bloque se guarda al terminar y los ya
+        guardados no se vuelven a pedir
+        """
+        loop = asyncio.get_running_loop()
+        global_sem = asyncio.Semaphore(self.concurrency)
+        completed = journal.completed_pages() if journal is not None else {}
+        blocks = {}
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            # Cookie de sesión compartida por los clientes de cada hilo
+            await loop.run_in_executor(executor, self._bootstrap_client.bootstrap)
+
+            # El primer bloque se pide siempre: fija el total y valida el diario
+            first_length = self.page_size if max_records is None else min(self.page_size, max_records)
+            first = await loop.run_in_executor(
+                executor,
+                lambda: self._bootstrap_client.fetch_page(0, first_length, search=search, column_searches=column_searches)
+            )
+            total = DataTablesListingClient.total_from_payload(first)
+            if journal is not None:
+                journal.reconcile_total(total)
+                completed = journal.completed_pages()
+            blocks[0] = self._rows_from_payload(0, total, first, journal)
+            if max_records is not None:
+                total = min(total, max_records)
+            print(f"[INFO] Registros a descargar: {total} (concurrencia {self.concurrency}, por host {self.per_host_limit})")
+
+            tasks = []
+            for start in range(first_length, total, self.page_size):
+                if start in completed:
+                    blocks[start] = [ListingRow(*row) for row in completed[start][1]]
+                    continue
+                length = min(self.page_size, total - start)
+                tasks.append(self._fetch(loop, executor, global_sem, start, length, search, column_searches))
+
+            for future in asyncio.as_completed(tasks):
+                start, payload = await future
+                blocks[start] = self._rows_from_payload(start, total, payload, journal)
+
+        rows = []
+        for start in sorted(blocks):
+            rows.extend(blocks[start])
+        rows = list(dedupe_rows(rows))
+        if max_records is not None:
+            rows = rows[:max_records]
+        return rows
+
+    @staticmethod
+    def _rows_from_payload(start, total, payload, journal):
+        rows = [parse_record(r) for r in DataTablesListingClient.records_from_payload(payload)]
+        if journal is not None and rows:
+            journal.record_page(start, total, [row.to_list() for row in rows])
+        return rows
+
+
+def crawl_listing_dataframe(max_records=None, concurrency=DEFAULT_CONCURRENCY,
+                            per_host_limit=DEFAULT_PER_HOST_LIMIT, page_size=100,
+                            search="", column_searches=None, journal=None):
+    """
+    Punto de entrada síncrono: descarga el listado en paralelo y devuelve el DataFrame
+    """
+    crawler = AsyncListingCrawler(concurrency=concurrency, per_host_limit=per_host_limit, page_size=page_size)
+    rows = asyncio.run(crawler.crawl(max_records=max_records, search=search,
+                                     column_searches=column_searches, journal=journal))
+    print(f"[OK] Registros descargados en paralelo: {len(rows)}")
+    return rows_to_dataframe(rows)
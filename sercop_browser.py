@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Configuración de Chrome y pool de navegadores compartido entre etapas.
+
+El pool arranca hasta N navegadores headless una sola vez, los presta a las
+etapas del pipeline (listado, detalle), recicla cada uno tras un número
+configurable de páginas para acotar el consumo de memoria y reemplaza de
+forma transparente los que se cuelgan o mueren.
+
+El modo "lean" bloquea imágenes, CSS, fuentes y analítica mediante el
+protocolo DevTools y usa un perfil persistente (con su caché de disco) por
+cada plaza del pool, de modo que cada carga queda acotada al HTML y a las
+peticiones XHR.
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+
+# Directorio persistente para perfiles de Chrome y la ruta cacheada de chromedriver
+BROWSER_CACHE_DIR = os.getenv(
+    "SERCOP_BROWSER_CACHE",
+    os.path.join(os.path.expanduser("~"), ".cache", "sercop_scraper")
+)
+CHROMEDRIVER_PATH_FILE = os.path.join(BROWSER_CACHE_DIR, "chromedriver_path.txt")
+
+# Recursos que no hacen falta para leer el listado ni el detalle
+LEAN_BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.svg", "*.ico", "*.webp",
+    "*.css", "*/css?*", "*/css2?*",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*fonts.googleapis.com*", "*fonts.gstatic.com*",
+    "*googletagmanager.com*", "*google-analytics.com*",
+]
+
+_chromedriver_path = None
+_chromedriver_lock = threading.Lock()
+
+
+def get_chromedriver_path():
+    """
+    Resuelve la ruta de chromedriver una sola vez, reutilizando la guardada en disco
+    """
+    global _chromedriver_path
+    with _chromedriver_lock:
+        if _chromedriver_path and os.path.exists(_chromedriver_path):
+            return _chromedriver_path
+
+        try:
+            with open(CHROMEDRIVER_PATH_FILE, 'r', encoding='utf-8') as f:
+                cached = f.read().strip()
+            if cached and os.path.exists(cached):
+                _chromedriver_path = cached
+                return _chromedriver_path
+        except OSError:
+            pass
+
+        _chromedriver_path = ChromeDriverManager().install()
+        try:
+            os.makedirs(BROWSER_CACHE_DIR, exist_ok=True)
+            with open(CHROMEDRIVER_PATH_FILE, 'w', encoding='utf-8') as f:
+                f.write(_chromedriver_path)
+        except OSError as e:
+            print(f"[INFO] No se pudo guardar la ruta de chromedriver: {e}")
+        return _chromedriver_path
+
+
+def get_profile_dir(profile_slot=0):
+    """
+    Perfil persistente de Chrome para una plaza del pool (Chrome bloquea un perfil por proceso)
+    """
+    return os.path.join(BROWSER_CACHE_DIR, "profiles", f"profile-{profile_slot}")
+
+
+def enable_resource_blocking(driver, patterns=None):
+    """
+    Bloquea imágenes, CSS, fuentes y analítica con Network.setBlockedURLs
+    """
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns or LEAN_BLOCKED_URLS})
+        return True
+    except Exception as e:
+        print(f"[INFO] No se pudo activar el bloqueo de recursos: {e}")
+        return False
+
+
+def setup_driver(lean=False, profile_slot=0):
+    """
+    Setup Chrome driver with options
+    In lean mode static assets are blocked and a persistent profile/disk cache is used
+    """
+    chrome_options = Options()
+    chrome_options.add_argument("--headless")  # Run in background
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--window-size=1920,1080")
+    chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
+
+    if lean:
+        profile_dir = get_profile_dir(profile_slot)
+        os.makedirs(profile_dir, exist_ok=True)
+        chrome_options.add_argument(f"--user-data-dir={profile_dir}")
+        chrome_options.add_argument(f"--disk-cache-dir={os.path.join(profile_dir, 'cache')}")
+        chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+        chrome_options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.managed_default_content_settings.fonts": 2,
+        })
+
+    service = Service(get_chromedriver_path())
+    driver = webdriver.Chrome(service=service, options=chrome_options)
+
+    if lean:
+        enable_resource_blocking(driver)
+    return driver
+
+
+def is_driver_alive(driver):
+    """
+    Comprueba que la sesión de WebDriver siga respondiendo
+    """
+    if driver is None:
+        return False
+    try:
+        driver.execute_script("return 1")
+        return True
+    except Exception:
+        return False
+
+
+def _quit_quietly(driver):
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+
+class _PooledDriver:
+    """
+    Navegador del pool con su contador de páginas servidas
+    """
+
+    def __init__(self, driver, slot):
+        self.driver = driver
+        self.slot = slot
+        self.pages = 0
+
+
+class DriverPool:
+    """
+    Pool de navegadores Chrome reutilizables y auto-reparables
+    """
+
+    def __init__(self, size=1, max_pages_per_driver=100, driver_factory=setup_driver, lean=False):
+        self.size = max(1, size)
+        self.max_pages_per_driver = max_pages_per_driver
+        self.driver_factory = driver_factory
+        self.lean = lean
+        self._idle = []
+        self._free_slots = list(range(self.size - 1, -1, -1))
+        self._created = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def start(self):
+        """
+        Arranca los N navegadores por adelantado (opcional; si no, se crean bajo demanda)
+        """
+        spawned = []
+        with self._cond:
+            missing = self.size - self._created
+            self._created += missing
+            slots = [self._free_slots.pop() for _ in range(missing)]
+        for slot in slots:
+            spawned.append(self._spawn(slot))
+        with self._cond:
+            self._idle.extend(spawned)
+            self._cond.notify_all()
+        print(f"[OK] Pool de navegadores iniciado: {self.size} instancias")
+        return self
+
+    def _spawn(self, slot):
+        try:
+            return _PooledDriver(self.driver_factory(lean=self.lean, profile_slot=slot), slot)
+        except Exception:
+            with self._cond:
+                self._created -= 1
+                self._free_slots.append(slot)
+                self._cond.notify()
+            raise
+
+    def _release(self, pooled):
+        _quit_quietly(pooled.driver)
+        with self._cond:
+            self._created -= 1
+            self._free_slots.append(pooled.slot)
+            self._cond.notify()
+
+    def _checkout(self):
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("El pool de navegadores está cerrado")
+                if self._idle:
+                    pooled = self._idle.pop()
+                    break
+                if self._created < self.size:
+                    self._created += 1
+                    slot = self._free_slots.pop()
+                    pooled = None
+                    break
+                self._cond.wait()
+
+        if pooled is None:
+            return self._spawn(slot)
+        if not is_driver_alive(pooled.driver):
+            print("[INFO] Navegador caído, reemplazándolo...")
+            _quit_quietly(pooled.driver)
+            return self._spawn(pooled.slot)
+        return pooled
+
+    def _checkin(self, pooled):
+        pooled.pages += 1
+        recycle = self.max_pages_per_driver and pooled.pages >= self.max_pages_per_driver
+        if recycle or not is_driver_alive(pooled.driver):
+            if recycle:
+                print(f"[INFO] Reciclando navegador tras {pooled.pages} páginas")
+            self._release(pooled)
+            return
+
+        with self._cond:
+            closed = self._closed
+            if not closed:
+                self._idle.append(pooled)
+                self._cond.notify()
+        if closed:
+            self._release(pooled)
+
+    @contextmanager
+    def acquire(self):
+        """
+        Presta un navegador vivo; al devolverlo cuenta una página y lo recicla si toca
+        """
+        pooled = self._checkout()
+        try:
+            yield pooled.driver
+        finally:
+            self._checkin(pooled)
+
+    def run(self, func, *args, retries=1, **kwargs):
+        """
+        Ejecuta func(driver, ...) con un navegador del pool y lo reintenta en otro
+        si el navegador murió durante la llamada
+        """
+        for attempt in range(retries + 1):
+            with self.acquire() as driver:
+                try:
+                    result = func(driver, *args, **kwargs)
+                except WebDriverException:
+                    if attempt < retries and not is_driver_alive(driver):
+                        print("[INFO] El navegador murió durante la tarea, reintentando...")
+                        continue
+                    raise
+                if attempt < retries and not is_driver_alive(driver):
+                    print("[INFO] El navegador murió durante la tarea, reintentando...")
+                    continue
+                return result
+        return None
+
+    def close(self):
+        """
+        Cierra todos los navegadores inactivos del pool
+        """
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for pooled in idle:
+            self._release(pooled)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Descarga de páginas de detalle NCO por HTTP.
+
+NCORegistroDetalle.cpe?...&op=0 se renderiza en el servidor, así que no hace
+falta un navegador por cada registro: se usa una requests.Session con
+keep-alive y gzip. Si el sitio exige una cookie de sesión, se obtiene una
+sola vez con Selenium y se traspasa a la sesión HTTP.
+"""
+
+import re
+from dataclasses import dataclass, field
+
+from lxml import etree, html as lxml_html
+
+from rate_controller import get_shared_controller
+from sercop_listing_client import LISTING_URL, create_session
+
+SITE_ROOT = "https://www.compraspublicas.gob.ec"
+COMPRAS_BASE_URL = "https://www.compraspublicas.gob.ec/ProcesoContratacion/compras/"
+
+HTML_HEADERS = {
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Referer': LISTING_URL,
+}
+
+
+def resolve_detail_url(detail_url):
+    """
+    Convierte la URL de detalle del listado (relativa o absoluta) en URL absoluta
+    """
+    if detail_url.startswith('../'):
+        return COMPRAS_BASE_URL + detail_url[3:]  # Remove '../' prefix
+    if detail_url.startswith('/'):
+        return SITE_ROOT + detail_url
+    return detail_url
+
+
+_CODIGO_LABEL = 'Código Necesidad de Contratación'
+_CODIGO_RE = re.compile(r'Código Necesidad de Contratación:\s*(NIC-[0-9]+-[0-9]+-[0-9]+)')
+_LABEL_SUFFIX_RE = re.compile(r'\s*:\s*$')
+
+# Marcas de una página de detalle real: la etiqueta del código NIC (con o sin
+# entidades HTML) o la cabecera CPC de la tabla de productos
+_DETAIL_MARKER_RE = re.compile(r'C(?:ó|&oacute;|&#243;)digo\s+Necesidad\s+de\s+Contrataci', re.I)
+_PRODUCT_HEADER_RE = re.compile(r'<t[hd][^>]*>\s*CPC\s*</t[hd]>', re.I)
+_TEXT_XPATH = etree.XPath('.//text()[not(parent::script) and not(parent::style)]')
+_ACCENTS = str.maketrans('áéíóúÁÉÍÓÚñÑ', 'aeiouAEIOUnN')
+
+# Campos de cabecera conocidos: patrón sobre la etiqueta normalizada (sin tildes, minúsculas)
+_HEADER_FIELDS = [
+    ('entidad', re.compile(r'^entidad')),
+    ('fecha_publicacion', re.compile(r'^fecha (de )?publicacion')),
+    ('fecha_limite', re.compile(r'^fecha (limite|maxima)')),
+    ('tipo_necesidad', re.compile(r'^tipo')),
+    ('objeto', re.compile(r'(objeto|descripcion)')),
+    ('estado', re.compile(r'^estado')),
+    ('provincia_canton', re.compile(r'^(provincia|canton)')),
+    ('direccion_entrega', re.compile(r'^direccion')),
+    ('contacto', re.compile(r'^(contacto|responsable|correo|telefono)')),
+]
+
+
+@dataclass
+class ProductLine:
+    """
+    Línea de la tabla de productos: No., CPC, Descripción, Unidad, Cantidad
+    """
+    no: str
+    cpc: str
+    descripcion: str
+    unidad: str
+    cantidad: str
+    extra: list = field(default_factory=list)
+
+    def to_list(self):
+        """
+        Celdas en el orden de la tabla (el formato de Detalles_Productos)
+        """
+        return [self.no, self.cpc, self.descripcion, self.unidad, self.cantidad] + list(self.extra)
+
+
+@dataclass
+class DetailRecord:
+    """
+    Contenido de una página de detalle NCO obtenido en una sola pasada
+    campos guarda todas las parejas etiqueta/valor de la cabecera, también las no tipadas
+    """
+    codigo: str = None
+    products: list = field(default_factory=list)
+    entidad: str = ''
+    fecha_publicacion: str = ''
+    fecha_limite: str = ''
+    tipo_necesidad: str = ''
+    objeto: str = ''
+    estado: str = ''
+    provincia_canton: str = ''
+    direccion_entrega: str = ''
+    contacto: str = ''
+    campos: dict = field(default_factory=dict)
+
+    def product_rows(self):
+        return [product.to_list() for product in self.products]
+
+
+def _element_text(element):
+    """
+    Equivalente a get_text(strip=True) de BeautifulSoup sobre un elemento lxml
+    """
+    return ''.join(part.strip() for part in _TEXT_XPATH(element))
+
+
+def _label_value(strong):
+    """
+    (etiqueta, valor, texto del padre) de un <strong>Etiqueta:</strong> valor, o de
+    una celda <td><strong>Etiqueta:</strong></td><td>valor</td>; None si no es etiqueta
+    """
+    label = _element_text(strong)
+    parent = strong.getparent()
+    parent_text = _element_text(parent) if parent is not None else label
+    rest = parent_text[len(label):] if label and parent_text.startswith(label) else ''
+    if not label.endswith(':') and not rest.startswith(':'):
+        return None
+    value = rest.lstrip(':').strip()
+    if not value and parent is not None and parent.getnext() is not None:
+        value = _element_text(parent.getnext())
+    return _LABEL_SUFFIX_RE.sub('', label), value, parent_text
+
+
+def _header_field(label):
+    normalized = label.translate(_ACCENTS).lower()
+    for name, pattern in _HEADER_FIELDS:
+        if pattern.search(normalized):
+            return name
+    return None
+
+
+def parse_detail_record(html_content, detail_url=""):
+    """
+    Recorre la página de detalle una sola vez y devuelve un DetailRecord con
+    el código NIC, las líneas de producto y los campos de cabecera
+    """
+    record = DetailRecord()
+    if not html_content:
+        return record
+
+    document = lxml_html.fromstring(html_content)
+    product_table = None
+
+    for element in document.iter('strong', 'table'):
+        if element.tag == 'table':
+            if product_table is None:
+                product_table = element
+            continue
+
+        parsed = _label_value(element)
+        if parsed is None:
+            continue
+        label, value, parent_text = parsed
+        record.campos.setdefault(label, value)
+
+        if record.codigo is None and _CODIGO_LABEL in label:
+            codigo_match = _CODIGO_RE.search(parent_text)
+            if codigo_match:
+                record.codigo = codigo_match.group(1).strip()
+            continue
+
+        name = _header_field(label)
+        if name and not getattr(record, name):
+            setattr(record, name, value)
+
+    if product_table is not None:
+        # La primera fila es la cabecera: No., CPC, Descripción, Unidad, Cantidad
+        for position, row in enumerate(product_table.iter('tr')):
+            if position == 0:
+                continue
+            cells = [_element_text(cell) for cell in row.iter('td', 'th')]
+            if len(cells) >= 5:
+                record.products.append(ProductLine(*cells[:5], extra=cells[5:]))
+    else:
+        print(f"    [ERROR] No se encontraron tablas en: {detail_url}")
+
+    return record
+
+
+def extract_codigo_from_html_content(html_content):
+    """
+    Extrae el código de necesidad de contratación del contenido HTML
+    """
+    try:
+        codigo = parse_detail_record(html_content).codigo
+        if codigo:
+            print(f"    [OK] Código encontrado: {codigo}")
+        else:
+            print("    [ERROR] No se encontró el elemento con 'Código Necesidad de Contratación'")
+        return codigo
+    except Exception as e:
+        print(f"    [ERROR] Error extrayendo código: {e}")
+        return None
+
+
+def parse_detail_page_html(html_content, detail_url=""):
+    """
+    Extrae la tabla de productos y el código de contratación del HTML de detalle
+    Devuelve (product_data, codigo_contratacion) con product_data como listas de celdas
+    """
+    record = parse_detail_record(html_content, detail_url)
+    if record.codigo:
+        print(f"    [OK] Código encontrado: {record.codigo}")
+    print(f"    [OK] Extraídos {len(record.products)} productos de la página de detalle")
+    return record.product_rows(), record.codigo
+
+
+def looks_like_detail_page(html_content):
+    """
+    Indica si la respuesta es realmente una página de detalle (y no un login o error)
+    Una tabla cualquiera no basta: las páginas de login y de error también las tienen
+    """
+    if not html_content:
+        return False
+    return bool(_DETAIL_MARKER_RE.search(html_content) or _PRODUCT_HEADER_RE.search(html_content))
+
+
+class DetailFetcher:
+    """
+    Descarga y parsea páginas de detalle sobre una sesión HTTP reutilizable
+    """
+
+    def __init__(self, session=None, pool=None, timeout=30, pool_size=10, rate_controller=None):
+        self.session = session or create_session(pool_size=pool_size)
+        self.pool = pool
+        self.timeout = timeout
+        self.rate_controller = rate_controller or get_shared_controller()
+        self._cookies_from_browser = False
+
+    def import_browser_cookies(self, driver):
+        """
+        Copia las cookies de un navegador Selenium a la sesión HTTP
+        """
+        for cookie in driver.get_cookies():
+            self.session.cookies.set(
+                cookie['name'], cookie['value'],
+                domain=cookie.get('domain'), path=cookie.get('path', '/')
+            )
+        self._cookies_from_browser = True
+        print(f"[OK] Cookies de sesión traspasadas desde el navegador: {len(driver.get_cookies())}")
+
+    def bootstrap_session_with_browser(self):
+        """
+        Abre el listado una vez en Selenium para obtener la cookie de sesión del sitio
+        """
+        if self.pool is None or self._cookies_from_browser:
+            return False
+        with self.pool.acquire() as driver:
+            driver.get(LISTING_URL)
+            self.import_browser_cookies(driver)
+        return True
+
+    def fetch_html(self, detail_url):
+        """
+        Descarga el HTML de una página de detalle
+        """
+        response = self.rate_controller.request(
+            self.session, 'GET', resolve_detail_url(detail_url), headers=HTML_HEADERS, timeout=self.timeout
+        )
+        response.raise_for_status()
+        if not response.encoding or response.encoding.lower() == 'iso-8859-1':
+            response.encoding = response.apparent_encoding
+        return response.text
+
+    def fetch_record(self, detail_url):
+        """
+        Descarga una página de detalle y devuelve su DetailRecord completo
+        Si la respuesta sigue sin ser una página de detalle (login, error) devuelve un
+        DetailRecord vacío para que el llamador recurra al navegador
+        """
+        print(f"    [INFO] Descargando página de detalle por HTTP: {detail_url}")
+        html_content = self.fetch_html(detail_url)
+        if not looks_like_detail_page(html_content) and self.bootstrap_session_with_browser():
+            html_content = self.fetch_html(detail_url)
+        if not looks_like_detail_page(html_content):
+            print("    [WARNING] La respuesta HTTP no es una página de detalle")
+            return DetailRecord()
+        return parse_detail_record(html_content, detail_url)
+
+    def fetch(self, detail_url):
+        """
+        Devuelve (product_data, codigo_contratacion) como extract_detail_page_data
+        """
+        try:
+            record = self.fetch_record(detail_url)
+            print(f"    [OK] Extraídos {len(record.products)} productos de la página de detalle")
+            return record.product_rows(), record.codigo
+        except Exception as e:
+            print(f"    [ERROR] Error descargando página de detalle: {e}")
+            return [], None
@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cliente HTTP para el listado de Necesidades de Contratación (NCO) del SERCOP.
+
+La tabla de FrmNCOListado.cpe es un DataTables con "serverSide": true que pide
+los registros por POST a NCORetornaRegistros.cpe?lot=1. Este módulo habla ese
+protocolo directamente (iDisplayStart/iDisplayLength/sEcho/orden) y devuelve
+las filas desde el JSON, sin navegador ni re-parseo del page_source.
+"""
+
+import html
+import re
+from dataclasses import dataclass, astuple
+
+import pandas as pd
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+from rate_controller import get_shared_controller
+
+LISTING_URL = "https://www.compraspublicas.gob.ec/ProcesoContratacion/compras/NCO/FrmNCOListado.cpe"
+RECORDS_URL = "https://www.compraspublicas.gob.ec/ProcesoContratacion/compras/NCO/NCORetornaRegistros.cpe?lot=1"
+
+# Claves 'data' de las columnas, en el mismo orden que la definición de DataTables
+COLUMN_KEYS = [
+    'tipo_necesidad',
+    'codigo_contratacion',
+    'fecha_publicacion',
+    'provincia',
+    'objeto_contratacion',
+    'estado',
+    'fecha_limite_propuesta',
+    'url',
+    'direccion_entrega',
+    'contacto'
+]
+
+LISTING_HEADERS = [
+    'Tipo de Necesidad',
+    'Código Necesidad de Contratación',
+    'Fecha de Publicación',
+    'Provincia - Cantón',
+    'Descripción del Objeto de compra',
+    'Estado de la Necesidad',
+    'Fecha límite para la entrega de proformas',
+    'Entidad Contratante',
+    'Dirección de Entrega',
+    'Contacto',
+    'URL_Detalle'
+]
+
+# Longitud de página por defecto de DataTables (la que recorre el modo Selenium)
+LISTING_PAGE_LENGTH = 10
+
+# Columna ordenable por defecto: "order": [[1, "desc"]] (codigo_contratacion)
+DEFAULT_ORDER = (1, 'desc')
+
+# "... de un total de 1,561 registros (filtrado de un total de 1,158,637 registros)"
+_INFO_TOTAL_RE = re.compile(r'de un total de\s+([\d.,]+)\s+registros')
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'application/json, text/javascript, */*; q=0.01',
+    'Accept-Language': 'es-ES,es;q=0.8,en-US;q=0.5,en;q=0.3',
+    'Accept-Encoding': 'gzip, deflate',
+    'X-Requested-With': 'XMLHttpRequest',
+    'Referer': LISTING_URL,
+}
+
+
+@dataclass
+class ListingRow:
+    """
+    Fila tipada del listado NCO (mismas columnas que LISTING_HEADERS)
+    """
+    tipo_necesidad: str
+    codigo_contratacion: str
+    fecha_publicacion: str
+    provincia: str
+    objeto_contratacion: str
+    estado: str
+    fecha_limite_propuesta: str
+    entidad_contratante: str
+    direccion_entrega: str
+    contacto: str
+    url_detalle: str
+
+    def to_list(self):
+        """
+        Devuelve la fila como lista, en el orden de LISTING_HEADERS
+        """
+        return list(astuple(self))
+
+
+def _cell_text(value):
+    """
+    Texto de una celda del JSON, equivalente a get_text(strip=True) del modo Selenium
+    """
+    if value is None:
+        return ''
+    value = str(value)
+    if '<' in value:
+        return BeautifulSoup(value, 'html.parser').get_text(strip=True)
+    return html.unescape(value).strip()
+
+
+def _entity_and_url(value):
+    """
+    Separa la celda 'url' (<a href=...>ENTIDAD</a>) en nombre de entidad y URL de detalle
+    """
+    if value is None:
+        return '', ''
+    value = str(value)
+    if '<' not in value:
+        return html.unescape(value).strip(), ''
+    link = BeautifulSoup(value, 'html.parser').find('a')
+    if not link:
+        return _cell_text(value), ''
+    return link.get_text(strip=True), link.get('href') or ''
+
+
+def parse_record(record):
+    """
+    Convierte un registro de aaData (dict por clave 'data' o lista por posición) en ListingRow
+    """
+    if isinstance(record, dict):
+        values = [record.get(key) for key in COLUMN_KEYS]
+    else:
+        values = list(record)[:len(COLUMN_KEYS)]
+        values += [None] * (len(COLUMN_KEYS) - len(values))
+
+    entidad, url_detalle = _entity_and_url(values[7])
+    texts = [_cell_text(v) for v in values]
+
+    return ListingRow(
+        tipo_necesidad=texts[0],
+        codigo_contratacion=texts[1],
+        fecha_publicacion=texts[2],
+        provincia=texts[3],
+        objeto_contratacion=texts[4],
+        estado=texts[5],
+        fecha_limite_propuesta=texts[6],
+        entidad_contratante=entidad,
+        direccion_entrega=texts[8],
+        contacto=texts[9],
+        url_detalle=url_detalle
+    )
+
+
+def parse_total_from_info(info_text):
+    """
+    Total filtrado y total general a partir del texto de #table_id_info
+    """
+    totals = [int(re.sub(r'[.,]', '', n)) for n in _INFO_TOTAL_RE.findall(info_text or '')]
+    if not totals:
+        return None, None
+    return totals[0], totals[-1]
+
+
+def dedupe_rows(rows):
+    """
+    Genera las filas sin repetir código NIC (o URL de detalle si no hay código), conservando la primera
+    Al reanudar, los bloques guardados y los recién pedidos pueden solaparse si el listado se movió
+    """
+    seen = set()
+    for row in rows:
+        values = row.to_list() if isinstance(row, ListingRow) else list(row)
+        key = values[1] or values[-1]
+        if key:
+            if key in seen:
+                continue
+            seen.add(key)
+        yield row
+
+
+def rows_to_dataframe(rows):
+    """
+    Construye el DataFrame del listado a partir de ListingRow (o listas ya convertidas)
+    """
+    data = [row.to_list() if isinstance(row, ListingRow) else list(row) for row in rows]
+    return pd.DataFrame(data, columns=LISTING_HEADERS)
+
+
+def build_datatables_params(start, length, echo, search="", column_searches=None, order=DEFAULT_ORDER):
+    """
+    Parámetros del protocolo legacy de DataTables (sAjaxSource + serverSide)
+    """
+    column_searches = column_searches or {}
+    order_col, order_dir = order
+
+    params = {
+        'sEcho': echo,
+        'iColumns': len(COLUMN_KEYS),
+        'sColumns': ',' * (len(COLUMN_KEYS) - 1),
+        'iDisplayStart': start,
+        'iDisplayLength': length,
+        'sSearch': search,
+        'bRegex': 'false',
+        'iSortCol_0': order_col,
+        'sSortDir_0': order_dir,
+        'iSortingCols': 1,
+    }
+    for i, key in enumerate(COLUMN_KEYS):
+        params[f'mDataProp_{i}'] = key
+        params[f'sSearch_{i}'] = column_searches.get(i, '')
+        params[f'bRegex_{i}'] = 'false'
+        params[f'bSearchable_{i}'] = 'true'
+        # columnDefs: targets [0,2,3,4,6,7,8] no son ordenables
+        params[f'bSortable_{i}'] = 'false' if i in (0, 2, 3, 4, 6, 7, 8) else 'true'
+    return params
+
+
+def create_session(pool_size=10):
+    """
+    Sesión requests con keep-alive y pool de conexiones para compraspublicas.gob.ec
+    """
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+class DataTablesListingClient:
+    """
+    Cliente del endpoint NCORetornaRegistros.cpe que pagina por HTTP
+    """
+
+    def __init__(self, session=None, page_size=100, timeout=30, rate_controller=None):
+        self.session = session or create_session()
+        self.page_size = page_size
+        self.timeout = timeout
+        self.rate_controller = rate_controller or get_shared_controller()
+        self._echo = 0
+        self._bootstrapped = False
+
+    def bootstrap(self):
+        """
+        Visita el listado una vez para obtener la cookie de sesión del servidor
+        """
+        if self._bootstrapped:
+            return
+        response = self.rate_controller.request(self.session, 'GET', LISTING_URL, timeout=self.timeout)
+        response.raise_for_status()
+        self._bootstrapped = True
+
+    def fetch_page(self, start, length=None, search="", column_searches=None):
+        """
+        Pide un bloque de registros y devuelve el JSON de DataTables
+        """
+        self.bootstrap()
+        self._echo += 1
+        params = build_datatables_params(
+            start, length or self.page_size, self._echo,
+            search=search, column_searches=column_searches
+        )
+        response = self.rate_controller.request(self.session, 'POST', RECORDS_URL, data=params, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    @staticmethod
+    def records_from_payload(payload):
+        """
+        Registros de la respuesta (aaData en el protocolo legacy, data en el nuevo)
+        """
+        return payload.get('aaData', payload.get('data', [])) or []
+
+    @staticmethod
+    def total_from_payload(payload):
+        """
+        Total de registros que cumplen el filtro actual
+        """
+        total = payload.get('iTotalDisplayRecords', payload.get('recordsFiltered'))
+        if total is None:
+            total = payload.get('iTotalRecords', payload.get('recordsTotal', 0))
+        return int(total or 0)
+
+    def iter_pages(self, max_records=None, search="", column_searches=None, completed_blocks=None, on_block=None,
+                   offset=0):
+        """
+        Genera listas de ListingRow, un bloque de page_size por petición, desde el registro offset
+        completed_blocks ({start: (total, filas)}) evita pedir bloques ya descargados
+        y on_block(start, total, rows) se llama tras cada bloque nuevo
+        """
+        completed_blocks = completed_blocks or {}
+        start = offset
+        total = None
+        yielded = 0
+
+        while total is None or start < total:
+            length = self.page_size
+            if max_records is not None:
+                length = min(length, max_records - yielded)
+                if length <= 0:
+                    return
+
+            if start in completed_blocks:
+                block_total, block_rows = completed_blocks[start]
+                # Un bloque guardado puede traer más filas de las que faltan para max_records
+                rows = [ListingRow(*row) for row in block_rows[:length]]
+                if total is None:
+                    total = block_total
+            else:
+                payload = self.fetch_page(start, length, search=search, column_searches=column_searches)
+                if total is None:
+                    total = self.total_from_payload(payload)
+                    print(f"[INFO] Registros disponibles en el servidor: {total}")
+                rows = [parse_record(record) for record in self.records_from_payload(payload)]
+                if on_block is not None and rows:
+                    on_block(start, total, [row.to_list() for row in rows])
+
+            if not rows:
+                return
+
+            yield rows
+            yielded += len(rows)
+            start += len(rows)
+
+    def iter_rows(self, max_records=None, search="", column_searches=None, completed_blocks=None, on_block=None,
+                  offset=0):
+        """
+        Genera ListingRow recorriendo el listado por bloques de page_size
+        """
+        for rows in self.iter_pages(max_records=max_records, search=search, column_searches=column_searches,
+                                    completed_blocks=completed_blocks, on_block=on_block, offset=offset):
+            yield from rows
+
+    def resume_blocks(self, journal, search="", column_searches=None):
+        """
+        Bloques del diario reutilizables al reanudar
+        Pide un registro para conocer el total vivo; si no coincide con el guardado, el
+        diario descarta sus bloques porque los offsets ya apuntan a otras filas
+        """
+        payload = self.fetch_page(0, 1, search=search, column_searches=column_searches)
+        journal.reconcile_total(self.total_from_payload(payload))
+        return journal.completed_pages()
+
+    def iter_new_rows(self, seen_index, known_pages_to_stop=1, max_records=None, search="", column_searches=None,
+                      completed_blocks=None, on_block=None):
+        """
+        Genera solo las filas cuyo código NIC no está en seen_index y deja de paginar
+        tras known_pages_to_stop bloques consecutivos completamente conocidos
+        completed_blocks y on_block funcionan como en iter_pages
+        """
+        known_streak = 0
+        for rows in self.iter_pages(max_records=max_records, search=search, column_searches=column_searches,
+                                    completed_blocks=completed_blocks, on_block=on_block):
+            new_rows = [row for row in rows if row.codigo_contratacion not in seen_index]
+            if new_rows:
+                known_streak = 0
+                yield from new_rows
+                continue
+            known_streak += 1
+            if known_streak >= known_pages_to_stop:
+                print(f"[INFO] {known_streak} bloque(s) ya conocidos, se detiene la paginación")
+                return
+
+    def fetch_dataframe(self, max_records=None, search="", column_searches=None, seen_index=None,
+                        known_pages_to_stop=1, journal=None):
+        """
+        Descarga el listado completo (o hasta max_records) como DataFrame
+        Con seen_index solo devuelve necesidades nuevas y corta al llegar a lo conocido
+        Con journal (CheckpointJournal) cada bloque queda guardado y se reutiliza al reanudar,
+        también en modo incremental
+        """
+        completed_blocks, on_block = None, None
+        if journal is not None:
+            completed_blocks = self.resume_blocks(journal, search=search, column_searches=column_searches)
+            on_block = journal.record_page
+
+        if seen_index is not None:
+            rows = list(dedupe_rows(self.iter_new_rows(
+                seen_index, known_pages_to_stop=known_pages_to_stop, max_records=max_records,
+                search=search, column_searches=column_searches,
+                completed_blocks=completed_blocks, on_block=on_block
+            )))
+        elif journal is not None:
+            rows = list(dedupe_rows(self.iter_rows(
+                max_records=max_records, search=search, column_searches=column_searches,
+                completed_blocks=completed_blocks, on_block=on_block
+            )))
+        else:
+            rows = list(self.iter_rows(max_records=max_records, search=search, column_searches=column_searches))
+        print(f"[OK] Registros descargados por HTTP: {len(rows)}")
+        return rows_to_dataframe(rows)
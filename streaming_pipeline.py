@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pipeline en streaming: listado → filtro → detalle → IA → salida.
+
+Cada etapa corre en sus propios hilos y se comunica con la siguiente por una
+cola acotada: si el detalle o la IA van más lentos que el listado, la
+descarga del listado se bloquea (backpressure) en lugar de acumular todo en
+memoria. Una necesidad que pasa el filtro empieza a descargar su detalle
+mientras el listado sigue paginando, y cada resultado se escribe en la
+salida en cuanto termina.
+"""
+
+import csv
+import os
+import queue
+import threading
+import time
+
+from keyword_matcher import CATEGORY_COLUMN, KEYWORDS_COLUMN
+from relevance_ranker import SCORE_COLUMN
+from sercop_listing_client import LISTING_HEADERS
+
+_DONE = object()
+
+# Columnas del CSV de necesidades: listado, columnas del filtro y resultado del detalle
+# Se declaran en lugar de tomarlas del primer registro, que puede no traerlas todas
+NEED_COLUMNS = LISTING_HEADERS + [
+    CATEGORY_COLUMN,
+    KEYWORDS_COLUMN,
+    SCORE_COLUMN,
+    'Codigo_Necesidad_Contratacion',
+    'Productos'
+]
+
+PRODUCT_COLUMNS = [
+    'Entidad_Contratante',
+    'Descripcion_Objeto',
+    'Codigo_Necesidad_Contratacion',
+    'No',
+    'CPC',
+    'Descripcion_Producto',
+    'Unidad',
+    'Cantidad'
+]
+
+ANALYSIS_COLUMNS = [
+    'Puntuación IA',
+    'Prioridad',
+    'Motivo IA',
+    'Acción IA',
+    'Codigo Necesidad de Contratacion',
+    'Entidad Contratante',
+    'CPC',
+    'Descripcion_Producto',
+    'Puntuación Local'
+]
+
+
+def product_rows(record):
+    """
+    Filas de producto de una necesidad con detalles (mismas columnas que detalles_productos_con_codigo.xlsx)
+    """
+    rows = []
+    for product in record.get('Detalles_Productos') or []:
+        if len(product) >= 5:
+            rows.append({
+                'Entidad_Contratante': record.get('Entidad Contratante', 'N/A'),
+                'Descripcion_Objeto': record.get('Descripción del Objeto de compra', 'N/A'),
+                'Codigo_Necesidad_Contratacion': record.get('Codigo_Necesidad_Contratacion', 'N/A'),
+                'No': product[0],
+                'CPC': product[1],
+                'Descripcion_Producto': product[2],
+                'Unidad': product[3],
+                'Cantidad': product[4]
+            })
+    return rows
+
+
+class CsvStreamSink:
+    """
+    Escribe necesidades, productos y análisis en CSV a medida que llegan,
+    volcando a disco cada flush_every necesidades
+    Con append=True (al reanudar) se añade a los CSV existentes, con su misma
+    cabecera, y se omiten las necesidades que ya estaban escritas
+    """
+
+    def __init__(self, output_dir=".", prefix="stream", flush_every=10, append=False, need_columns=None):
+        os.makedirs(output_dir, exist_ok=True)
+        self.paths = {
+            'needs': os.path.join(output_dir, f"{prefix}_necesidades.csv"),
+            'products': os.path.join(output_dir, f"{prefix}_detalles_productos.csv"),
+            'analysis': os.path.join(output_dir, f"{prefix}_analisis_gemini.csv"),
+        }
+        self.flush_every = max(1, flush_every)
+        self.need_columns = list(need_columns or NEED_COLUMNS)
+        self._files = {}
+        self._writers = {}
+        self._pending = 0
+        self.append = append
+        self.counts = {'needs': 0, 'products': 0, 'analysis': 0, 'skipped': 0}
+        self._written = self._written_codes() if append else set()
+
+    def _written_codes(self):
+        """
+        Códigos NIC ya presentes en el CSV de necesidades de una ejecución anterior
+        """
+        path = self.paths['needs']
+        if not os.path.exists(path):
+            return set()
+        with open(path, 'r', newline='', encoding='utf-8-sig') as f:
+            return {row.get('Código Necesidad de Contratación') for row in csv.DictReader(f)} - {None, ''}
+
+    def _writer(self, kind, columns):
+        if kind not in self._writers:
+            path = self.paths[kind]
+            existing = self.append and os.path.exists(path) and os.path.getsize(path) > 0
+            if existing:
+                # Las filas nuevas siguen la cabecera que ya tiene el archivo
+                with open(path, 'r', newline='', encoding='utf-8-sig') as f:
+                    columns = next(csv.reader(f), None) or columns
+            # utf-8-sig para que Excel abra bien los acentos (en modo 'a' no se repite el BOM)
+            f = open(path, 'a' if existing else 'w', newline='', encoding='utf-8-sig')
+            writer = csv.DictWriter(f, fieldnames=columns, extrasaction='ignore')
+            if not existing:
+                writer.writeheader()
+            self._files[kind] = f
+            self._writers[kind] = writer
+        return self._writers[kind]
+
+    def write(self, record):
+        codigo = record.get('Código Necesidad de Contratación')
+        if codigo and codigo in self._written:
+            self.counts['skipped'] += 1
+            return
+        if codigo:
+            self._written.add(codigo)
+
+        need = {k: v for k, v in record.items() if k not in ('Detalles_Productos', 'Analisis_IA')}
+        need['Productos'] = len(record.get('Detalles_Productos') or [])
+        self._writer('needs', self.need_columns).writerow(need)
+        self.counts['needs'] += 1
+
+        products = product_rows(record)
+        if products:
+            writer = self._writer('products', PRODUCT_COLUMNS)
+            writer.writerows(products)
+            self.counts['products'] += len(products)
+
+        analysis = record.get('Analisis_IA') or []
+        if analysis:
+            writer = self._writer('analysis', ANALYSIS_COLUMNS)
+            writer.writerows(analysis)
+            self.counts['analysis'] += len(analysis)
+
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        for f in self._files.values():
+            f.flush()
+            os.fsync(f.fileno())
+        self._pending = 0
+
+    def close(self):
+        self.flush()
+        for f in self._files.values():
+            f.close()
+        self._files.clear()
+        self._writers.clear()
+
+
+class StreamingPipeline:
+    """
+    Conecta las etapas con colas acotadas
+
+    match(record)        -> dict con columnas extra (Categoría, ...) o None para descartarla
+    fetch_detail(record) -> record con 'Detalles_Productos' y 'Codigo_Necesidad_Contratacion'
+    analyze(record)      -> lista de dicts de análisis IA (opcional)
+    sink.write(record)   -> salida incremental
+    """
+
+    def __init__(self, match, fetch_detail, sink, analyze=None, detail_workers=4, ai_workers=1, buffer_size=50):
+        self.match = match
+        self.fetch_detail = fetch_detail
+        self.analyze = analyze
+        self.sink = sink
+        self.detail_workers = max(1, detail_workers)
+        self.ai_workers = max(1, ai_workers)
+        self.buffer_size = max(1, buffer_size)
+        self.scanned_codes = []
+        self.results = []
+        self.stats = {'scanned': 0, 'matched': 0, 'details': 0, 'analyzed': 0, 'written': 0, 'errors': 0}
+        self._stats_lock = threading.Lock()
+        self._first_result_at = None
+        self._source_error = None
+
+    def _count(self, key, n=1):
+        with self._stats_lock:
+            self.stats[key] += n
+
+    def _source(self, records, out_q):
+        """
+        Etapas de listado y filtro: recorre el generador del listado y encola las coincidencias
+        """
+        try:
+            for record in records:
+                self._count('scanned')
+                self.scanned_codes.append(record.get('Código Necesidad de Contratación'))
+                try:
+                    extra = self.match(record)
+                except Exception as e:
+                    print(f"[ERROR] Error filtrando registro: {e}")
+                    self._count('errors')
+                    continue
+                if extra:
+                    record = dict(record, **extra)
+                    self._count('matched')
+                    out_q.put(record)  # bloquea si la etapa de detalle va atrasada
+        except Exception as e:
+            # El listado quedó incompleto: run() lo relanza cuando las etapas terminan
+            print(f"[ERROR] Error leyendo el listado: {e}")
+            self._source_error = e
+        finally:
+            for _ in range(self.detail_workers):
+                out_q.put(_DONE)
+
+    def _stage(self, func, name, in_q, out_q, remaining, downstream_workers):
+        """
+        Trabajador genérico: aplica func a cada elemento y avisa a la etapa siguiente al terminar
+        """
+        while True:
+            item = in_q.get()
+            if item is _DONE:
+                break
+            try:
+                item = func(item)
+            except Exception as e:
+                print(f"[ERROR] Error en la etapa de {name}: {e}")
+                self._count('errors')
+            out_q.put(item)
+
+        with remaining['lock']:
+            remaining['count'] -= 1
+            last = remaining['count'] == 0
+        if last:
+            for _ in range(downstream_workers):
+                out_q.put(_DONE)
+
+    def _detail(self, record):
+        record = self.fetch_detail(record)
+        self._count('details')
+        return record
+
+    def _ai(self, record):
+        if self.analyze is not None and record.get('Detalles_Productos'):
+            record['Analisis_IA'] = self.analyze(record)
+            self._count('analyzed')
+        return record
+
+    def run(self, records):
+        """
+        Ejecuta el pipeline sobre un iterable de registros del listado (dicts por encabezado)
+        y devuelve la lista de necesidades procesadas en orden de llegada
+        Si el listado falla a mitad, las necesidades ya encoladas se terminan y escriben
+        y luego se relanza la excepción, para que no se den por vistas las que faltan
+        """
+        started = time.time()
+        detail_q = queue.Queue(maxsize=self.buffer_size)
+        ai_q = queue.Queue(maxsize=self.buffer_size)
+        sink_q = queue.Queue(maxsize=self.buffer_size)
+
+        threads = [threading.Thread(target=self._source, args=(records, detail_q), daemon=True)]
+        detail_remaining = {'lock': threading.Lock(), 'count': self.detail_workers}
+        for _ in range(self.detail_workers):
+            threads.append(threading.Thread(
+                target=self._stage,
+                args=(self._detail, 'detalle', detail_q, ai_q, detail_remaining, self.ai_workers),
+                daemon=True
+            ))
+        ai_remaining = {'lock': threading.Lock(), 'count': self.ai_workers}
+        for _ in range(self.ai_workers):
+            threads.append(threading.Thread(
+                target=self._stage,
+                args=(self._ai, 'IA', ai_q, sink_q, ai_remaining, 1),
+                daemon=True
+            ))
+        for thread in threads:
+            thread.start()
+
+        # Etapa de salida en el hilo principal
+        try:
+            while True:
+                record = sink_q.get()
+                if record is _DONE:
+                    break
+                if self._first_result_at is None:
+                    self._first_result_at = time.time() - started
+                    print(f"[OK] Primera necesidad lista a los {self._first_result_at:.1f}s")
+                self.sink.write(record)
+                self.results.append(record)
+                self._count('written')
+                print(f"   [stream] {record.get('Codigo_Necesidad_Contratacion') or record.get('Código Necesidad de Contratación')}: "
+                      f"{len(record.get('Detalles_Productos') or [])} productos "
+                      f"(listado {self.stats['scanned']}, coincidencias {self.stats['matched']})")
+        finally:
+            self.sink.close()
+
+        for thread in threads:
+            thread.join()
+        self.stats['elapsed'] = time.time() - started
+        self.stats['first_result'] = self._first_result_at
+        if self._source_error is not None:
+            raise self._source_error
+        return self.results
+
+    def print_stats(self):
+        stats = self.stats
+        print("\n[INFO] Pipeline en streaming:")
+        print(f"   • Registros del listado: {stats['scanned']}, coincidencias: {stats['matched']}")
+        print(f"   • Detalles: {stats['details']}, análisis IA: {stats['analyzed']}, escritos: {stats['written']}, errores: {stats['errors']}")
+        if stats.get('first_result') is not None:
+            print(f"   • Primer resultado: {stats['first_result']:.1f}s, total: {stats['elapsed']:.1f}s")
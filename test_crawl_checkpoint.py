@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas offline del diario de checkpoints (crawl_checkpoint.py)
+"""
+
+from crawl_checkpoint import CheckpointJournal
+
+
+def row(codigo):
+    return ['Ínfimas Cuantías', codigo] + [''] * 9
+
+
+def test_resume_reuses_blocks_when_total_is_unchanged(tmp_path):
+    path = str(tmp_path / 'checkpoint.jsonl')
+    journal = CheckpointJournal(path)
+    journal.reconcile_total(250)
+    journal.record_page(0, 250, [row('NIC-3'), row('NIC-2')])
+    journal.record_detail('https://detalle/1', [['1', 'CPC', 'Producto', 'Unidad', '1']], 'NIC-3')
+
+    resumed = CheckpointJournal(path, resume=True)
+    assert resumed.listing_total() == 250
+    assert resumed.reconcile_total(250)
+    assert resumed.completed_pages() == {0: (250, [row('NIC-3'), row('NIC-2')])}
+    assert set(resumed.completed_details()) == {'https://detalle/1'}
+
+
+def test_changed_total_discards_blocks_but_keeps_details(tmp_path):
+    path = str(tmp_path / 'checkpoint.jsonl')
+    journal = CheckpointJournal(path)
+    journal.reconcile_total(250)
+    journal.record_page(0, 250, [row('NIC-3')])
+    journal.record_detail('https://detalle/1', [], 'NIC-3')
+
+    resumed = CheckpointJournal(path, resume=True)
+    assert not resumed.reconcile_total(251)
+    assert resumed.completed_pages() == {}
+    assert resumed.listing_total() == 251
+
+    # El descarte queda en disco
+    reopened = CheckpointJournal(path, resume=True)
+    assert reopened.completed_pages() == {}
+    assert reopened.listing_total() == 251
+    assert set(reopened.completed_details()) == {'https://detalle/1'}
+
+
+def test_journal_without_total_line_uses_first_block(tmp_path):
+    path = str(tmp_path / 'checkpoint.jsonl')
+    CheckpointJournal(path).record_page(0, 120, [row('NIC-1')])
+    assert CheckpointJournal(path, resume=True).reconcile_total(120)
+
+
+def test_truncated_last_line_is_ignored(tmp_path):
+    path = str(tmp_path / 'checkpoint.jsonl')
+    journal = CheckpointJournal(path)
+    journal.record_page(0, 120, [row('NIC-1')])
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"type": "page", "start": 100, "rows": [[')
+    assert list(CheckpointJournal(path, resume=True).completed_pages()) == [0]
+
+
+def test_fresh_run_clears_previous_journal(tmp_path):
+    path = str(tmp_path / 'checkpoint.jsonl')
+    CheckpointJournal(path).record_page(0, 120, [row('NIC-1')])
+    assert CheckpointJournal(path).completed_pages() == {}
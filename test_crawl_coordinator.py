@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas offline de la cola de shards (crawl_coordinator.py)
+"""
+
+import crawl_coordinator
+from crawl_coordinator import MAX_ATTEMPTS, ShardQueue
+from sercop_listing_client import ListingRow
+
+
+def test_plan_covers_total():
+    shards = ShardQueue(':memory:')
+    assert shards.plan(250, 100) == 3
+    assert [row[1:3] for row in shards.unfinished()] == [(0, 100), (100, 100), (200, 50)]
+
+
+def test_shard_fails_after_max_attempts_and_can_be_retried():
+    shards = ShardQueue(':memory:')
+    shards.plan(100, 100)
+    for _ in range(MAX_ATTEMPTS):
+        shard_id, start, length = shards.claim('w1')
+        shards.fail(shard_id, 'timeout')
+    assert shards.claim('w1') is None
+    assert shards.status()['failed'] == 1
+    assert shards.unfinished()[0][3:] == ('failed', MAX_ATTEMPTS, 'timeout')
+
+    assert shards.retry_failed() == 1
+    shard_id, start, length = shards.claim('w1')
+    shards.complete(shard_id, start, [ListingRow('A', 'NIC-1', *[''] * 9)])
+    assert shards.unfinished() == []
+    assert len(shards.to_dataframe()) == 1
+
+
+def test_expired_lease_on_last_attempt_is_marked_failed(monkeypatch):
+    shards = ShardQueue(':memory:')
+    shards.plan(100, 100)
+    for _ in range(MAX_ATTEMPTS - 1):
+        shards.fail(shards.claim('w1')[0], 'timeout')
+    shards.claim('w1')  # el trabajador muere con el último intento
+    monkeypatch.setattr(crawl_coordinator, 'LEASE_TIMEOUT', -1)
+    assert shards.claim('w2') is None
+    assert shards.status()['failed'] == 1
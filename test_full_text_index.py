@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas offline del índice de texto completo (full_text_index.py)
+"""
+
+import pytest
+
+from full_text_index import FullTextIndex, keywords_query, phrase
+
+NEEDS = [
+    {
+        'Código Necesidad de Contratación': 'NIC-0760000260001-2025-00102',
+        'Descripción del Objeto de compra': 'SERVICIO DE ANÁLISIS DE DATOS ESTADÍSTICOS',
+        'Entidad Contratante': 'GAD MUNICIPAL DE MACHALA',
+        'Fecha de Publicación': '2025-09-25 18:55:00',
+        'URL_Detalle': 'https://www.compraspublicas.gob.ec/detalle?id=1',
+    },
+    {
+        'Código Necesidad de Contratación': 'NIC-0460021210001-2025-00014',
+        'Descripción del Objeto de compra': 'ADQUISICIÓN DE MATERIALES PARA CANDIDATOS',
+        'Entidad Contratante': 'GAD PARROQUIAL CRISTÓBAL COLÓN',
+        'Fecha de Publicación': '2025-09-25 19:00:00',
+        'URL_Detalle': 'https://www.compraspublicas.gob.ec/detalle?id=2',
+    },
+]
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = FullTextIndex(str(tmp_path / 'fulltext.db'))
+    index.add_needs(NEEDS)
+    index.set_products('NIC-0460021210001-2025-00014', [
+        ['1', '432110012', 'LICENCIA DE CIBERSEGURIDAD PARA SERVIDORES', 'Unidad', '5'],
+        ['2', '381200021', 'Papelería y útiles', 'Kit', '10'],
+    ])
+    yield index
+    index.close()
+
+
+def codes(df):
+    return set(df['Código'])
+
+
+@pytest.mark.parametrize('query', ['analisis', 'ANÁLISIS', 'Análisis', 'estadisticos'])
+def test_accent_and_case_folding(index, query):
+    assert codes(index.search(query, scope='necesidades')) == {'NIC-0760000260001-2025-00102'}
+
+
+def test_entity_accent_folding(index):
+    assert codes(index.search('cristobal colon', scope='necesidades')) == {'NIC-0460021210001-2025-00014'}
+
+
+def test_word_boundaries(index):
+    # "datos" no debe coincidir dentro de "candidatos"
+    assert codes(index.search('datos', scope='necesidades')) == {'NIC-0760000260001-2025-00102'}
+
+
+def test_product_search_folds_accents(index):
+    results = index.search('papeleria utiles', scope='productos')
+    assert list(results['CPC']) == ['381200021']
+    assert list(results['Entidad']) == ['GAD PARROQUIAL CRISTÓBAL COLÓN']
+
+
+def test_matching_codes_over_needs_and_products(index):
+    query = keywords_query(['análisis de datos', 'ciberseguridad'])
+    assert index.matching_codes(query) == {'NIC-0760000260001-2025-00102', 'NIC-0460021210001-2025-00014'}
+
+
+def test_invalid_syntax_is_searched_as_phrase(index):
+    # Comilla sin cerrar: FTS5 la rechaza y el texto se busca como frase
+    assert codes(index.search('análisis de "datos', scope='necesidades')) == {'NIC-0760000260001-2025-00102'}
+    assert codes(index.search('materiales (candidatos', scope='necesidades')) == set()
+
+
+def test_updates_replace_indexed_text(index):
+    index.add_needs([dict(NEEDS[0], **{'Descripción del Objeto de compra': 'MANTENIMIENTO DE VEHÍCULOS'})])
+    assert codes(index.search('analisis', scope='necesidades')) == set()
+    assert codes(index.search('vehiculos', scope='necesidades')) == {'NIC-0760000260001-2025-00102'}
+    index.set_products('NIC-0460021210001-2025-00014', [])
+    assert index.stats() == {'necesidades': 2, 'productos': 0}
+
+
+def test_phrase_escapes_quotes():
+    assert phrase('pantalla 24"') == '"pantalla 24"""'
+
+
+def test_add_record_indexes_need_then_products(tmp_path):
+    index = FullTextIndex(str(tmp_path / 'fulltext.db'))
+    record = dict(NEEDS[0])
+    index.add_record(record)
+    assert codes(index.search('datos')) == {'NIC-0760000260001-2025-00102'}
+    assert index.search('antivirus').empty
+
+    record['Detalles_Productos'] = [['1', '432110012', 'LICENCIA DE SOFTWARE ANTIVIRUS', 'Unidad', '50']]
+    record['Codigo_Necesidad_Contratacion'] = 'NIC-0760000260001-2025-00102'
+    index.add_record(record)
+    assert codes(index.search('antivirus')) == {'NIC-0760000260001-2025-00102'}
+    index.close()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas offline de la validación de respuestas de Gemini por lotes (gemini_batch.py)
+"""
+
+import json
+import re
+
+import pytest
+
+from gemini_batch import BatchAnalyzer, parse_batch_response, validate_result
+
+VALID = {
+    "id": "1",
+    "puntuacion_relevancia": 8,
+    "prioridad": "Alta",
+    "motivo": "Desarrollo de software a medida",
+    "accion_recomendada": "Postular Inmediatamente",
+}
+
+
+def test_validate_result_normalizes_valid_object():
+    result = validate_result(dict(VALID, prioridad=" alta ", accion_recomendada="analizar pliego con detalle",
+                                  puntuacion_relevancia="7.0"))
+    assert result == {
+        "puntuacion_relevancia": 7,
+        "prioridad": "Alta",
+        "motivo": "Desarrollo de software a medida",
+        "accion_recomendada": "Analizar Pliego con Detalle",
+    }
+    assert validate_result(dict(VALID, puntuacion_relevancia=6.5))["puntuacion_relevancia"] == 6.5
+
+
+@pytest.mark.parametrize('changes', [
+    {"puntuacion_relevancia": 11},
+    {"puntuacion_relevancia": -1},
+    {"puntuacion_relevancia": "alta"},
+    {"puntuacion_relevancia": None},
+    {"prioridad": "Urgente"},
+    {"motivo": "  "},
+    {"accion_recomendada": ""},
+    {"accion_recomendada": "Llamar al cliente"},
+])
+def test_validate_result_rejects_invalid_fields(changes):
+    assert validate_result(dict(VALID, **changes)) is None
+
+
+def test_validate_result_rejects_non_objects():
+    assert validate_result(["1", 8]) is None
+    assert validate_result(None) is None
+
+
+def test_parse_batch_response_plain_array():
+    assert parse_batch_response(json.dumps([VALID])) == [VALID]
+
+
+def test_parse_batch_response_fenced_block():
+    text = "```json\n" + json.dumps([VALID, dict(VALID, id="2")]) + "\n```"
+    assert [obj["id"] for obj in parse_batch_response(text)] == ["1", "2"]
+
+
+def test_parse_batch_response_wrapped_array_and_single_object():
+    assert parse_batch_response(json.dumps({"resultados": [VALID]})) == [VALID]
+    assert parse_batch_response(json.dumps(VALID)) == [VALID]
+
+
+def test_parse_batch_response_rejects_invalid_json():
+    with pytest.raises(ValueError):
+        parse_batch_response("Lo siento, no puedo ayudar con eso")
+    with pytest.raises(ValueError):
+        parse_batch_response("42")
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModel:
+    """
+    Responde válido a todos los ids salvo a bad_ids en la primera llamada
+    """
+
+    def __init__(self, bad_ids=()):
+        self.bad_ids = set(bad_ids)
+        self.calls = 0
+
+    def generate_content(self, prompt, **options):
+        self.calls += 1
+        ids = re.findall(r'^\s*\[(\d+)\]', prompt, re.M)
+        objects = []
+        for item_id in ids:
+            accion = "Descartar"
+            if self.calls == 1 and item_id in self.bad_ids:
+                accion = "Acción inventada"
+            objects.append(dict(VALID, id=item_id, accion_recomendada=accion))
+        return FakeResponse(json.dumps(objects))
+
+
+def test_invalid_items_are_requeued():
+    model = FakeModel(bad_ids={"2"})
+    analyzer = BatchAnalyzer(model, batch_size=10, pause=0)
+    results = analyzer.analyze([("a", "software"), ("b", "ciberseguridad"), ("c", "datos")])
+    assert set(results) == {"a", "b", "c"}
+    assert all(result["accion_recomendada"] == "Descartar" for result in results.values())
+    assert model.calls == 2
+    assert analyzer.stats["requeued"] == 1
+
+
+def test_items_without_valid_answer_go_to_manual_review():
+    model = FakeModel()
+    model.generate_content = lambda prompt, **options: FakeResponse("[]")
+    analyzer = BatchAnalyzer(model, batch_size=10, max_rounds=2, pause=0)
+    results = analyzer.analyze([("a", "software")])
+    assert results["a"]["prioridad"] == "Revisar Manualmente"
+    assert analyzer.stats["failed"] == 1
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas offline de la caché de análisis de Gemini (gemini_cache.py)
+"""
+
+import time
+
+import pytest
+
+from gemini_batch import PROMPT_VERSION, BatchAnalyzer
+from gemini_cache import AnalysisCache, cache_key, normalize_text
+from test_gemini_batch import VALID, FakeModel, FakeResponse
+
+RESULT = {key: VALID[key] for key in ('puntuacion_relevancia', 'prioridad', 'motivo', 'accion_recomendada')}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = AnalysisCache(str(tmp_path / 'cache.db'))
+    yield cache
+    cache.close()
+
+
+def test_key_ignores_case_and_whitespace():
+    assert normalize_text('  Licencias   de\tSOFTWARE\n') == 'licencias de software'
+    assert cache_key('Licencias de SOFTWARE', 'v1', 'gemini') == cache_key(' licencias  de software ', 'v1', 'gemini')
+
+
+def test_key_changes_with_text_prompt_and_model():
+    key = cache_key('licencias de software', 'v1', 'gemini')
+    assert key != cache_key('licencias de hardware', 'v1', 'gemini')
+    assert key != cache_key('licencias de software', 'v2', 'gemini')
+    assert key != cache_key('licencias de software', 'v1', 'otro-modelo')
+
+
+def test_hit_and_miss(cache):
+    key = cache_key('licencias de software', 'v1', 'gemini')
+    assert cache.get_many([key]) == {}
+    cache.put_many({key: dict(RESULT, id='7', extra='x')}, 'v1', 'gemini')
+    assert cache.get_many([key, key, 'otra']) == {key: RESULT}
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries'], stats['stored_hits']) == (1, 2, 1, 1)
+
+
+def test_entries_persist_across_instances(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    first = AnalysisCache(path)
+    first.put_many({'k': RESULT}, 'v1', 'gemini')
+    first.close()
+    second = AnalysisCache(path)
+    assert second.get_many(['k']) == {'k': RESULT}
+    second.close()
+
+
+def test_expired_entries_are_misses_and_evicted(cache):
+    cache.put_many({'viejo': RESULT, 'nuevo': RESULT}, 'v1', 'gemini')
+    cache.conn.execute("UPDATE analyses SET created = ? WHERE key = 'viejo'", (time.time() - cache.ttl - 10,))
+    cache.conn.commit()
+    assert set(cache.get_many(['viejo', 'nuevo'])) == {'nuevo'}
+    assert cache.evict() == 1
+    assert cache.stats()['entries'] == 1
+
+
+def test_evict_keeps_most_recently_used(tmp_path):
+    cache = AnalysisCache(str(tmp_path / 'cache.db'), max_entries=2)
+    cache.put_many({'a': RESULT}, 'v1', 'gemini')
+    cache.put_many({'b': RESULT}, 'v1', 'gemini')
+    cache.put_many({'c': RESULT}, 'v1', 'gemini')
+    cache.conn.execute("UPDATE analyses SET last_used = 0 WHERE key = 'b'")
+    cache.conn.commit()
+    assert cache.evict() == 1
+    assert set(cache.get_many(['a', 'b', 'c'])) == {'a', 'c'}
+    cache.close()
+
+
+def test_batch_analyzer_reuses_cached_analyses(cache):
+    model = FakeModel()
+    BatchAnalyzer(model, pause=0, cache=cache).analyze([('a', 'Licencias de software'), ('b', 'Ciberseguridad')])
+    assert model.calls == 1
+
+    analyzer = BatchAnalyzer(model, pause=0, cache=cache)
+    results = analyzer.analyze([('x', 'LICENCIAS DE SOFTWARE'), ('y', 'Análisis de datos')])
+    assert model.calls == 2
+    assert analyzer.stats['cached'] == 1
+    assert results['x']['accion_recomendada'] == 'Descartar'
+    assert cache.get_many([cache_key('ciberseguridad', PROMPT_VERSION, analyzer.model_name)])
+
+
+def test_manual_review_results_are_not_cached(cache):
+    model = FakeModel()
+    model.generate_content = lambda prompt, **options: FakeResponse("[]")
+    BatchAnalyzer(model, pause=0, max_rounds=1, cache=cache).analyze([('a', 'software')])
+    assert cache.stats()['entries'] == 0
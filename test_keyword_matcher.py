@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas offline del buscador Aho-Corasick (keyword_matcher.py) contra el
+filtro original de subcadenas (keyword.lower() in descripcion.lower())
+"""
+
+import pandas as pd
+import pytest
+
+from benchmark_listing_parser import FIXTURE_HTML
+from config_example import KEYWORDS_HUREONSYS
+from keyword_matcher import CATEGORY_COLUMN, KEYWORDS_COLUMN, OFFSETS_COLUMN, AhoCorasickAutomaton, KeywordMatcher
+from listing_html_parser import parse_listing_rows
+
+EXTRA_DESCRIPTIONS = [
+    'CONTRATACIÓN DEL SERVICIO DE DESARROLLO DE SOFTWARE Y CIBERSEGURIDAD',
+    'Análisis de datos estadísticos para el sistema de gestión',
+    'MANTENIMIENTO DE SOFTWARE',
+    'materiales de aseo',
+    'softwaresoftware',
+    '',
+]
+
+
+def old_filter(descripcion):
+    """
+    Filtro original: primera categoría (y su primera palabra clave) encontrada, o (None, None)
+    """
+    descripcion = str(descripcion).lower()
+    for category, keywords in KEYWORDS_HUREONSYS.items():
+        for keyword in keywords:
+            if keyword.lower() in descripcion:
+                return category, keyword
+    return None, None
+
+
+def all_keywords(descripcion):
+    descripcion = str(descripcion).lower()
+    return [keyword for keywords in KEYWORDS_HUREONSYS.values() for keyword in keywords
+            if keyword.lower() in descripcion]
+
+
+@pytest.fixture(scope='module')
+def descriptions():
+    with open(FIXTURE_HTML, 'r', encoding='utf-8') as f:
+        rows = parse_listing_rows(f.read())
+    return [row[4] for row in rows] + EXTRA_DESCRIPTIONS
+
+
+@pytest.fixture(scope='module', params=[False, True], ids=['python', 'native'])
+def matcher(request):
+    return KeywordMatcher(KEYWORDS_HUREONSYS, native=request.param)
+
+
+def test_match_agrees_with_old_filter(matcher, descriptions):
+    for descripcion in descriptions:
+        old_category, old_keyword = old_filter(descripcion)
+        categories, keywords = matcher.match(descripcion)
+        if old_category is None:
+            assert categories == [] and keywords == []
+            continue
+        assert categories[0] == old_category
+        assert keywords[0] == old_keyword
+        assert keywords == list(dict.fromkeys(all_keywords(descripcion)))
+
+
+def test_annotate_matches_per_row_match(matcher, descriptions):
+    series = pd.Series(descriptions + descriptions[:5], index=range(100, 100 + len(descriptions) + 5))
+    annotations = matcher.annotate(series, with_offsets=True)
+    assert list(annotations.index) == list(series.index)
+    for index, descripcion in series.items():
+        categories, keywords = matcher.match(descripcion)
+        assert annotations.at[index, CATEGORY_COLUMN] == ', '.join(categories)
+        assert annotations.at[index, KEYWORDS_COLUMN] == ', '.join(keywords)
+        assert bool(annotations.at[index, OFFSETS_COLUMN]) == bool(keywords)
+
+
+def test_find_all_offsets_point_at_keyword(matcher):
+    text = 'Servicio de DESARROLLO DE SOFTWARE'
+    for match in matcher.find_all(text):
+        assert text[match.start:match.end].lower() == match.keyword.lower()
+
+
+def test_python_automaton_overlapping_words():
+    automaton = AhoCorasickAutomaton()
+    for word in ('he', 'she', 'his', 'hers'):
+        automaton.add_word(word, word)
+    automaton.make_automaton()
+    assert sorted(automaton.iter('ushers')) == [(3, 'he'), (3, 'she'), (5, 'hers')]
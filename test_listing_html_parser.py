@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas offline de los backends del parser del listado (listing_html_parser.py)
+"""
+
+import pytest
+
+from benchmark_listing_parser import FIXTURE_HTML
+from benchmark_suite import scale_listing_html
+from listing_html_parser import parse_listing_rows, parse_listing_table
+
+
+@pytest.fixture(scope='module')
+def listing_html():
+    with open(FIXTURE_HTML, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def test_backends_return_same_rows(listing_html):
+    lxml_rows = parse_listing_rows(listing_html, backend='lxml')
+    bs4_rows = parse_listing_rows(listing_html, backend='bs4')
+    assert len(lxml_rows) == 100
+    assert lxml_rows == bs4_rows
+
+
+def test_backends_return_same_headers(listing_html):
+    lxml_headers, _ = parse_listing_table(listing_html, backend='lxml')
+    bs4_headers, _ = parse_listing_table(listing_html, backend='bs4')
+    assert lxml_headers == bs4_headers
+    assert 'Código Necesidad de Contratación' in lxml_headers
+
+
+def test_backends_agree_on_scaled_page(listing_html):
+    scaled = scale_listing_html(listing_html, 3)
+    assert parse_listing_rows(scaled, backend='lxml') == parse_listing_rows(scaled, backend='bs4')
+
+
+def test_rows_have_detail_url(listing_html):
+    for row in parse_listing_rows(listing_html):
+        assert len(row) == 11
+        assert row[1].startswith('NIC-')
+        assert 'NCORegistroDetalle.cpe' in row[-1]
+
+
+@pytest.mark.parametrize('backend', ['lxml', 'bs4'])
+def test_page_without_table(backend):
+    assert parse_listing_rows('<html><body><p>Sesión expirada</p></body></html>', backend=backend) is None
+
+
+def test_unknown_backend(listing_html):
+    with pytest.raises(ValueError):
+        parse_listing_table(listing_html, backend='html5lib')
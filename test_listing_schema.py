@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas offline del esquema tipado del listado (listing_schema.py)
+"""
+
+import pandas as pd
+
+from benchmark_listing_parser import FIXTURE_HTML
+from listing_html_parser import parse_listing_rows
+from listing_schema import (
+    CODIGO,
+    FECHA_PUBLICACION,
+    PROVINCIA_CANTON,
+    apply_listing_schema,
+    decompose_nic,
+    parse_dates,
+    split_location
+)
+from sercop_listing_client import LISTING_HEADERS
+
+
+def fixture_dataframe():
+    with open(FIXTURE_HTML, 'r', encoding='utf-8') as f:
+        return pd.DataFrame(parse_listing_rows(f.read(), backend='lxml'), columns=LISTING_HEADERS)
+
+
+def test_parse_dates_with_fallback_formats():
+    parsed = parse_dates(pd.Series(['2025-09-25 19:00:00', '2025-09-25 19:00', '2025-09-25', '', None, 'mañana']))
+    assert list(parsed[:3]) == [pd.Timestamp('2025-09-25 19:00'), pd.Timestamp('2025-09-25 19:00'),
+                                pd.Timestamp('2025-09-25')]
+    assert parsed[3:].isna().all()
+
+
+def test_split_location():
+    provincia, canton = split_location(pd.Series(['CARCHI - MONTUFAR', 'PICHINCHA', 'EL ORO - MACHALA']))
+    assert list(provincia) == ['CARCHI', 'PICHINCHA', 'EL ORO']
+    assert canton.isna()[1] and canton[2] == 'MACHALA'
+    assert provincia.dtype == 'category'
+
+
+def test_decompose_nic_keeps_parts():
+    nic = decompose_nic(pd.Series(['NIC-0160016000001-2025-00043', 'sin código']))
+    assert str(nic['NIC_RUC'][0]).zfill(13) == '0160016000001'
+    assert nic['NIC_Anio'][0] == 2025 and nic['NIC_Secuencia'][0] == 43
+    assert nic.iloc[1].isna().all()
+
+
+def test_apply_listing_schema_on_fixture():
+    df = fixture_dataframe()
+    typed = apply_listing_schema(df)
+    assert list(typed.columns[:len(LISTING_HEADERS)]) == LISTING_HEADERS
+    assert pd.api.types.is_datetime64_any_dtype(typed[FECHA_PUBLICACION])
+    assert typed[FECHA_PUBLICACION].notna().all()
+    assert typed[PROVINCIA_CANTON].dtype == 'category'
+    assert typed['NIC_Anio'].notna().all()
+    assert list(typed[CODIGO]) == list(df[CODIGO])
+    assert typed.memory_usage(deep=True).sum() < df.memory_usage(deep=True).sum()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas offline del análisis por necesidad (need_analysis.py)
+"""
+
+import pandas as pd
+
+from need_analysis import MAX_PRODUCT_LINES, analyze_needs, build_need_text, compact_product_lines, group_needs, need_scores
+from relevance_ranker import RelevanceRanker
+
+
+def product(codigo, descripcion, cpc='432110012', cantidad='1', unidad='Unidad', registro=0,
+            objeto='ADQUISICIÓN DE LICENCIAS', entidad='GAD MUNICIPAL DE MACHALA'):
+    return {
+        'Registro_ID': registro,
+        'Entidad_Contratante': entidad,
+        'Descripcion_Objeto': objeto,
+        'Codigo_Necesidad_Contratacion': codigo,
+        'No': '1',
+        'CPC': cpc,
+        'Descripcion_Producto': descripcion,
+        'Unidad': unidad,
+        'Cantidad': cantidad,
+    }
+
+
+def test_compact_product_lines_merges_repeated_lines():
+    lines = compact_product_lines([
+        product('NIC-1', 'LICENCIA ANTIVIRUS', cantidad='10'),
+        product('NIC-1', '  licencia   antivirus ', cantidad='1,000'),
+        product('NIC-1', 'LICENCIA ANTIVIRUS', cpc='999'),
+        product('NIC-1', 'SOPORTE', cantidad='n/d'),
+    ])
+    assert len(lines) == 3
+    assert lines[0]['cantidad'] == 1010 and lines[0]['lineas'] == 2
+    assert lines[2]['cantidad'] is None
+
+
+def test_build_need_text():
+    text = build_need_text('ADQUISICIÓN  DE LICENCIAS', [
+        product('NIC-1', 'LICENCIA ANTIVIRUS', cantidad='10'),
+        product('NIC-1', 'LICENCIA ANTIVIRUS', cantidad='5'),
+    ], entidad='GAD MUNICIPAL DE MACHALA')
+    assert text == ('Necesidad: ADQUISICIÓN DE LICENCIAS | Entidad: GAD MUNICIPAL DE MACHALA | '
+                    'Productos (líneas: 2, distintas: 1): 432110012 LICENCIA ANTIVIRUS (15 Unidad, 2 líneas)')
+
+
+def test_build_need_text_caps_distinct_lines():
+    products = [product('NIC-1', f'PRODUCTO {i}') for i in range(MAX_PRODUCT_LINES + 5)]
+    text = build_need_text('OBJETO', products)
+    assert '… y 5 productos más' in text
+    assert f'PRODUCTO {MAX_PRODUCT_LINES}' not in text
+
+
+def test_group_needs_by_nic_code():
+    df = pd.DataFrame([
+        product('NIC-2', 'LICENCIA ANTIVIRUS', registro=0),
+        product('NIC-1', 'SERVIDOR', registro=1, objeto='COMPRA DE SERVIDORES'),
+        product('NIC-2', 'SOPORTE', registro=0),
+        product(None, 'PAPEL', registro=5),
+        product('N/A', 'TINTA', registro=6),
+    ], index=[10, 11, 12, 13, 14])
+    needs = group_needs(df)
+    assert [(codigo, indexes) for codigo, _, indexes in needs] == [
+        ('NIC-2', [10, 12]), ('NIC-1', [11]), ('Registro 5', [13]), ('Registro 6', [14])
+    ]
+    assert 'COMPRA DE SERVIDORES' in needs[1][1]
+
+
+class FakeAnalyzer:
+    def __init__(self):
+        self.items = []
+
+    def analyze(self, items):
+        self.items.extend(items)
+        return {key: {'puntuacion_relevancia': len(self.items), 'prioridad': 'Alta'} for key, _ in items}
+
+
+def test_analyze_needs_copies_one_result_to_every_product():
+    df = pd.DataFrame([
+        product('NIC-2', 'LICENCIA ANTIVIRUS'),
+        product('NIC-1', 'SERVIDOR'),
+        product('NIC-2', 'SOPORTE'),
+    ])
+    analyzer = FakeAnalyzer()
+    by_product = analyze_needs(analyzer, group_needs(df))
+    assert [key for key, _ in analyzer.items] == ['NIC-2', 'NIC-1']
+    assert set(by_product) == {0, 1, 2}
+    assert by_product[0] == by_product[2]
+    by_product[0]['prioridad'] = 'Baja'
+    assert by_product[2]['prioridad'] == 'Alta'  # copias independientes
+
+
+def test_need_scores_indexed_by_code():
+    df = pd.DataFrame([
+        product('NIC-2', 'LICENCIA DE SOFTWARE ANTIVIRUS'),
+        product('NIC-1', 'PAPEL BOND', objeto='COMPRA DE PAPEL'),
+    ])
+    ranker = RelevanceRanker({'Software': ['software']}, idf_path=None)
+    scores = need_scores(ranker, group_needs(df))
+    assert list(scores.index) == ['NIC-2', 'NIC-1']
+    assert scores['NIC-2'] > 0 and scores['NIC-1'] == 0
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas offline de la compactación de releases OCDS (ocds_compactor.py)
+"""
+
+import json
+
+import pytest
+
+from gemini_executor import estimate_tokens
+from ocds_compactor import compact_release, load_release, release_size
+
+
+def build_release(items=50, description_chars=5000):
+    """
+    Release OCDS sintético con la forma de la API de datos abiertos del SERCOP
+    """
+    return {
+        'ocid': 'ocds-5wno2w-SIE-GADMM-2025-00001',
+        'buyer': {'name': 'GOBIERNO AUTONOMO DESCENTRALIZADO MUNICIPAL DE MACHALA'},
+        'parties': [{'name': f'PROVEEDOR {i}', 'address': {'streetAddress': 'AV. 25 DE JUNIO'}} for i in range(30)],
+        'tender': {
+            'title': 'ADQUISICIÓN DE LICENCIAS DE SOFTWARE ANTIVIRUS',
+            'description': 'Licenciamiento de software de seguridad informática. ' * (description_chars // 55),
+            'value': {'amount': 45000.5, 'currency': 'USD'},
+            'tenderPeriod': {'startDate': '2025-09-25T18:55:00Z', 'endDate': '2025-10-02T18:55:00Z'},
+            'items': [
+                {
+                    'classification': {'id': f'4321100{i % 10}', 'description': 'LICENCIAS'},
+                    'description': f'LICENCIA DE SOFTWARE ANTIVIRUS PARA ESTACIONES DE TRABAJO LOTE {i}',
+                    'quantity': 10 + i,
+                    'unit': {'name': 'Unidad'},
+                }
+                for i in range(items)
+            ],
+        },
+    }
+
+
+@pytest.mark.parametrize('max_tokens', [20, 50, 100, 200, 400, 800])
+@pytest.mark.parametrize('items', [0, 1, 5, 200])
+@pytest.mark.parametrize('description_chars', [0, 120, 5000])
+def test_compact_release_stays_within_budget(max_tokens, items, description_chars):
+    text = compact_release(build_release(items, description_chars), max_tokens=max_tokens)
+    assert estimate_tokens(text) <= max_tokens
+
+
+def test_compact_release_keeps_key_fields():
+    text = compact_release(build_release(items=3, description_chars=120), max_tokens=400)
+    assert 'Título: ADQUISICIÓN DE LICENCIAS DE SOFTWARE ANTIVIRUS' in text
+    assert 'Comprador: GOBIERNO AUTONOMO DESCENTRALIZADO MUNICIPAL DE MACHALA' in text
+    assert 'Presupuesto: 45000.5 USD' in text
+    assert 'Ítems (3): 43211000 LICENCIA DE SOFTWARE' in text
+    assert '(10 Unidad)' in text
+    assert 'PROVEEDOR' not in text
+
+
+def test_compact_release_reports_omitted_items():
+    text = compact_release(build_release(items=200), max_tokens=200)
+    assert 'Ítems (200): ' in text
+    assert 'ítems más' in text
+
+
+def test_compact_release_is_much_smaller_than_full_release():
+    release = build_release()
+    assert estimate_tokens(compact_release(release)) * 5 < release_size(release)
+
+
+def test_load_release_accepts_json_and_excel_repr():
+    release = build_release(items=1, description_chars=0)
+    assert load_release(json.dumps(release)) == release
+    assert load_release(repr(release)) == release
+    assert load_release('') == {}
+    assert load_release(float('nan')) == {}
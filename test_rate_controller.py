@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas offline del control adaptativo de concurrencia (rate_controller.py)
+"""
+
+import time
+
+import pytest
+import requests
+
+import rate_controller
+from rate_controller import AdaptiveRateController
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeSession:
+    """
+    Devuelve las respuestas (o lanza las excepciones) indicadas en orden
+    """
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def request(self, method, url, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+@pytest.fixture
+def no_pause(monkeypatch):
+    pauses = []
+    monkeypatch.setattr(AdaptiveRateController, 'pause', lambda self, seconds: pauses.append(seconds))
+    return pauses
+
+
+def test_additive_increase_on_healthy_responses():
+    controller = AdaptiveRateController(initial_limit=2, max_limit=4)
+    controller.record(time.monotonic(), 0.1, status=200)
+    assert controller.limit == 2  # +1/límite por respuesta: 2.5
+    controller.record(time.monotonic(), 0.1, status=200)
+    controller.record(time.monotonic(), 0.1, status=200)
+    assert controller.limit == 3  # 2.9, 3.24
+    for _ in range(50):
+        controller.record(time.monotonic(), 0.1, status=200)
+    assert controller.limit == 4  # no supera max_limit
+
+
+def test_multiplicative_decrease_once_per_window():
+    controller = AdaptiveRateController(initial_limit=8, max_limit=16)
+    started = time.monotonic()
+    assert controller.record(started, 0.1, status=429) == 'throttled'
+    assert controller.limit == 4
+    # Otra petición que ya estaba en vuelo durante el recorte no vuelve a recortar
+    assert controller.record(started, 0.1, status=503) == 'server_error'
+    assert controller.limit == 4
+    controller.record(time.monotonic(), 0.1, error=requests.ConnectionError())
+    assert controller.limit == 2
+    for _ in range(5):
+        controller.record(time.monotonic(), 0.1, status=500)
+    assert controller.limit == 1  # no baja de min_limit
+    assert controller.get_stats()['throttled'] == 1
+    assert controller.get_stats()['server_error'] == 6
+
+
+def test_latency_spike_after_warmup():
+    controller = AdaptiveRateController(initial_limit=4, max_limit=4, warmup_samples=5, latency_spike_factor=3.0)
+    for _ in range(5):
+        controller.record(time.monotonic(), 0.1, status=200)
+    assert controller.record(time.monotonic(), 0.25, status=200) == 'ok'
+    assert controller.record(time.monotonic(), 1.0, status=200) == 'latency_spike'
+    assert controller.limit == 2
+
+
+def test_request_retries_and_closes_discarded_responses(no_pause):
+    throttled = FakeResponse(429, {'Retry-After': '7'})
+    failed = FakeResponse(502)
+    ok = FakeResponse(200)
+    session = FakeSession(throttled, failed, ok)
+    controller = AdaptiveRateController(max_retries=3)
+
+    assert controller.request(session, 'GET', 'https://example.org') is ok
+    assert session.calls == 3
+    assert throttled.closed and failed.closed and not ok.closed
+    assert no_pause[0] == 7.0
+    assert controller.get_stats()['in_flight'] == 0
+
+
+def test_request_returns_last_response_after_max_retries(no_pause):
+    session = FakeSession(*[FakeResponse(503) for _ in range(3)])
+    controller = AdaptiveRateController(max_retries=2)
+    response = controller.request(session, 'GET', 'https://example.org')
+    assert response.status_code == 503
+    assert session.calls == 3
+    assert len(no_pause) == 2
+
+
+def test_request_raises_connection_error_after_max_retries(no_pause):
+    session = FakeSession(requests.ConnectionError('a'), requests.Timeout('b'))
+    controller = AdaptiveRateController(max_retries=1)
+    with pytest.raises(requests.Timeout):
+        controller.request(session, 'GET', 'https://example.org')
+    assert controller.get_stats()['connection_error'] == 2
+
+
+def test_latency_histogram_buckets():
+    controller = AdaptiveRateController()
+    controller.record(time.monotonic(), 0.04, status=200)
+    controller.record(time.monotonic(), 0.3, status=200)
+    controller.record(time.monotonic(), 45.0, status=200)
+    histogram = controller.latency_histogram()
+    assert histogram['<=50ms'] == 1
+    assert histogram['<=500ms'] == 1
+    assert histogram['>30000ms'] == 1
+
+
+def test_configure_shared_controller_replaces_the_shared_instance(monkeypatch):
+    monkeypatch.setattr(rate_controller, '_shared_controller', None)
+    controller = rate_controller.configure_shared_controller(max_limit=6)
+    assert rate_controller.get_shared_controller() is controller
+    assert controller.max_limit == 6
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas offline del ranking local BM25 (relevance_ranker.py)
+"""
+
+import math
+import threading
+
+import pandas as pd
+
+from relevance_ranker import SCORE_COLUMN, RelevanceRanker, select_for_llm, tokenize
+
+PROFILE = {
+    'Software': ['software', 'sistema de gestión'],
+    'Seguridad': ['ciberseguridad'],
+}
+
+CORPUS = [
+    'ADQUISICIÓN DE MATERIALES DE OFICINA',
+    'SERVICIO DE LIMPIEZA Y ADQUISICIÓN DE INSUMOS',
+    'ADQUISICIÓN DE LICENCIAS DE SOFTWARE ANTIVIRUS',
+    'IMPLEMENTACIÓN DE UN SISTEMA DE GESTIÓN DOCUMENTAL',
+    'SERVICIO DE CIBERSEGURIDAD PERIMETRAL',
+    'ADQUISICIÓN DE COMBUSTIBLE',
+]
+
+
+def build_ranker(tmp_path, **kwargs):
+    ranker = RelevanceRanker(PROFILE, idf_path=str(tmp_path / 'idf.json'), **kwargs)
+    ranker.update_corpus(CORPUS)
+    return ranker
+
+
+def test_tokenize_folds_accents_stopwords_and_plurals():
+    assert tokenize('Adquisición de LICENCIAS y Soluciones') == ['adquisicion', 'licencia', 'solucion']
+
+
+def test_bm25_scores_profile_terms(tmp_path):
+    ranker = build_ranker(tmp_path)
+    assert ranker.score_text('ADQUISICIÓN DE MATERIALES DE OFICINA') == 0.0
+    assert ranker.score_text('LICENCIAS DE SOFTWARE') > 0
+    # Un término raro en el corpus pesa más que uno común
+    assert ranker.idf('ciberseguridad') > ranker.idf('adquisicion')
+    # El IDF sigue la fórmula BM25 con suavizado +1
+    assert math.isclose(ranker.idf('software'), math.log(1 + (6 - 1 + 0.5) / (1 + 0.5)))
+
+
+def test_phrase_terms_only_score_together(tmp_path):
+    ranker = build_ranker(tmp_path)
+    assert ranker.score_text('SISTEMA DE GESTIÓN DOCUMENTAL') > 0
+    assert ranker.score_text('SISTEMA DE RIEGO Y GESTIÓN AMBIENTAL') == 0.0
+
+
+def test_shorter_documents_score_higher(tmp_path):
+    ranker = build_ranker(tmp_path)
+    short = ranker.score_text('SOFTWARE ANTIVIRUS')
+    long = ranker.score_text('SOFTWARE ANTIVIRUS PARA ESTACIONES DE TRABAJO DEL EDIFICIO MATRIZ Y SUCURSALES')
+    assert short > long > 0
+
+
+def test_update_corpus_counts_each_text_once(tmp_path):
+    ranker = build_ranker(tmp_path)
+    assert ranker.documents == len(CORPUS)
+    assert ranker.update_corpus(['adquisición de combustible', 'NUEVA NECESIDAD DE SOFTWARE']) == 1
+    assert ranker.documents == len(CORPUS) + 1
+
+
+def test_idf_round_trip(tmp_path):
+    ranker = build_ranker(tmp_path)
+    ranker.save()
+    reloaded = RelevanceRanker(PROFILE, idf_path=str(tmp_path / 'idf.json'))
+    assert reloaded.documents == ranker.documents
+    assert reloaded.total_length == ranker.total_length
+    assert reloaded.doc_freq == ranker.doc_freq
+    assert reloaded.score_text('LICENCIAS DE SOFTWARE') == ranker.score_text('LICENCIAS DE SOFTWARE')
+    assert reloaded.update_corpus(CORPUS) == 0
+
+
+def test_seen_fingerprints_are_capped(tmp_path):
+    ranker = build_ranker(tmp_path, max_seen=3)
+    assert len(ranker._seen) == 3
+    ranker.save()
+    reloaded = RelevanceRanker(PROFILE, idf_path=str(tmp_path / 'idf.json'), max_seen=2)
+    assert len(reloaded._seen) == 2
+    # La descripción más antigua ya no está entre las huellas y vuelve a contarse
+    assert reloaded.update_corpus([CORPUS[0]]) == 1
+
+
+def test_concurrent_updates_are_counted_once(tmp_path):
+    ranker = RelevanceRanker(PROFILE, idf_path=None)
+    texts = [f'NECESIDAD {i} DE SOFTWARE' for i in range(200)]
+    threads = [threading.Thread(target=ranker.update_corpus, args=(texts,)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert ranker.documents == 200
+    assert ranker.doc_freq['software'] == 200
+
+
+def test_score_series_and_selection(tmp_path):
+    ranker = build_ranker(tmp_path)
+    descriptions = pd.Series(['SOFTWARE ANTIVIRUS', None, 'COMBUSTIBLE', 'SOFTWARE ANTIVIRUS', 'CIBERSEGURIDAD'],
+                             index=[10, 11, 12, 13, 14])
+    scores = ranker.score(descriptions)
+    assert scores.name == SCORE_COLUMN
+    assert list(scores.index) == [10, 11, 12, 13, 14]
+    assert scores[10] == scores[13] > 0
+    assert scores[11] == scores[12] == 0
+
+    assert list(select_for_llm(scores)) == [True, False, False, True, True]
+    top = select_for_llm(scores, top_k=1)
+    assert top.sum() == 1 and top[scores.idxmax()]
+    assert not select_for_llm(scores, min_score=100).any()
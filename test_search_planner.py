@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas offline del planificador de búsquedas en el servidor (search_planner.py)
+"""
+
+import pytest
+
+import search_planner
+from config_example import KEYWORDS_HUREONSYS
+from search_planner import (
+    MIN_COLUMN_SEARCH_LENGTH,
+    OBJETO_COLUMN_INDEX,
+    plan_keyword_queries,
+    query_field,
+    search_candidates_dataframe
+)
+from sercop_listing_client import ListingRow
+
+
+def test_short_keywords_use_global_search():
+    assert query_field('ETL') == 'producto'
+    assert query_field('datos') == 'objeto'
+    assert query_field('ETL', search_field='producto') == 'producto'
+
+
+def test_plan_drops_keywords_covered_by_a_shorter_one():
+    queries = plan_keyword_queries({'Datos': ['datos', 'análisis de datos', 'Datos', 'modelado']})
+    assert queries == [('datos', 'objeto'), ('modelado', 'objeto')]
+
+
+def test_short_keyword_does_not_cover_column_searches():
+    # "ETL" va por la búsqueda global, así que no cubre la búsqueda por columna de "procesos ETL"
+    queries = plan_keyword_queries({'Datos': ['ETL', 'procesos ETL']})
+    assert queries == [('ETL', 'producto'), ('procesos ETL', 'objeto')]
+    assert plan_keyword_queries({'Datos': ['ETL', 'procesos ETL']}, search_field='producto') == [('ETL', 'producto')]
+
+
+def test_every_column_search_meets_the_listing_minimum():
+    for keyword, field in plan_keyword_queries(KEYWORDS_HUREONSYS):
+        if field == 'objeto':
+            assert len(keyword) >= MIN_COLUMN_SEARCH_LENGTH
+    assert ('ETL', 'producto') in plan_keyword_queries(KEYWORDS_HUREONSYS)
+
+
+def test_search_candidates_sends_short_keywords_as_global_search(monkeypatch):
+    calls = []
+
+    class FakeClient:
+        def __init__(self, page_size=100):
+            pass
+
+        def iter_rows(self, max_records=None, search="", column_searches=None):
+            calls.append((search, column_searches))
+            query = search or column_searches[OBJETO_COLUMN_INDEX]
+            return iter([ListingRow('Ínfimas Cuantías', f'NIC-{query}', *[''] * 9)])
+
+    monkeypatch.setattr(search_planner, 'DataTablesListingClient', FakeClient)
+    df = search_candidates_dataframe({'Datos': ['ETL', 'estadística']}, concurrency=1)
+    assert sorted(calls, key=str) == sorted([('ETL', None), ('', {OBJETO_COLUMN_INDEX: 'estadística'})], key=str)
+    assert len(df) == 2
+
+
+def test_unknown_search_field_is_rejected():
+    with pytest.raises(ValueError):
+        search_candidates_dataframe({}, search_field='entidad')
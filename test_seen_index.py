@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas offline del índice persistente de códigos NIC (seen_index.py)
+"""
+
+import os
+import random
+
+import pytest
+
+from seen_index import RECORD_WIDTH, BloomFilter, SeenIndex
+
+
+def nic(i):
+    return f"NIC-{1760000000001 + i:013d}-2025-{i % 100000:05d}"
+
+
+@pytest.fixture(params=[False, True], ids=['sorted-file', 'bloom'])
+def index_path(request, tmp_path):
+    return str(tmp_path / 'seen.idx'), request.param
+
+
+def test_pending_codes_are_visible_before_flush(index_path):
+    path, use_bloom = index_path
+    index = SeenIndex(path, use_bloom=use_bloom)
+    index.update([nic(1), f"  {nic(2)}  ", '', None])
+    assert nic(1) in index
+    assert nic(2) in index
+    assert nic(3) not in index
+    assert '' not in index and None not in index
+    assert len(index) == 2
+
+
+def test_flush_merges_sorted_and_deduplicated(index_path):
+    path, use_bloom = index_path
+    codes = [nic(i) for i in range(500)]
+    random.Random(7).shuffle(codes)
+
+    index = SeenIndex(path, use_bloom=use_bloom)
+    index.update(codes[:300])
+    assert index.flush() == 300
+    index.update(codes[200:])  # 100 repetidos y 200 nuevos
+    assert index.flush() == 200
+    assert index.flush() == 0
+
+    on_disk = list(index.iter_codes())
+    assert on_disk == sorted(codes)
+    assert len(index) == 500
+    assert os.path.getsize(path) == len(on_disk) * RECORD_WIDTH
+
+
+def test_contains_after_reopen(index_path):
+    path, use_bloom = index_path
+    index = SeenIndex(path, use_bloom=use_bloom)
+    index.update(nic(i) for i in range(0, 200, 2))
+    index.flush()
+
+    reopened = SeenIndex(path, use_bloom=use_bloom)
+    for i in range(200):
+        assert (nic(i) in reopened) == (i % 2 == 0)
+    assert ' ' + nic(0) in reopened
+
+
+def test_code_too_long_is_rejected(tmp_path):
+    index = SeenIndex(str(tmp_path / 'seen.idx'))
+    index.add('X' * RECORD_WIDTH)
+    with pytest.raises(ValueError):
+        index.flush()
+
+
+def test_bloom_filter_roundtrip(tmp_path):
+    bloom = BloomFilter(expected_items=1000, fp_rate=0.01)
+    for i in range(1000):
+        bloom.add(nic(i))
+    path = str(tmp_path / 'seen.bloom')
+    bloom.save(path, 1000)
+    loaded, record_count = BloomFilter.load(path)
+    assert record_count == 1000
+    assert all(nic(i) in loaded for i in range(1000))
+    false_positives = sum(nic(i) in loaded for i in range(1000, 11000))
+    assert false_positives < 300
+
+
+def test_len_does_not_double_count_pending_codes_on_disk(index_path):
+    path, use_bloom = index_path
+    index = SeenIndex(path, use_bloom=use_bloom)
+    index.update(nic(i) for i in range(10))
+    index.flush()
+    index.update(nic(i) for i in range(5, 15))
+    assert len(index) == 15
+    index.flush()
+    assert len(index) == 15
+
+
+def test_stale_bloom_is_rebuilt_after_flush_without_bloom(tmp_path):
+    path = str(tmp_path / 'seen.idx')
+    index = SeenIndex(path, use_bloom=True)
+    index.update(nic(i) for i in range(100))
+    index.flush()
+
+    # Una ejecución sin Bloom añade códigos y deja el .bloom anterior
+    plain = SeenIndex(path)
+    plain.update(nic(i) for i in range(100, 200))
+    plain.flush()
+
+    reopened = SeenIndex(path, use_bloom=True)
+    assert all(nic(i) in reopened for i in range(200))
+    assert BloomFilter.load(path + '.bloom')[1] == 200
+
+
+def test_bloom_without_header_is_rebuilt(tmp_path):
+    path = str(tmp_path / 'seen.idx')
+    index = SeenIndex(path)
+    index.update(nic(i) for i in range(50))
+    index.flush()
+    with open(path + '.bloom', 'wb') as f:
+        f.write(b'\x00' * 64)
+    reopened = SeenIndex(path, use_bloom=True)
+    assert all(nic(i) in reopened for i in range(50))
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas offline del parser de páginas de detalle (sercop_detail_client.py)
+sobre la página de detalle sintética del benchmark
+"""
+
+import contextlib
+
+from benchmark_suite import build_detail_html
+from sercop_detail_client import (
+    DetailFetcher,
+    looks_like_detail_page,
+    parse_detail_page_html,
+    parse_detail_record,
+    resolve_detail_url
+)
+
+# Página de inicio de sesión que el sitio devuelve sin cookie de sesión
+LOGIN_HTML = """<html><body>
+<form action="/ProcesoContratacion/compras/login.cpe" method="post">
+<table>
+  <tr><td>Usuario</td><td><input name="txtRUCRecordatorio"></td></tr>
+  <tr><td>Contraseña</td><td><input type="password" name="txtPassword"></td></tr>
+  <tr><td>1</td><td>Ingresar</td><td>Olvidó su contraseña</td><td>Registro</td><td>Ayuda</td></tr>
+</table>
+</form>
+</body></html>"""
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+        self.encoding = 'utf-8'
+        self.apparent_encoding = 'utf-8'
+
+    def raise_for_status(self):
+        pass
+
+
+class FakeController:
+    """
+    Devuelve las páginas indicadas en orden, como el controlador de ritmo sobre la sesión HTTP
+    """
+
+    def __init__(self, *pages):
+        self.pages = list(pages)
+        self.calls = 0
+
+    def request(self, session, method, url, **kwargs):
+        self.calls += 1
+        return FakeResponse(self.pages.pop(0) if len(self.pages) > 1 else self.pages[0])
+
+
+class FakeDriver:
+    def get(self, url):
+        pass
+
+    def get_cookies(self):
+        return [{'name': 'JSESSIONID', 'value': 'abc', 'domain': 'www.compraspublicas.gob.ec'}]
+
+
+class FakePool:
+    @contextlib.contextmanager
+    def acquire(self):
+        yield FakeDriver()
+
+
+def test_parse_detail_record_codigo_and_products():
+    record = parse_detail_record(build_detail_html(products=6))
+    assert record.codigo == 'NIC-0760000260001-2025-00102'
+    assert len(record.products) == 6
+    first = record.products[0]
+    assert first.to_list() == ['1', '432110012', 'ADQUISICIÓN DE LICENCIAS DE SOFTWARE ANTIVIRUS', 'Unidad', '50']
+    assert record.products[4].no == '5'
+
+
+def test_parse_detail_record_header_fields():
+    record = parse_detail_record(build_detail_html(products=1))
+    assert record.entidad == 'GOBIERNO AUTONOMO DESCENTRALIZADO MUNICIPAL DE MACHALA'
+    assert record.fecha_publicacion == '2025-09-25 18:55:00'
+    assert record.fecha_limite == '2025-09-26 18:57:00'
+    assert record.estado == 'En Curso'
+    assert record.direccion_entrega == 'AV. 25 DE JUNIO Y 9 DE MAYO'
+    assert record.campos['Estado'] == 'En Curso'
+
+
+def test_parse_detail_record_ignores_script_text():
+    html_content = build_detail_html(products=1).replace(
+        '<body>', '<body><script>var t = "Código Necesidad de Contratación: NIC-1-2-3";</script>'
+    )
+    assert parse_detail_record(html_content).codigo == 'NIC-0760000260001-2025-00102'
+
+
+def test_parse_detail_record_empty_page():
+    record = parse_detail_record('')
+    assert record.codigo is None
+    assert record.products == []
+
+
+def test_parse_detail_page_html_matches_record():
+    html_content = build_detail_html(products=3)
+    product_data, codigo = parse_detail_page_html(html_content)
+    record = parse_detail_record(html_content)
+    assert codigo == record.codigo
+    assert product_data == record.product_rows()
+
+
+def test_looks_like_detail_page():
+    assert looks_like_detail_page(build_detail_html(products=2))
+    assert looks_like_detail_page('<table><tr><th>No.</th><th>CPC</th></tr></table>')
+    assert looks_like_detail_page('<strong>C&oacute;digo Necesidad de Contrataci&oacute;n:</strong>')
+    assert not looks_like_detail_page('<html><body><table><tr><td>Usuario</td></tr></table></body></html>')
+    assert not looks_like_detail_page('')
+
+
+def test_resolve_detail_url():
+    assert resolve_detail_url('../NCO/NCORegistroDetalle.cpe?id=1') == \
+        'https://www.compraspublicas.gob.ec/ProcesoContratacion/compras/NCO/NCORegistroDetalle.cpe?id=1'
+    assert resolve_detail_url('/ProcesoContratacion/x.cpe') == 'https://www.compraspublicas.gob.ec/ProcesoContratacion/x.cpe'
+    assert resolve_detail_url('https://example.org/a') == 'https://example.org/a'
+
+
+def test_fetch_record_login_page_returns_empty_record():
+    controller = FakeController(LOGIN_HTML)
+    fetcher = DetailFetcher(rate_controller=controller)
+    record = fetcher.fetch_record('../NCO/NCORegistroDetalle.cpe?id=1')
+    assert record.codigo is None
+    assert record.products == []
+    assert fetcher.fetch('../NCO/NCORegistroDetalle.cpe?id=1') == ([], None)
+
+
+def test_fetch_record_login_page_after_bootstrap_returns_empty_record():
+    controller = FakeController(LOGIN_HTML)
+    fetcher = DetailFetcher(pool=FakePool(), rate_controller=controller)
+    record = fetcher.fetch_record('../NCO/NCORegistroDetalle.cpe?id=1')
+    assert controller.calls == 2
+    assert record.products == []
+    assert fetcher.session.cookies.get('JSESSIONID') == 'abc'
+
+
+def test_fetch_record_retries_after_browser_cookies():
+    controller = FakeController(LOGIN_HTML, build_detail_html(products=2))
+    fetcher = DetailFetcher(pool=FakePool(), rate_controller=controller)
+    record = fetcher.fetch_record('../NCO/NCORegistroDetalle.cpe?id=1')
+    assert record.codigo == 'NIC-0760000260001-2025-00102'
+    assert len(record.products) == 2
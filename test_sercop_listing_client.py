@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas offline del cliente JSON del listado (sercop_listing_client.py)
+sobre la página del listado guardada
+"""
+
+from lxml import html as lxml_html
+
+from benchmark_listing_parser import FIXTURE_HTML
+from crawl_checkpoint import CheckpointJournal
+from listing_html_parser import parse_listing_rows
+from sercop_listing_client import (
+    COLUMN_KEYS,
+    DataTablesListingClient,
+    LISTING_HEADERS,
+    ListingRow,
+    dedupe_rows,
+    parse_record,
+    parse_total_from_info,
+    rows_to_dataframe
+)
+
+
+def read_fixture():
+    with open(FIXTURE_HTML, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def fixture_records():
+    """
+    Filas de #table_id como registros aaData: {clave 'data': HTML de la celda}
+    """
+    document = lxml_html.fromstring(read_fixture())
+    records = []
+    for tr in document.xpath('//table[@id="table_id"]/tbody/tr'):
+        cells = []
+        for td in tr.xpath('./td'):
+            inner = (td.text or '') + ''.join(lxml_html.tostring(child, encoding='unicode') for child in td)
+            cells.append(inner)
+        records.append(dict(zip(COLUMN_KEYS, cells)))
+    return records
+
+
+def test_parse_record_matches_html_listing():
+    records = fixture_records()
+    expected = parse_listing_rows(read_fixture(), backend='bs4')
+    assert len(records) == len(expected) == 100
+    assert [parse_record(record).to_list() for record in records] == expected
+
+
+def test_parse_record_accepts_positional_records():
+    record = fixture_records()[0]
+    positional = [record[key] for key in COLUMN_KEYS]
+    assert parse_record(positional) == parse_record(record)
+
+
+def test_parse_record_entity_link():
+    row = parse_record({
+        'codigo_contratacion': 'NIC-0760000260001-2025-00102',
+        'objeto_contratacion': 'ADQUISICI&Oacute;N DE TRAJES',
+        'url': '<a href="../NCO/NCORegistroDetalle.cpe?id=abc">GAD MUNICIPAL DE MACHALA</a>',
+    })
+    assert row.codigo_contratacion == 'NIC-0760000260001-2025-00102'
+    assert row.objeto_contratacion == 'ADQUISICIÓN DE TRAJES'
+    assert row.entidad_contratante == 'GAD MUNICIPAL DE MACHALA'
+    assert row.url_detalle == '../NCO/NCORegistroDetalle.cpe?id=abc'
+    assert row.contacto == ''
+
+
+def test_parse_record_pads_short_records():
+    row = parse_record(['Ínfimas Cuantías', 'NIC-1'])
+    assert row.tipo_necesidad == 'Ínfimas Cuantías'
+    assert row.codigo_contratacion == 'NIC-1'
+    assert row.url_detalle == ''
+
+
+def test_parse_total_from_info():
+    info = "Mostrando registros del 1 al 100 de un total de 1,561 registros (filtrado de un total de 1,158,637 registros)"
+    assert parse_total_from_info(info) == (1561, 1158637)
+    assert parse_total_from_info("Mostrando registros del 1 al 10 de un total de 9.876 registros") == (9876, 9876)
+    assert parse_total_from_info("") == (None, None)
+    assert parse_total_from_info(None) == (None, None)
+
+
+def test_parse_total_from_fixture_info():
+    info = lxml_html.fromstring(read_fixture()).xpath('//*[@id="table_id_info"]')[0].text_content()
+    assert parse_total_from_info(info) == (1561, 1158637)
+
+
+def test_dedupe_rows_keeps_first_row_per_code():
+    first = ListingRow('A', 'NIC-1', *[''] * 8, 'url-1')
+    repeated = ListingRow('B', 'NIC-1', *[''] * 8, 'url-1b')
+    without_code = ListingRow('C', '', *[''] * 8, 'url-2')
+    rows = list(dedupe_rows([first, repeated, without_code, without_code.to_list()]))
+    assert rows == [first, without_code]
+
+
+def test_rows_to_dataframe_columns():
+    df = rows_to_dataframe(parse_record(record) for record in fixture_records()[:5])
+    assert list(df.columns) == LISTING_HEADERS
+    assert len(df) == 5
+
+
+class FakeListingClient(DataTablesListingClient):
+    """
+    Cliente que sirve los registros de la página guardada como si fueran el endpoint JSON
+    """
+
+    def __init__(self, records, page_size=10):
+        super().__init__(session=object(), page_size=page_size, rate_controller=object())
+        self.records = records
+        self.requested = []
+
+    def fetch_page(self, start, length=None, search="", column_searches=None):
+        length = length or self.page_size
+        self.requested.append((start, length))
+        return {'iTotalDisplayRecords': len(self.records), 'aaData': self.records[start:start + length]}
+
+
+def test_fetch_dataframe_with_seen_index_records_journal(tmp_path):
+    records = fixture_records()[:30]
+    journal = CheckpointJournal(str(tmp_path / 'checkpoint.jsonl'))
+    seen = set(parse_record(record).codigo_contratacion for record in records[5:])
+    client = FakeListingClient(records)
+
+    df = client.fetch_dataframe(seen_index=seen, journal=journal)
+    assert len(df) == 5
+    # Bloques 0 y 10 descargados (el segundo ya es conocido y corta la paginación)
+    assert sorted(journal.completed_pages()) == [0, 10]
+
+    resumed_client = FakeListingClient(records)
+    resumed = CheckpointJournal(str(tmp_path / 'checkpoint.jsonl'), resume=True)
+    df = resumed_client.fetch_dataframe(seen_index=seen, journal=resumed)
+    assert len(df) == 5
+    assert resumed_client.requested == [(0, 1)]  # solo la consulta del total
+
+
+def test_resume_truncates_restored_block_to_max_records(tmp_path):
+    records = fixture_records()[:30]
+    path = str(tmp_path / 'checkpoint.jsonl')
+    FakeListingClient(records).fetch_dataframe(journal=CheckpointJournal(path))
+
+    client = FakeListingClient(records)
+    df = client.fetch_dataframe(max_records=15, journal=CheckpointJournal(path, resume=True))
+    assert len(df) == 15
+    assert list(df[LISTING_HEADERS[1]]) == [parse_record(record).codigo_contratacion for record in records[:15]]
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas offline del pipeline en streaming (streaming_pipeline.py)
+"""
+
+import csv
+
+import pytest
+
+from sercop_listing_client import LISTING_HEADERS
+from streaming_pipeline import ANALYSIS_COLUMNS, NEED_COLUMNS, PRODUCT_COLUMNS, CsvStreamSink, StreamingPipeline
+
+
+def listing_record(i, descripcion='SOFTWARE DE GESTIÓN'):
+    record = dict.fromkeys(LISTING_HEADERS, '')
+    record.update({
+        'Código Necesidad de Contratación': f'NIC-{i}',
+        'Descripción del Objeto de compra': descripcion,
+        'Entidad Contratante': 'GAD MUNICIPAL DE MACHALA',
+        'URL_Detalle': f'https://detalle/{i}',
+    })
+    return record
+
+
+def read_csv(path):
+    with open(path, 'r', newline='', encoding='utf-8-sig') as f:
+        return list(csv.DictReader(f))
+
+
+def header(path):
+    with open(path, 'r', newline='', encoding='utf-8-sig') as f:
+        return next(csv.reader(f))
+
+
+def test_need_header_is_declared_not_taken_from_first_record(tmp_path):
+    sink = CsvStreamSink(str(tmp_path), prefix='t')
+    # El primer registro llega sin las columnas del detalle (detalle fallido)
+    sink.write(listing_record(1))
+    sink.write(dict(listing_record(2), **{
+        'Categoría': 'Software', 'Codigo_Necesidad_Contratacion': 'NIC-2',
+        'Detalles_Productos': [['1', '432110012', 'LICENCIA', 'Unidad', '5']],
+    }))
+    sink.close()
+
+    assert header(sink.paths['needs']) == NEED_COLUMNS
+    rows = read_csv(sink.paths['needs'])
+    assert rows[0]['Codigo_Necesidad_Contratacion'] == '' and rows[0]['Productos'] == '0'
+    assert rows[1]['Codigo_Necesidad_Contratacion'] == 'NIC-2' and rows[1]['Categoría'] == 'Software'
+    assert header(sink.paths['products']) == PRODUCT_COLUMNS
+    assert read_csv(sink.paths['products'])[0]['Codigo_Necesidad_Contratacion'] == 'NIC-2'
+
+
+def test_append_skips_written_needs_and_keeps_header(tmp_path):
+    first = CsvStreamSink(str(tmp_path), prefix='t')
+    first.write(listing_record(1))
+    first.close()
+
+    resumed = CsvStreamSink(str(tmp_path), prefix='t', append=True)
+    resumed.write(listing_record(1))
+    resumed.write(dict(listing_record(2), Analisis_IA=[dict.fromkeys(ANALYSIS_COLUMNS, 'x')]))
+    resumed.close()
+
+    assert resumed.counts['skipped'] == 1
+    assert [row['Código Necesidad de Contratación'] for row in read_csv(resumed.paths['needs'])] == ['NIC-1', 'NIC-2']
+    with open(resumed.paths['needs'], 'rb') as f:
+        assert f.read().count(b'\xef\xbb\xbf') == 1
+    assert len(read_csv(resumed.paths['analysis'])) == 1
+
+
+def test_append_follows_existing_file_header(tmp_path):
+    sink = CsvStreamSink(str(tmp_path), prefix='t')
+    with open(sink.paths['needs'], 'w', newline='', encoding='utf-8-sig') as f:
+        csv.writer(f).writerow(['Código Necesidad de Contratación', 'Productos'])
+    resumed = CsvStreamSink(str(tmp_path), prefix='t', append=True)
+    resumed.write(listing_record(3))
+    resumed.close()
+    assert read_csv(resumed.paths['needs']) == [{'Código Necesidad de Contratación': 'NIC-3', 'Productos': '0'}]
+
+
+def build_pipeline(sink, fail_detail=()):
+    def match(record):
+        if 'SOFTWARE' not in record['Descripción del Objeto de compra']:
+            return None
+        return {'Categoría': 'Software'}
+
+    def fetch_detail(record):
+        if record['Código Necesidad de Contratación'] in fail_detail:
+            raise RuntimeError('detalle no disponible')
+        record['Detalles_Productos'] = [['1', '432110012', 'LICENCIA', 'Unidad', '5']]
+        record['Codigo_Necesidad_Contratacion'] = record['Código Necesidad de Contratación']
+        return record
+
+    def analyze(record):
+        return [dict.fromkeys(ANALYSIS_COLUMNS, 'x')]
+
+    return StreamingPipeline(match, fetch_detail, sink, analyze=analyze, detail_workers=3, ai_workers=2, buffer_size=2)
+
+
+def test_pipeline_filters_fetches_and_writes(tmp_path):
+    records = [listing_record(i, 'SOFTWARE' if i % 2 else 'PAPEL') for i in range(40)]
+    sink = CsvStreamSink(str(tmp_path), prefix='t', flush_every=3)
+    pipeline = build_pipeline(sink, fail_detail={'NIC-5'})
+    results = pipeline.run(iter(records))
+
+    assert pipeline.stats['scanned'] == 40
+    assert pipeline.stats['matched'] == len(results) == 20
+    assert pipeline.stats['errors'] == 1
+    assert pipeline.stats['analyzed'] == 19
+    assert len(pipeline.scanned_codes) == 40
+    failed = [record for record in results if record['Código Necesidad de Contratación'] == 'NIC-5'][0]
+    assert 'Detalles_Productos' not in failed
+    assert len(read_csv(sink.paths['needs'])) == 20
+    assert len(read_csv(sink.paths['products'])) == 19
+
+
+def test_listing_error_is_raised_after_draining(tmp_path):
+    def records():
+        yield listing_record(1)
+        yield listing_record(2)
+        raise ConnectionError('listado caído')
+
+    sink = CsvStreamSink(str(tmp_path), prefix='t')
+    pipeline = build_pipeline(sink)
+    with pytest.raises(ConnectionError):
+        pipeline.run(records())
+    assert pipeline.stats['written'] == 2
+    assert len(read_csv(sink.paths['needs'])) == 2
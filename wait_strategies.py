@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Esperas basadas en eventos para las páginas del SERCOP.
+
+Reemplaza los time.sleep fijos por señales reales de carga: el evento 'draw'
+de DataTables y la visibilidad de #table_id_processing en el listado, y la
+presencia de la tabla de productos y del <strong> "Código Necesidad de
+Contratación" en el detalle. Cada espera registra cuánto tardó realmente.
+"""
+
+import threading
+import time
+from collections import defaultdict
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+
+POLL_FREQUENCY = 0.1
+
+# Contador de eventos draw.dt en la página (se instala una vez por documento)
+_INSTALL_DRAW_HOOK_JS = """
+if (window.jQuery && !window.__sercopDrawHook) {
+    window.__sercopDraws = window.__sercopDraws || 0;
+    jQuery('#table_id').on('draw.dt', function () { window.__sercopDraws += 1; });
+    window.__sercopDrawHook = true;
+}
+return window.__sercopDraws || 0;
+"""
+
+# Listado listo: tabla dibujada, indicador "Procesando..." oculto y sin XHR en curso
+_LISTING_IDLE_JS = """
+var processing = document.getElementById('table_id_processing');
+var busy = processing && processing.offsetParent !== null && getComputedStyle(processing).display !== 'none';
+var rows = document.querySelectorAll('#table_id tbody tr').length;
+var ajaxIdle = !window.jQuery || jQuery.active === 0;
+return !busy && rows > 0 && ajaxIdle;
+"""
+
+_DETAIL_CODE_XPATH = "//strong[contains(normalize-space(.), 'Código Necesidad de Contratación')]"
+
+_stats_lock = threading.Lock()
+_wait_durations = defaultdict(list)
+
+
+def record_wait(name, seconds):
+    """
+    Registra la duración real de una espera
+    """
+    with _stats_lock:
+        _wait_durations[name].append(seconds)
+
+
+def get_wait_stats():
+    """
+    Resumen por tipo de espera: número, media, máximo y total en segundos
+    """
+    with _stats_lock:
+        stats = {}
+        for name, durations in _wait_durations.items():
+            stats[name] = {
+                'count': len(durations),
+                'mean': sum(durations) / len(durations),
+                'max': max(durations),
+                'total': sum(durations),
+            }
+        return stats
+
+
+def reset_wait_stats():
+    with _stats_lock:
+        _wait_durations.clear()
+
+
+def print_wait_stats():
+    """
+    Muestra los tiempos de espera medidos
+    """
+    stats = get_wait_stats()
+    if not stats:
+        return
+    print("\n[INFO] Tiempos de espera medidos:")
+    for name, s in sorted(stats.items()):
+        print(f"   • {name}: {s['count']} esperas, media {s['mean']:.2f}s, máx {s['max']:.2f}s, total {s['total']:.1f}s")
+
+
+def _timed_wait(driver, name, timeout, condition):
+    """
+    Espera hasta que condition(driver) sea verdadera y registra el tiempo empleado
+    """
+    start = time.perf_counter()
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=POLL_FREQUENCY).until(condition)
+        return True
+    except TimeoutException:
+        print(f"    [INFO] Tiempo agotado esperando '{name}' ({timeout}s)")
+        return False
+    finally:
+        record_wait(name, time.perf_counter() - start)
+
+
+def install_draw_hook(driver):
+    """
+    Instala el contador de eventos draw.dt y devuelve el valor actual
+    """
+    try:
+        return driver.execute_script(_INSTALL_DRAW_HOOK_JS) or 0
+    except Exception:
+        return 0
+
+
+def wait_for_listing_ready(driver, timeout=30):
+    """
+    Espera la carga inicial del listado (tabla con filas y sin 'Procesando...')
+    """
+    ready = _timed_wait(
+        driver, 'listado_inicial', timeout,
+        lambda d: d.find_elements(By.ID, "table_id") and d.execute_script(_LISTING_IDLE_JS)
+    )
+    install_draw_hook(driver)
+    return ready
+
+
+def wait_for_listing_draw(driver, draws_before, timeout=15):
+    """
+    Espera el siguiente evento draw de DataTables tras una acción (p. ej. cambio de página)
+    """
+    return _timed_wait(
+        driver, 'listado_draw', timeout,
+        lambda d: (d.execute_script("return window.__sercopDraws || 0") > draws_before
+                   and d.execute_script(_LISTING_IDLE_JS))
+    )
+
+
+def wait_for_detail_page(driver, timeout=15):
+    """
+    Espera la tabla de productos y el <strong> del código de necesidad en la página de detalle
+    """
+    return _timed_wait(
+        driver, 'detalle', timeout,
+        lambda d: (d.execute_script("return document.readyState") == 'complete'
+                   and d.find_elements(By.TAG_NAME, "table")
+                   and d.find_elements(By.XPATH, _DETAIL_CODE_XPATH))
+    )